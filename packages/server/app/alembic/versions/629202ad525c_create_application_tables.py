@@ -0,0 +1,609 @@
+"""Create application tables
+
+Databases created by `SQLModel.metadata.create_all` already have some or all of
+these tables, so existing tables are left untouched and only the missing ones are
+created. Indexes for the query paths are added in the next revision.
+
+Revision ID: 629202ad525c
+Revises: e2412789c190
+Create Date: 2026-10-18 05:30:55.319041
+
+"""
+
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = "629202ad525c"
+down_revision = "e2412789c190"
+branch_labels = None
+depends_on = None
+
+invitestatus_enum = postgresql.ENUM(
+    "PENDING", "ACCEPTED", "REJECTED", "EXPIRED", name="invitestatus", create_type=False
+)
+role_enum = postgresql.ENUM("ADMIN", "MANAGER", name="role", create_type=False)
+leadtype_enum = postgresql.ENUM(
+    "SUSPECT", "PROSPECT", name="leadtype", create_type=False
+)
+leadstatus_enum = postgresql.ENUM(
+    "YET_TO_CONTACT",
+    "CONTACT_DROPPED",
+    "FIRST_MEETING_SCHEDULED",
+    "FIRST_MEETING_COMPLETED",
+    "SECOND_MEETING_SCHEDULED",
+    "CALL_CLOSED",
+    name="leadstatus",
+    create_type=False,
+)
+reportjobstatus_enum = postgresql.ENUM(
+    "PENDING",
+    "RUNNING",
+    "COMPLETED",
+    "FAILED",
+    name="reportjobstatus",
+    create_type=False,
+)
+prompttype_enum = postgresql.ENUM("CONVERSATION", name="prompttype", create_type=False)
+calltype_enum = postgresql.ENUM(
+    "APPOINTMENT_CALL", "MEETING_CALL", name="calltype", create_type=False
+)
+
+ENUMS = (
+    role_enum,
+    leadtype_enum,
+    leadstatus_enum,
+    calltype_enum,
+    prompttype_enum,
+    invitestatus_enum,
+    reportjobstatus_enum,
+)
+
+TABLES = (
+    "organizations",
+    "branches",
+    "attributes",
+    "event_rollups",
+    "events",
+    "invites",
+    "leads",
+    "report_jobs",
+    "users",
+    "agents",
+    "profile_snapshots",
+    "profiles",
+    "prompts",
+    "user_branch_mappings",
+    "calls",
+    "profile_attribute_mappings",
+)
+
+
+def _create_table(name, *columns):
+    if not sa.inspect(op.get_bind()).has_table(name):
+        op.create_table(name, *columns)
+
+
+def upgrade():
+    # Leftovers of the project template, never used by the application
+    op.execute("DROP TABLE IF EXISTS item")
+    op.execute('DROP TABLE IF EXISTS "user"')
+
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.create(bind, checkfirst=True)
+
+    _create_table(
+        "organizations",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "branches",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "attributes",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("attribute_data", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "event_rollups",
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("status", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("lead_type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("call_type", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("event_count", sa.Integer(), nullable=False),
+        sa.Column("lead_count", sa.Integer(), nullable=False),
+        sa.Column("duration_seconds", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint(
+            "branch_id", "day", "name", "status", "lead_type", "call_type"
+        ),
+    )
+    _create_table(
+        "events",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("data", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "invites",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("email", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("status", invitestatus_enum, nullable=False),
+        sa.Column("invited_by", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("role", role_enum, nullable=False),
+        sa.Column("token", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("token"),
+    )
+    _create_table(
+        "leads",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("type", leadtype_enum, nullable=False),
+        sa.Column("status", leadstatus_enum, nullable=False),
+        sa.Column(
+            "associated_agent", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("known_to_agent", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("meeting_date", sa.DateTime(), nullable=True),
+        sa.Column("created_by_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "created_by_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "report_jobs",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("call_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("status", reportjobstatus_enum, nullable=False),
+        sa.Column("payload", postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("run_after", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("locked_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("locked_by", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("completed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_report_jobs_call_id"),
+        "report_jobs",
+        ["call_id"],
+        unique=False,
+        if_not_exists=True,
+    )
+    op.create_index(
+        "ix_report_jobs_status_run_after",
+        "report_jobs",
+        ["status", "run_after"],
+        unique=False,
+        if_not_exists=True,
+    )
+    _create_table(
+        "users",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("email", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "hashed_password", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("full_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("designation", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column(
+            "current_branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("role", role_enum, nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["current_branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "agents",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("retell_llm_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "retell_agent_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("lead_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["lead_id"],
+            ["leads.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "profile_snapshots",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("lead_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("version", sa.Integer(), autoincrement=True, nullable=True),
+        sa.Column("data", sa.JSON(), nullable=False),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["lead_id"],
+            ["leads.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "profiles",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("lead_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("full_name", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("contact_number", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("email", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "physical_address", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("city", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("state", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("country", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("designation", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("zipcode", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("age", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("occupation", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("gender", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("marital_status", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("dependents", sa.Integer(), nullable=True),
+        sa.Column("city_tier", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("earning_members", sa.Integer(), nullable=True),
+        sa.Column("income_range", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("savings", sa.Float(), nullable=True),
+        sa.Column(
+            "existing_insurance_coverage",
+            sqlmodel.sql.sqltypes.AutoString(),
+            nullable=True,
+        ),
+        sa.Column(
+            "desired_insurance_coverage",
+            sqlmodel.sql.sqltypes.AutoString(),
+            nullable=True,
+        ),
+        sa.Column("car_loan", sa.Boolean(), nullable=True),
+        sa.Column("home_loan", sa.Boolean(), nullable=True),
+        sa.Column("other_loan", sa.Boolean(), nullable=True),
+        sa.Column("health_status", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "budget_conscious", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("trust_level", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "decision_making_style", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column(
+            "financial_literacy", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("likes", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("dislikes", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "concerns_and_priorities", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["lead_id"],
+            ["leads.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "prompts",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("text", sa.Text(), nullable=False),
+        sa.Column("created_by", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "created_by_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("known_to_agent", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("meeting_status", leadstatus_enum, nullable=True),
+        sa.Column("prompt_type", prompttype_enum, nullable=False),
+        sa.Column(
+            "report_prompt_text", sqlmodel.sql.sqltypes.AutoString(), nullable=True
+        ),
+        sa.Column("description", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["created_by"],
+            ["users.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "user_branch_mappings",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "calls",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("user_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("caller_name", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("lead_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column(
+            "profile_snapshot_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("branch_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("prompt_id", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column(
+            "organization_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False
+        ),
+        sa.Column("call_timestamp", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("agent_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("call_metadata", sa.JSON(), nullable=False),
+        sa.Column("transcript", sqlmodel.sql.sqltypes.AutoString(), nullable=True),
+        sa.Column("report", sa.JSON(), nullable=True),
+        sa.Column("analytics", sa.JSON(), nullable=True),
+        sa.Column("type", calltype_enum, nullable=True),
+        sa.ForeignKeyConstraint(
+            ["agent_id"],
+            ["agents.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["branch_id"],
+            ["branches.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["lead_id"],
+            ["leads.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"],
+            ["organizations.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["profile_snapshot_id"],
+            ["profile_snapshots.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["prompt_id"],
+            ["prompts.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    _create_table(
+        "profile_attribute_mappings",
+        sa.Column("id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("object", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("deleted_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("profile_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("attribute_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.Column("value", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["attribute_id"],
+            ["attributes.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["profile_id"],
+            ["profiles.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade():
+    for table in reversed(TABLES):
+        op.drop_table(table)
+
+    bind = op.get_bind()
+    for enum in ENUMS:
+        enum.drop(bind, checkfirst=True)
@@ -0,0 +1,71 @@
+"""Add query path indexes
+
+The indexes are built with CREATE INDEX CONCURRENTLY, which doesn't block writes
+to the tables while it runs, so it can't be part of the migration transaction.
+A concurrent build that fails leaves an INVALID index behind; drop it and run
+the upgrade again.
+
+Revision ID: 8d1f3a6c2b47
+Revises: 629202ad525c
+Create Date: 2026-10-18 05:42:10.512733
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "8d1f3a6c2b47"
+down_revision = "629202ad525c"
+branch_labels = None
+depends_on = None
+
+INDEXES = (
+    (
+        "ix_events_branch_id_name_created_at",
+        "events",
+        ["branch_id", "name", "created_at"],
+        {},
+    ),
+    (
+        "ix_leads_branch_id_created_at",
+        "leads",
+        ["branch_id", "created_at"],
+        {"postgresql_where": sa.text("deleted_at IS NULL")},
+    ),
+    ("ix_calls_branch_id_created_at", "calls", ["branch_id", "created_at"], {}),
+    ("ix_calls_user_id", "calls", ["user_id"], {}),
+    ("ix_agents_lead_id", "agents", ["lead_id"], {}),
+    ("ix_users_email", "users", ["email"], {}),
+    (
+        "ix_invites_organization_id_branch_id",
+        "invites",
+        ["organization_id", "branch_id"],
+        {},
+    ),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
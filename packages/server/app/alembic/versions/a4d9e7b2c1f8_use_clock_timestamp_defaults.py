@@ -0,0 +1,55 @@
+"""Use clock_timestamp() for timestamp server defaults
+
+now() is the start time of the transaction, so the rows written by a request,
+which commits once, all got the same timestamps, however long it ran.
+clock_timestamp() is the time each row is written.
+
+Revision ID: a4d9e7b2c1f8
+Revises: f3b8d1c6a4e2
+Create Date: 2026-10-18 15:21:09.664382
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "a4d9e7b2c1f8"
+down_revision = "f3b8d1c6a4e2"
+branch_labels = None
+depends_on = None
+
+TABLES = (
+    "organizations",
+    "branches",
+    "users",
+    "user_branch_mappings",
+    "attributes",
+    "profiles",
+    "profile_attribute_mappings",
+    "leads",
+    "profile_snapshots",
+    "events",
+    "calls",
+    "prompts",
+    "agents",
+    "invites",
+    "report_jobs",
+)
+
+# The columns given a server default by c5a0e8d2f913
+COLUMNS = (
+    *((table, column) for table in TABLES for column in ("created_at", "updated_at")),
+    ("event_rollups", "updated_at"),
+    ("calls", "call_timestamp"),
+)
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        op.alter_column(table, column, server_default=sa.text("clock_timestamp()"))
+
+
+def downgrade():
+    for table, column in reversed(COLUMNS):
+        op.alter_column(table, column, server_default=sa.text("now()"))
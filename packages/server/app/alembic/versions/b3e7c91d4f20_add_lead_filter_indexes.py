@@ -0,0 +1,65 @@
+"""Add lead filter indexes
+
+Backs the filters and the (created_at, id) keyset pagination of GET /leads.
+Built concurrently, see revision 8d1f3a6c2b47.
+
+Revision ID: b3e7c91d4f20
+Revises: 8d1f3a6c2b47
+Create Date: 2026-10-18 06:05:37.194826
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b3e7c91d4f20"
+down_revision = "8d1f3a6c2b47"
+branch_labels = None
+depends_on = None
+
+NOT_DELETED = {"postgresql_where": sa.text("deleted_at IS NULL")}
+
+INDEXES = (
+    *(
+        (
+            f"ix_leads_branch_id_{column}_created_at",
+            "leads",
+            ["branch_id", column, "created_at", "id"],
+            NOT_DELETED,
+        )
+        for column in ("status", "type", "known_to_agent", "created_by_id")
+    ),
+    (
+        "ix_leads_branch_id_meeting_date",
+        "leads",
+        ["branch_id", "meeting_date"],
+        NOT_DELETED,
+    ),
+    ("ix_profiles_lead_id", "profiles", ["lead_id"], {}),
+)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+                **kwargs,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(
+                name,
+                table_name=table,
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
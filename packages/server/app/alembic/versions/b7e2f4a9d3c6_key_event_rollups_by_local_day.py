@@ -0,0 +1,86 @@
+"""Key event_rollups by local day and lead
+
+The rollups' days were UTC days, which don't line up with the days of the
+branches, so local ranges and graphs were never served from them. They are now
+local days of METRICS_ROLLUP_TIMEZONE. The rows of the lead events also get the
+lead as a key, so the funnel stages can count distinct leads from them. The
+rollups are rebuilt from the events.
+
+Revision ID: b7e2f4a9d3c6
+Revises: a4d9e7b2c1f8
+Create Date: 2026-10-19 09:12:44.530871
+
+"""
+
+import os
+
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "b7e2f4a9d3c6"
+down_revision = "a4d9e7b2c1f8"
+branch_labels = None
+depends_on = None
+
+KEY = ("branch_id", "day", "name", "status", "lead_type", "call_type")
+
+REBUILD = """
+    INSERT INTO event_rollups (
+        {key}, organization_id, updated_at, event_count, duration_seconds
+    )
+    SELECT
+        branch_id,
+        CAST(created_at AT TIME ZONE :zone AS DATE),
+        name,
+        COALESCE(status, ''),
+        COALESCE(lead_type, ''),
+        COALESCE(call_type, ''),
+        {lead_id}
+        MIN(organization_id),
+        CLOCK_TIMESTAMP(),
+        COUNT(*),
+        COALESCE(SUM(duration_seconds) FILTER (WHERE name = 'call_ended'), 0)
+    FROM events
+    GROUP BY {group_by}
+"""
+
+LEAD_ID = """
+    CASE
+        WHEN name IN ('lead_created', 'lead_status_updated')
+        THEN COALESCE(lead_id, '')
+        ELSE ''
+    END,
+"""
+
+
+def upgrade():
+    op.execute("DELETE FROM event_rollups")
+    op.drop_constraint("event_rollups_pkey", "event_rollups", type_="primary")
+    op.add_column(
+        "event_rollups",
+        sa.Column("lead_id", sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    )
+    op.create_primary_key("event_rollups_pkey", "event_rollups", [*KEY, "lead_id"])
+    op.execute(
+        sa.text(
+            REBUILD.format(
+                key=", ".join((*KEY, "lead_id")),
+                lead_id=LEAD_ID,
+                group_by="1, 2, 3, 4, 5, 6, 7",
+            )
+        ).bindparams(zone=os.getenv("METRICS_ROLLUP_TIMEZONE", "Asia/Kolkata"))
+    )
+
+
+def downgrade():
+    op.execute("DELETE FROM event_rollups")
+    op.drop_constraint("event_rollups_pkey", "event_rollups", type_="primary")
+    op.drop_column("event_rollups", "lead_id")
+    op.create_primary_key("event_rollups_pkey", "event_rollups", list(KEY))
+    op.execute(
+        sa.text(
+            REBUILD.format(key=", ".join(KEY), lead_id="", group_by="1, 2, 3, 4, 5, 6")
+        ).bindparams(zone="UTC")
+    )
@@ -0,0 +1,53 @@
+"""Add timestamp server defaults
+
+The timestamps are filled by the database and returned by the INSERT and
+UPDATE statements, instead of being set by the services.
+
+Revision ID: c5a0e8d2f913
+Revises: b3e7c91d4f20
+Create Date: 2026-10-18 09:12:48.530117
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "c5a0e8d2f913"
+down_revision = "b3e7c91d4f20"
+branch_labels = None
+depends_on = None
+
+TABLES = (
+    "organizations",
+    "branches",
+    "users",
+    "user_branch_mappings",
+    "attributes",
+    "profiles",
+    "profile_attribute_mappings",
+    "leads",
+    "profile_snapshots",
+    "events",
+    "calls",
+    "prompts",
+    "agents",
+    "invites",
+    "report_jobs",
+)
+
+COLUMNS = (
+    *((table, column) for table in TABLES for column in ("created_at", "updated_at")),
+    ("event_rollups", "updated_at"),
+    ("calls", "call_timestamp"),
+)
+
+
+def upgrade():
+    for table, column in COLUMNS:
+        op.alter_column(table, column, server_default=sa.text("now()"))
+
+
+def downgrade():
+    for table, column in reversed(COLUMNS):
+        op.alter_column(table, column, server_default=None)
@@ -0,0 +1,113 @@
+"""Add event typed columns
+
+Copies the fields of events.data that the metrics filter and aggregate on into
+typed columns. Existing events are backfilled in batches, each committed on its
+own so that the table is never locked for long, and the indexes are built
+concurrently, see revision 8d1f3a6c2b47. The upgrade can be run again if it is
+interrupted.
+
+Revision ID: d7f4b2a9c6e1
+Revises: c5a0e8d2f913
+Create Date: 2026-10-18 10:03:21.774512
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "d7f4b2a9c6e1"
+down_revision = "c5a0e8d2f913"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10_000
+
+COLUMNS = (
+    ("lead_id", "VARCHAR"),
+    ("status", "VARCHAR"),
+    ("lead_type", "VARCHAR"),
+    ("call_type", "VARCHAR"),
+    ("duration_seconds", "INTEGER"),
+)
+
+BACKFILL = sa.text(r"""
+    WITH batch AS (
+        SELECT id FROM events WHERE id > :after ORDER BY id LIMIT :size
+    )
+    UPDATE events SET
+        lead_id = data->>'lead_id',
+        status = data->>'status',
+        lead_type = data->>'type',
+        call_type = data->>'call_type',
+        duration_seconds = CASE WHEN data->>'duration' ~ '^\d+:\d+$' THEN
+            CAST(SPLIT_PART(data->>'duration', ':', 1) AS INTEGER) * 60
+            + CAST(SPLIT_PART(data->>'duration', ':', 2) AS INTEGER)
+        END
+    FROM batch
+    WHERE events.id = batch.id
+    RETURNING events.id
+    """)
+
+
+def upgrade():
+    for name, type_ in COLUMNS:
+        op.execute(f"ALTER TABLE events ADD COLUMN IF NOT EXISTS {name} {type_}")
+
+    with op.get_context().autocommit_block():
+        conn = op.get_bind()
+        after = ""
+        while True:
+            ids = conn.execute(BACKFILL, {"after": after, "size": BATCH_SIZE})
+            after = max((id for id, in ids), default=None)
+            if after is None:
+                break
+
+        op.create_index(
+            "ix_events_lead_id",
+            "events",
+            ["lead_id"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            "ix_events_branch_id_name_created_at_include",
+            "events",
+            ["branch_id", "name", "created_at"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+            postgresql_include=[name for name, _ in COLUMNS],
+        )
+        op.drop_index(
+            "ix_events_branch_id_name_created_at",
+            table_name="events",
+            if_exists=True,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_events_branch_id_name_created_at",
+            "events",
+            ["branch_id", "name", "created_at"],
+            unique=False,
+            if_not_exists=True,
+            postgresql_concurrently=True,
+        )
+        for name in (
+            "ix_events_branch_id_name_created_at_include",
+            "ix_events_lead_id",
+        ):
+            op.drop_index(
+                name,
+                table_name="events",
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("events", name)
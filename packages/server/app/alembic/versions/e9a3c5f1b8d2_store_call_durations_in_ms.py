@@ -0,0 +1,165 @@
+"""Store call durations in ms
+
+Calls get their start and end timestamps and their duration in milliseconds,
+and call_ended events store duration_ms in their data instead of an M:S
+duration. Historical calls are filled from their call_ended event, whose Retell
+timestamps give the exact duration, or else from the M:S duration of their
+metadata. Rows are converted in batches, each committed on its own, and the
+upgrade can be run again if it is interrupted.
+
+Revision ID: e9a3c5f1b8d2
+Revises: d7f4b2a9c6e1
+Create Date: 2026-10-18 10:48:05.203946
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "e9a3c5f1b8d2"
+down_revision = "d7f4b2a9c6e1"
+branch_labels = None
+depends_on = None
+
+BATCH_SIZE = 10_000
+
+COLUMNS = (
+    ("start_timestamp", "TIMESTAMP WITH TIME ZONE"),
+    ("end_timestamp", "TIMESTAMP WITH TIME ZONE"),
+    ("duration_ms", "BIGINT"),
+)
+
+# Each statement converts the batch of rows after :after, and returns the last
+# ID of the batch, NULL once there are no rows left.
+CONVERT_CALL_ENDED_EVENTS = sa.text(r"""
+    WITH batch AS (
+        SELECT id, data FROM events
+        WHERE name = 'call_ended' AND id > :after
+        ORDER BY id LIMIT :size
+    ),
+    calls_updated AS (
+        UPDATE calls SET
+            start_timestamp = to_timestamp(
+                CAST(batch.data->>'start_timestamp' AS BIGINT) / 1000.0
+            ),
+            end_timestamp = to_timestamp(
+                CAST(batch.data->>'end_timestamp' AS BIGINT) / 1000.0
+            ),
+            duration_ms = CAST(batch.data->>'end_timestamp' AS BIGINT)
+                - CAST(batch.data->>'start_timestamp' AS BIGINT)
+        FROM batch
+        WHERE calls.id = batch.data->>'call_id'
+        AND jsonb_typeof(batch.data->'start_timestamp') = 'number'
+        AND jsonb_typeof(batch.data->'end_timestamp') = 'number'
+    ),
+    events_updated AS (
+        UPDATE events SET
+            data = (events.data - 'duration') || jsonb_build_object(
+                'duration_ms',
+                CASE
+                    WHEN jsonb_typeof(events.data->'start_timestamp') = 'number'
+                    AND jsonb_typeof(events.data->'end_timestamp') = 'number'
+                    THEN CAST(events.data->>'end_timestamp' AS BIGINT)
+                        - CAST(events.data->>'start_timestamp' AS BIGINT)
+                    WHEN events.data->>'duration' ~ '^\d+:\d+$'
+                    THEN (
+                        CAST(SPLIT_PART(events.data->>'duration', ':', 1) AS BIGINT) * 60
+                        + CAST(SPLIT_PART(events.data->>'duration', ':', 2) AS BIGINT)
+                    ) * 1000
+                END
+            )
+        FROM batch
+        WHERE events.id = batch.id AND events.data ? 'duration'
+    )
+    SELECT MAX(id) FROM batch
+    """)
+
+# Calls without a call_ended event, from the M:S duration of their metadata,
+# a JSON document serialized as a JSON string
+CONVERT_CALL_METADATA = sa.text(r"""
+    UPDATE calls SET
+        duration_ms = (
+            CAST(SPLIT_PART(metadata.duration, ':', 1) AS BIGINT) * 60
+            + CAST(SPLIT_PART(metadata.duration, ':', 2) AS BIGINT)
+        ) * 1000
+    FROM (
+        SELECT id, CAST(call_metadata #>> '{}' AS JSONB)->>'duration' AS duration
+        FROM calls
+        WHERE duration_ms IS NULL AND json_typeof(call_metadata) = 'string'
+    ) AS metadata
+    WHERE calls.id = metadata.id AND metadata.duration ~ '^\d+:\d+$'
+    """)
+
+RESTORE_CALL_ENDED_EVENTS = sa.text("""
+    WITH batch AS (
+        SELECT id FROM events
+        WHERE name = 'call_ended' AND id > :after
+        ORDER BY id LIMIT :size
+    ),
+    events_updated AS (
+        UPDATE events SET
+            data = (events.data - 'duration_ms') || jsonb_build_object(
+                'duration',
+                CAST(events.data->>'duration_ms' AS BIGINT) / 60000
+                || ':'
+                || LPAD(
+                    CAST(CAST(events.data->>'duration_ms' AS BIGINT) / 1000 % 60 AS TEXT),
+                    2,
+                    '0'
+                )
+            )
+        FROM batch
+        WHERE events.id = batch.id
+        AND jsonb_typeof(events.data->'duration_ms') = 'number'
+    )
+    SELECT MAX(id) FROM batch
+    """)
+
+# Only sets the duration of the metadata document, which keeps its other keys
+RESTORE_CALL_METADATA = sa.text("""
+    UPDATE calls SET
+        call_metadata = to_json(CAST(
+            COALESCE(metadata.document, '{}') || jsonb_build_object(
+                'duration',
+                duration_ms / 60000
+                || ':'
+                || LPAD(CAST(duration_ms / 1000 % 60 AS TEXT), 2, '0')
+            ) AS TEXT
+        ))
+    FROM (
+        SELECT id,
+            CASE WHEN json_typeof(call_metadata) = 'string'
+            THEN CAST(call_metadata #>> '{}' AS JSONB)
+            END AS document
+        FROM calls
+        WHERE duration_ms IS NOT NULL
+    ) AS metadata
+    WHERE calls.id = metadata.id
+    AND COALESCE(jsonb_typeof(metadata.document), 'object') = 'object'
+    """)
+
+
+def _run_batches(statement: sa.TextClause):
+    conn = op.get_bind()
+    after = ""
+    while after is not None:
+        after = conn.execute(statement, {"after": after, "size": BATCH_SIZE}).scalar()
+
+
+def upgrade():
+    for name, type_ in COLUMNS:
+        op.execute(f"ALTER TABLE calls ADD COLUMN IF NOT EXISTS {name} {type_}")
+
+    with op.get_context().autocommit_block():
+        _run_batches(CONVERT_CALL_ENDED_EVENTS)
+        op.execute(CONVERT_CALL_METADATA)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        _run_batches(RESTORE_CALL_ENDED_EVENTS)
+        op.execute(RESTORE_CALL_METADATA)
+
+    for name, _ in reversed(COLUMNS):
+        op.drop_column("calls", name)
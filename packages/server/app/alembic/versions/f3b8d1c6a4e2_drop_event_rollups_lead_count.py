@@ -0,0 +1,31 @@
+"""Drop event_rollups.lead_count
+
+Distinct leads per day can't be summed over several days, so the funnel stages
+are counted from the events instead of the rollups.
+
+Revision ID: f3b8d1c6a4e2
+Revises: e9a3c5f1b8d2
+Create Date: 2026-10-18 14:02:37.481920
+
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "f3b8d1c6a4e2"
+down_revision = "e9a3c5f1b8d2"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.drop_column("event_rollups", "lead_count")
+
+
+def downgrade():
+    # The counts are zeros until the rollups are rebuilt, see app/rebuild_rollups.py
+    op.add_column(
+        "event_rollups",
+        sa.Column("lead_count", sa.Integer(), nullable=False, server_default="0"),
+    )
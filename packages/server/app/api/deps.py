@@ -2,20 +2,26 @@ from collections.abc import Generator
 from typing import Annotated
 
 from fastapi import Depends
-from fastapi.responses import JSONResponse
 from fastapi.security import (
     HTTPAuthorizationCredentials,
     HTTPBearer,
 )
 from jose import JWTError, jwt
 from pydantic import ValidationError
-from retell import Retell
 from sqlmodel import Session
 
 from app.core import security
 from app.core.config import settings
-from app.core.db import engine
-from app.models import ROLE_PERMISSIONS, Action, Resource, TokenPayload, User
+from app.core.db import UNIT_OF_WORK, engine
+from app.core.rbac import AuthContext, permission_mask
+from app.core.retell import RetellClient, retell_client
+from app.models import (
+    Action,
+    Resource,
+    TokenPayload,
+    TokenType,
+    User,
+)
 from app.services.agent_service import AgentService
 from app.services.call_service import CallService
 from app.services.event_service import EventService
@@ -23,15 +29,25 @@ from app.services.lead_service import LeadService
 from app.services.metrics_service import MetricsService
 from app.services.organization_service import OrganizationService
 from app.services.prompt_service import PromptService
+from app.services.report_job_service import ReportJobService
 from app.services.user_service import UserService
-from app.utils import raise_custom_exception
+from app.utils import CustomException
 
 bearer_scheme = HTTPBearer()
 
 
 def get_db() -> Generator[Session, None, None]:
-    with Session(engine) as session:
+    # Objects stay loaded after the commit, the services don't read them back
+    with Session(engine, expire_on_commit=False) as session:
+        if not settings.DB_UNIT_OF_WORK:
+            yield session
+            return
+
+        # Services only flush, the request's writes are committed here, before
+        # the response is sent. If the route raises, they are rolled back.
+        session.info[UNIT_OF_WORK] = True
         yield session
+        session.commit()
 
 
 def get_user_service(db: Session = Depends(get_db)) -> UserService:
@@ -54,8 +70,8 @@ def get_metrics_service(db: Session = Depends(get_db)) -> MetricsService:
     return MetricsService(db)
 
 
-def get_retellai_service() -> Retell:
-    return Retell(api_key=settings.RETELL_API_KEY)
+def get_retellai_service() -> RetellClient:
+    return retell_client
 
 
 def get_agent_service(db: Session = Depends(get_db)) -> AgentService:
@@ -70,28 +86,56 @@ def get_event_service(db: Session = Depends(get_db)) -> EventService:
     return EventService(db)
 
 
-def get_user_context(
-    token: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
-    user_service: Annotated[UserService, Depends(get_user_service)],
-) -> User:
+def get_report_job_service(db: Session = Depends(get_db)) -> ReportJobService:
+    return ReportJobService(db)
+
+
+def _resolve_user(
+    token: HTTPAuthorizationCredentials, user_service: UserService
+) -> User | None:
+    """
+    Decodes the bearer token and resolves its user: from the token's claims for
+    stateless access tokens, from the user cache otherwise.
+    """
     try:
         payload = jwt.decode(
             token.credentials, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
         )
         token_data = TokenPayload(**payload)
-        user = user_service.get_user_by_id(token_data.sub)
-        if not user:
-            return raise_custom_exception(404, "User not found")
-        if not user.is_active:
-            return raise_custom_exception(403, "User account is deactivated")
-        return user
     except (JWTError, ValidationError):
-        return raise_custom_exception(403, "Failed to validate credentials")
+        raise CustomException(403, "Failed to validate credentials")
+    if token_data.type == TokenType.REFRESH:
+        raise CustomException(403, "Failed to validate credentials")
+
+    if settings.STATELESS_AUTH:
+        user = security.user_from_token(token_data)
+        if user is not None:
+            if security.revoked_tokens.is_revoked(user.id, token_data.iat):
+                # The client should use its refresh token
+                raise CustomException(401, "Token has been revoked")
+            return user
+    return user_service.get_cached_user_by_id(token_data.sub)
+
+
+def get_user_context(
+    token: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    user_service: Annotated[UserService, Depends(get_user_service)],
+) -> User:
+    user = _resolve_user(token, user_service)
+    if not user:
+        raise CustomException(404, "User not found")
+    if not user.is_active:
+        raise CustomException(403, "User account is deactivated")
+    return user
 
 
-def is_authorized(
-    resource: Resource, actions: list[Action], user: User
-) -> User | JSONResponse:
+def get_auth_context(
+    user: Annotated[User, Depends(get_user_context)],
+) -> AuthContext:
+    return AuthContext(user)
+
+
+def is_authorized(resource: Resource, actions: list[Action], user: User) -> User:
     """
     Checks if the user has the specified role and resource with the given actions.
 
@@ -101,40 +145,30 @@ def is_authorized(
         actions (list[Action]): The actions to check.
 
     Returns: The user object.
+
+    Raises:
+        CustomException: If the user is not authorized.
     """
-    if user.role not in ROLE_PERMISSIONS:
-        return raise_custom_exception(403, "User not authorized")
-    if resource not in ROLE_PERMISSIONS[user.role]:
-        return raise_custom_exception(403, "User not authorized")
-    for action in actions:
-        if action not in ROLE_PERMISSIONS[user.role][resource]:
-            return raise_custom_exception(403, "User not authorized")
-    return user
+    return AuthContext(user).require(resource, *actions)
 
 
 def UserContextWithPermissions(
     required_permissions: tuple[Resource, list[Action]],
 ):
+    mask = permission_mask(*required_permissions)
+
+    # Shares the request's user context with the other dependencies instead of
+    # resolving the user again
     def _user_context_with_permissions(
-        token: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
-        user_service: Annotated[UserService, Depends(get_user_service)],
-    ) -> User | JSONResponse:
-        try:
-            payload = jwt.decode(
-                token.credentials, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-            )
-            token_data = TokenPayload(**payload)
-            user = user_service.get_user_by_id(token_data.sub)
-            if not user:
-                return raise_custom_exception(404, "User not found")
-            return is_authorized(required_permissions[0], required_permissions[1], user)
-        except (JWTError, ValidationError):
-            return raise_custom_exception(403, "Failed to validate credentials")
+        auth: Annotated[AuthContext, Depends(get_auth_context)],
+    ) -> User:
+        return auth.require_mask(mask)
 
     return _user_context_with_permissions
 
 
 UserContextDep = Annotated[User, Depends(get_user_context)]
+AuthContextDep = Annotated[AuthContext, Depends(get_auth_context)]
 SessionDep = Annotated[Session, Depends(get_db)]
 OrganizationServiceDep = Annotated[
     OrganizationService, Depends(get_organization_service)
@@ -143,7 +177,8 @@ UserServiceDep = Annotated[UserService, Depends(get_user_service)]
 LeadServiceDep = Annotated[LeadService, Depends(get_lead_service)]
 PromptServiceDep = Annotated[PromptService, Depends(get_prompt_service)]
 MetricsServiceDep = Annotated[MetricsService, Depends(get_metrics_service)]
-RetellAIServiceDep = Annotated[Retell, Depends(get_retellai_service)]
+RetellAIServiceDep = Annotated[RetellClient, Depends(get_retellai_service)]
 AgentServiceDep = Annotated[AgentService, Depends(get_agent_service)]
 CallServiceDep = Annotated[CallService, Depends(get_call_service)]
 EventServiceDep = Annotated[EventService, Depends(get_event_service)]
+ReportJobServiceDep = Annotated[ReportJobService, Depends(get_report_job_service)]
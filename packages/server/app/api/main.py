@@ -3,6 +3,8 @@ from fastapi import APIRouter
 from app.api.routes import (
     authentication,
     calls,
+    internal,
+    jobs,
     leads,
     metrics,
     organizations,
@@ -18,3 +20,5 @@ api_router.include_router(prompts.router, tags=["Prompts"])
 api_router.include_router(metrics.router, tags=["Metrics"])
 api_router.include_router(calls.router, tags=["Calls"])
 api_router.include_router(webhooks.router, tags=["Webhooks"])
+api_router.include_router(jobs.router, tags=["Jobs"])
+api_router.include_router(internal.router, tags=["Internal"])
@@ -1,7 +1,10 @@
 import logging
-from datetime import timedelta
 
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from jose import JWTError, jwt
+from pydantic import ValidationError
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import (
     OrganizationServiceDep,
@@ -10,17 +13,27 @@ from app.api.deps import (
 )
 from app.core import security
 from app.core.config import settings
-from app.core.security import create_access_token, verify_password
+from app.core.security import (
+    create_tokens,
+    hash_password,
+    verify_and_update_password,
+)
 from app.models import (
     CreateOrganizationRequest,
     InviteStatus,
+    RefreshTokenRequest,
     Role,
     Token,
+    TokenPayload,
+    TokenType,
     User,
     UserLoginRequest,
     UserRegisterRequest,
 )
+from app.services.organization_service import OrganizationService
+from app.services.user_service import UserService
 from app.utils import (
+    CustomException,
     raise_custom_exception,
 )
 
@@ -30,7 +43,7 @@ logger = logging.getLogger("uvicorn")
 
 
 @router.post("/register")
-def register(
+async def register(
     req: UserRegisterRequest,
     user_service: UserServiceDep,
     organization_service: OrganizationServiceDep,
@@ -46,6 +59,22 @@ def register(
     Returns:
     - Token: Access token for the registered user.
     """
+    hashed_password = await hash_password(req.password.get_secret_value())
+    return await run_in_threadpool(
+        _register, req, hashed_password, user_service, organization_service
+    )
+
+
+def _register(
+    req: UserRegisterRequest,
+    hashed_password: str,
+    user_service: UserService,
+    organization_service: OrganizationService,
+) -> Token | JSONResponse:
+    """
+    Creates the user, and their organization or branch membership. The database
+    work of `register`, run in the threadpool.
+    """
     if req.invite_token:
         invite = organization_service.get_invite(req.invite_token)
         if invite is None:
@@ -68,37 +97,31 @@ def register(
             ),
             org_id=invite.organization_id,
             role=Role.MANAGER,
+            hashed_password=hashed_password,
         )
 
         organization_service.add_user_to_branch(invite.branch_id, user.id)
         user_service.set_current_branch(user.id, invite.branch_id)
-        organization_service.accept_invite(invite)
-        org_id = invite.organization_id
+        if not organization_service.accept_invite(invite):
+            # Accepted by a concurrent registration: raised so that the unit of
+            # work rolls back the user created above
+            raise CustomException(400, "Invite already accepted")
         logger.info(f"Invited user {user.email} added to branch: {invite.branch_id}")
     else:
         org = organization_service.create_organization(
             org=CreateOrganizationRequest(name=req.organization_name)
         )
-        org_id = org.id
         logger.info(f"Organization created: {org.id}|{org.name}")
-        user = user_service.create_user(user=req, org_id=org.id, role=Role.ADMIN)
+        user = user_service.create_user(
+            user=req, org_id=org.id, role=Role.ADMIN, hashed_password=hashed_password
+        )
         logger.info(f"User created: {user.id}|{user.full_name}")
 
-    return Token(
-        access_token=create_access_token(
-            user.id,
-            timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            metadata={
-                "organization_id": org_id,
-                "branch_id": user.current_branch_id,
-                "role": user.role,
-            },
-        ),
-    )
+    return create_tokens(user)
 
 
 @router.post("/login")
-def login(
+async def login(
     req: UserLoginRequest,
     user_service: UserServiceDep,
     organization_service: OrganizationServiceDep,
@@ -114,28 +137,60 @@ def login(
     Returns:
         Token: The access token object containing the generated access token and token type.
     """
-    user = user_service.get_user_by_email(req.email)
+    user = await run_in_threadpool(user_service.get_user_by_email, req.email)
     if not user:
         logger.error("User not found")
         return raise_custom_exception(400, "Incorrect email or password")
-    if not verify_password(req.password.get_secret_value(), user.hashed_password):
+    valid, new_hash = await verify_and_update_password(
+        req.password.get_secret_value(), user.hashed_password
+    )
+    if not valid:
         logger.error("Incorrect password")
         return raise_custom_exception(400, "Incorrect email or password")
     if not user.is_active:
         logger.error("User is not active")
         return raise_custom_exception(403, "User account is deactivated")
+    if new_hash is not None:
+        # The hash was made with another cost, upgrade it
+        user.hashed_password = new_hash
+        await run_in_threadpool(user_service.update_user, user)
 
-    return Token(
-        access_token=security.create_access_token(
-            user.id,
-            expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
-            metadata={
-                "organization_id": user.organization_id,
-                "branch_id": user.current_branch_id,
-                "role": user.role,
-            },
-        ),
-    )
+    return create_tokens(user)
+
+
+@router.post("/refresh")
+def refresh(
+    req: RefreshTokenRequest,
+    user_service: UserServiceDep,
+) -> Token:
+    """
+    Issues new tokens from a refresh token. The user is loaded from the database,
+    so the new access token carries their current role and branch.
+
+    Args:
+        req (RefreshTokenRequest): The request object containing the refresh token.
+        user_service (UserService): The user service instance.
+
+    Returns:
+        Token: The new access and refresh tokens.
+    """
+    try:
+        payload = jwt.decode(
+            req.refresh_token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        token_data = TokenPayload(**payload)
+    except (JWTError, ValidationError):
+        return raise_custom_exception(403, "Failed to validate credentials")
+    if token_data.type != TokenType.REFRESH:
+        return raise_custom_exception(403, "Failed to validate credentials")
+
+    user = user_service.get_user_by_id(token_data.sub)
+    if user is None:
+        return raise_custom_exception(404, "User not found")
+    if not user.is_active:
+        return raise_custom_exception(403, "User account is deactivated")
+
+    return create_tokens(user)
 
 
 @router.get("/me")
@@ -156,5 +211,7 @@ def get_me(
     current_user = user_service.get_user_by_id(user_ctx.id)
     if current_user is None:
         return raise_custom_exception(404, "User not found")
+    # Work on a copy, the request's session would save the change otherwise
+    current_user = User.model_validate(current_user)
     del current_user.hashed_password
     return current_user
@@ -4,6 +4,7 @@ from datetime import datetime, timezone
 
 import instructor
 from fastapi import APIRouter, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 from openai import AsyncOpenAI
 from retell.types import RegisterCallResponse
@@ -18,15 +19,27 @@ from app.api.deps import (
     UserContextDep,
 )
 from app.core.config import settings
+from app.core.retell import run_retell
 from app.models import (
     Call,
     CallReport,
     CallResponse,
+    CallSummary,
     CreateCallRequest,
     EventType,
     Role,
+    User,
+)
+from app.services.agent_service import AgentService
+from app.services.call_service import CallService
+from app.services.lead_service import LeadService
+from app.services.prompt_service import PromptService
+from app.utils import (
+    decode_cursor,
+    encode_cursor,
+    format_duration,
+    raise_custom_exception,
 )
-from app.utils import raise_custom_exception
 
 router = APIRouter()
 
@@ -48,7 +61,7 @@ def generate_text_file(call: Call):
     content += f"Call Type: {call.type.value}\n"
     content += f"Agent ID: {call.agent_id}\n"
     content += f"Lead ID: {call.lead_id}\n"
-    content += f"Duration: {json.loads(call.call_metadata)['duration']}\n"
+    content += f"Duration: {format_duration(call.duration_ms)}\n"
 
     if call.transcript:
         content += f"\nTranscript:\n{call.transcript}\n"
@@ -109,6 +122,77 @@ async def create_call(
     """
     logger.info("Received request to create a call")
 
+    # The services are synchronous, so the database work runs in the threadpool
+    # and the Retell request on its own bounded executor, keeping the event loop
+    # free to serve other requests meanwhile.
+    call = await run_in_threadpool(
+        _prepare_call,
+        req=req,
+        user_ctx=user_ctx,
+        agent_service=agent_service,
+        lead_service=lead_service,
+        call_service=call_service,
+        prompt_service=prompt_service,
+    )
+    if isinstance(call, JSONResponse):
+        return call
+    # The connection isn't held while Retell responds. The call is deleted if its
+    # registration fails.
+    await run_in_threadpool(call_service.commit)
+
+    # Make sure we register the call with Retell
+    try:
+        retell_call = await run_retell(
+            retell_service.call.register,
+            agent_id=call["retell_agent_id"],
+            audio_encoding="s16le",
+            audio_websocket_protocol="web",
+            sample_rate=24000,
+            end_call_after_silence_ms=30000,
+            metadata=call["metadata"],
+            retell_llm_dynamic_variables=call["dynamic_variables"],
+        )
+    except Exception:
+        await run_in_threadpool(
+            _discard_call, call_service, call["metadata"]["call_id"]
+        )
+        raise
+
+    logger.info("Call registered with Retell")
+
+    # EVENT: Call started
+    await run_in_threadpool(
+        event_service.create_event,
+        name=EventType.CALL_STARTED,
+        data={
+            **call["event_data"],
+            "start_timestamp": datetime.now(tz=timezone.utc).isoformat(),
+            "retell_agent_id": retell_call.agent_id,
+        },
+        org_id=call["metadata"]["org_id"],
+        branch_id=call["metadata"]["branch_id"],
+    )
+
+    logger.info(f"Call start event recorded: {call['metadata']['call_id']}")
+    return retell_call
+
+
+def _prepare_call(
+    req: CreateCallRequest,
+    user_ctx: User,
+    agent_service: AgentService,
+    lead_service: LeadService,
+    call_service: CallService,
+    prompt_service: PromptService,
+) -> dict | JSONResponse:
+    """
+    Snapshot the lead's profile and create the call reference, then build the
+    payload of the Retell registration and the call started event.
+
+    Returns:
+        dict | JSONResponse: The payloads, or an error response if the lead or its
+        agent doesn't exist.
+    """
     lead_tuple = lead_service.get_lead(req.lead_id)
     if lead_tuple is None:
         return raise_custom_exception(404, "Lead not found")
@@ -164,40 +248,35 @@ async def create_call(
             dynamic_variables["custom_prompt"] = prompt.text
             metadata["report_prompt"] = prompt.report_prompt_text
 
-    # Make sure we register the call with Retell
-    retell_call = retell_service.call.register(
-        agent_id=agent.retell_agent_id,
-        audio_encoding="s16le",
-        audio_websocket_protocol="web",
-        sample_rate=24000,
-        end_call_after_silence_ms=30000,
-        metadata=metadata,
-        retell_llm_dynamic_variables=dynamic_variables,
-    )
+    event_data = {
+        "call_id": call_ref.id,
+        "user_id": user_ctx.id,
+        "lead_id": req.lead_id,
+        "lead_type": lead_tuple[1].type,
+        "lead_status": lead_tuple[1].status,
+        "profile_snapshot_id": profile_snapshot.id,
+        "agent_id": agent.id,
+        "call_type": req.call_type,
+    }
 
-    logger.info("Call registered with Retell")
+    return {
+        "retell_agent_id": agent.retell_agent_id,
+        "metadata": metadata,
+        "dynamic_variables": dynamic_variables,
+        "event_data": event_data,
+    }
 
-    # EVENT: Call started
-    event_service.create_event(
-        name=EventType.CALL_STARTED,
-        data={
-            "call_id": call_ref.id,
-            "user_id": user_ctx.id,
-            "lead_id": req.lead_id,
-            "lead_type": lead_tuple[1].type,
-            "lead_status": lead_tuple[1].status,
-            "start_timestamp": datetime.now(tz=timezone.utc).isoformat(),
-            "profile_snapshot_id": profile_snapshot.id,
-            "agent_id": agent.id,
-            "retell_agent_id": retell_call.agent_id,
-            "call_type": req.call_type,
-        },
-        org_id=user_ctx.organization_id,
-        branch_id=lead_tuple[1].branch_id,
-    )
 
-    logger.info(f"Call start event recorded: {call_ref.id}")
-    return retell_call
+def _discard_call(call_service: CallService, call_id: str):
+    """
+    Delete a call whose registration with Retell failed. The call was committed
+    before the registration, so it is deleted in its own transaction.
+    """
+    try:
+        call_service.delete_call(call_id)
+        call_service.commit()
+    except Exception:
+        logger.exception(f"Failed to delete unregistered call: {call_id}")
 
 
 @router.get("/calls/{call_id}/report")
@@ -264,6 +343,56 @@ def get_calls(
     ]
 
 
+@router.get("/calls/history")
+def get_call_history(
+    branch_id: str,
+    user_ctx: UserContextDep,
+    call_service: CallServiceDep,
+    response: Response,
+    cursor: str | None = None,
+    limit: int = 100,
+) -> list[CallSummary]:
+    """
+    Retrieve the call history of a branch, newest first. Transcripts, reports and
+    analytics are left out; fetch them with `/calls/{call_id}` and
+    `/calls/{call_id}/report`.
+
+    If there are more calls, the cursor of the next page is returned in the
+    `X-Next-Cursor` response header.
+
+    Args:
+        branch_id (str): The ID of the branch.
+        user_ctx (UserContextDep): The user context.
+        call_service (CallServiceDep): The call service.
+        response (Response): The response, used to set the pagination header.
+        cursor (str, optional): The cursor of the page to retrieve.
+        limit (int, optional): The maximum number of calls to return. Defaults to 100.
+
+    Returns:
+        List[CallSummary]: The call summaries for the branch.
+    """
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except ValueError:
+            return raise_custom_exception(400, "Invalid cursor")
+
+    limit = max(1, min(limit, 500))
+    calls = call_service.get_call_summaries(
+        branch_id=branch_id,
+        user_id=None if user_ctx.role == Role.ADMIN else user_ctx.id,
+        cursor=cursor,
+        limit=limit,
+    )
+
+    if len(calls) == limit:
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            calls[-1].created_at, calls[-1].id
+        )
+
+    return calls
+
+
 @router.get("/calls/{call_id}")
 def get_call(
     call_id: str,
@@ -288,7 +417,7 @@ def get_call(
 
     if call is None:
         logger.error("Call not found")
-        raise_custom_exception(404, "Call not found")
+        return raise_custom_exception(404, "Call not found")
 
     return call
 
@@ -0,0 +1,97 @@
+from fastapi import APIRouter
+
+from app.api.deps import (
+    RetellAIServiceDep,
+    UserContextDep,
+)
+from app.core.broker import metrics_broker
+from app.core.cache import metrics_cache
+from app.core.db import get_pool_stats
+from app.models import Role
+from app.utils import raise_custom_exception
+
+router = APIRouter(prefix="/internal")
+
+
+@router.get("/retell")
+def get_retell_stats(
+    user_ctx: UserContextDep,
+    retell_service: RetellAIServiceDep,
+):
+    """
+    Retrieve the state of the Retell client: circuit breaker, connection pool and
+    per-operation latencies.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+        retell_service (RetellAIServiceDep): The retell AI service dependency.
+
+    Returns:
+        dict: The Retell client stats.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view internal stats"
+        )
+
+    return retell_service.stats()
+
+
+@router.get("/db-pool")
+def get_db_pool_stats(user_ctx: UserContextDep):
+    """
+    Retrieve the state of the database connection pool of this process: occupancy,
+    overflow and checkout wait times.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+
+    Returns:
+        dict: The connection pool stats.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view internal stats"
+        )
+
+    return get_pool_stats()
+
+
+@router.get("/metrics-cache")
+def get_metrics_cache_stats(user_ctx: UserContextDep):
+    """
+    Retrieve the state of the metrics cache of this process: size, hits, misses
+    and requests coalesced with an identical request in flight.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+
+    Returns:
+        dict: The metrics cache stats.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view internal stats"
+        )
+
+    return metrics_cache.stats()
+
+
+@router.get("/metrics-stream")
+def get_metrics_stream_stats(user_ctx: UserContextDep):
+    """
+    Retrieve the state of the metrics streams of this process: branches and
+    dashboards subscribed, and messages published.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+
+    Returns:
+        dict: The metrics stream stats.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view internal stats"
+        )
+
+    return metrics_broker.stats()
@@ -0,0 +1,140 @@
+import logging
+
+from fastapi import APIRouter
+
+from app.api.deps import (
+    ReportJobServiceDep,
+    UserContextDep,
+)
+from app.models import (
+    ReportJobResponse,
+    ReportJobStats,
+    ReportJobStatus,
+    Role,
+)
+from app.utils import raise_custom_exception
+
+router = APIRouter(prefix="/jobs")
+
+logger = logging.getLogger("uvicorn")
+
+
+@router.get("/reports")
+def get_report_jobs(
+    user_ctx: UserContextDep,
+    report_job_service: ReportJobServiceDep,
+    branch_id: str | None = None,
+    call_id: str | None = None,
+    status: ReportJobStatus | None = None,
+    limit: int = 100,
+) -> list[ReportJobResponse]:
+    """
+    Retrieve the most recent call report jobs.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+        report_job_service (ReportJobServiceDep): The report job service dependency.
+        branch_id (str, optional): The ID of the branch to filter by.
+        call_id (str, optional): The ID of the call to filter by.
+        status (ReportJobStatus, optional): The job status to filter by.
+        limit (int, optional): The maximum number of jobs to return. Defaults to 100.
+
+    Returns:
+        List[ReportJobResponse]: A list of report jobs, without their payloads.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view report jobs"
+        )
+
+    return report_job_service.get_jobs(
+        org_id=user_ctx.organization_id,
+        branch_id=branch_id,
+        call_id=call_id,
+        status=status,
+        limit=min(limit, 500),
+    )
+
+
+@router.get("/reports/stats")
+def get_report_job_stats(
+    user_ctx: UserContextDep,
+    report_job_service: ReportJobServiceDep,
+    branch_id: str | None = None,
+) -> ReportJobStats:
+    """
+    Count call report jobs per status.
+
+    Args:
+        user_ctx (UserContextDep): The user context dependency.
+        report_job_service (ReportJobServiceDep): The report job service dependency.
+        branch_id (str, optional): The ID of the branch to filter by.
+
+    Returns:
+        ReportJobStats: The number of jobs in each status.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view report jobs"
+        )
+
+    return report_job_service.get_job_stats(
+        org_id=user_ctx.organization_id, branch_id=branch_id
+    )
+
+
+@router.get("/reports/{job_id}")
+def get_report_job(
+    job_id: str,
+    user_ctx: UserContextDep,
+    report_job_service: ReportJobServiceDep,
+) -> ReportJobResponse:
+    """
+    Retrieve a call report job by its ID.
+
+    Args:
+        job_id (str): The ID of the job.
+        user_ctx (UserContextDep): The user context dependency.
+        report_job_service (ReportJobServiceDep): The report job service dependency.
+
+    Returns:
+        ReportJobResponse: The report job, without its payload.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to view report jobs"
+        )
+
+    job = report_job_service.get_job(job_id, org_id=user_ctx.organization_id)
+    if job is None:
+        return raise_custom_exception(404, "Job not found")
+    return job
+
+
+@router.post("/reports/{job_id}/retry")
+def retry_report_job(
+    job_id: str,
+    user_ctx: UserContextDep,
+    report_job_service: ReportJobServiceDep,
+):
+    """
+    Requeue a failed call report job.
+
+    Args:
+        job_id (str): The ID of the job.
+        user_ctx (UserContextDep): The user context dependency.
+        report_job_service (ReportJobServiceDep): The report job service dependency.
+
+    Returns:
+        int: The HTTP status code.
+    """
+    if user_ctx.role != Role.ADMIN:
+        return raise_custom_exception(
+            403, "User does not have permission to retry report jobs"
+        )
+
+    if not report_job_service.retry_job(job_id, org_id=user_ctx.organization_id):
+        return raise_custom_exception(404, "Failed job not found")
+
+    logger.info(f"Report job requeued: {job_id}")
+    return 200
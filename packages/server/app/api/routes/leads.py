@@ -1,7 +1,7 @@
 import logging
 from datetime import datetime, timezone
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
 
 from app.api.deps import (
     AgentServiceDep,
@@ -21,7 +21,8 @@ from app.models import (
     Role,
     UpdateLeadRequest,
 )
-from app.utils import raise_custom_exception
+from app.services.lead_service import LeadService
+from app.utils import decode_cursor, encode_cursor, raise_custom_exception
 
 router = APIRouter()
 
@@ -148,20 +149,27 @@ def create_lead(
     ).model_dump()
 
     logger.info(f"Lead created: {lead['id']}")
+    # The connection isn't held while Retell responds. The lead is deleted if its
+    # agent can't be created.
+    lead_service.commit()
 
     # Create retell agent
-    retell_llm = retell_service.llm.create(
-        general_prompt=get_test_prompt(),  # TODO: this is for testing system prompt
-        begin_message="Hello, who's this?",
-    )
-    retell_agent = retell_service.agent.create(
-        llm_websocket_url=retell_llm.llm_websocket_url,
-        agent_name=lead["id"],
-        voice_id="11labs-Amritanshu",
-        language="en-IN",
-        webhook_url=f"{settings.WEBHOOK_URL}/retell",
-        enable_backchannel=True,
-    )
+    try:
+        retell_llm = retell_service.llm.create(
+            general_prompt=get_test_prompt(),  # TODO: this is for testing system prompt
+            begin_message="Hello, who's this?",
+        )
+        retell_agent = retell_service.agent.create(
+            llm_websocket_url=retell_llm.llm_websocket_url,
+            agent_name=lead["id"],
+            voice_id="11labs-Amritanshu",
+            language="en-IN",
+            webhook_url=f"{settings.WEBHOOK_URL}/retell",
+            enable_backchannel=True,
+        )
+    except Exception:
+        _discard_lead(lead_service, lead["id"])
+        raise
     agent_service.create_agent(
         org_id=user_ctx.organization_id,
         branch_id=req.branch_id,
@@ -186,27 +194,84 @@ def create_lead(
     )
 
 
+def _discard_lead(lead_service: LeadService, lead_id: str):
+    """
+    Delete a lead whose Retell agent couldn't be created. The lead was committed
+    before the Retell requests, so it is deleted in its own transaction.
+    """
+    try:
+        lead_service.delete_lead(lead_id)
+        lead_service.commit()
+    except Exception:
+        logger.exception(f"Failed to delete lead without an agent: {lead_id}")
+
+
 @router.get("/leads")
 def get_leads(
     branch_id: str,
     user_ctx: UserContextDep,
     lead_service: LeadServiceDep,
+    response: Response,
+    status: LeadStatus | None = None,
+    type: LeadType | None = None,
+    known_to_agent: str | None = None,
+    created_by: str | None = None,
+    meeting_date_from: datetime | None = None,
+    meeting_date_to: datetime | None = None,
+    cursor: str | None = None,
+    limit: int | None = None,
 ):
     """
-    Retrieve leads for a specific branch.
+    Retrieve leads for a specific branch, newest first.
+
+    Without a cursor or a limit, all the leads are returned. Otherwise they are
+    paginated, and if there are more leads, the cursor of the next page is
+    returned in the `X-Next-Cursor` response header.
 
     Args:
         branch_id (str): The ID of the branch.
         user_ctx (UserContextDep): The user context dependency.
         lead_service (LeadServiceDep): The lead service dependency.
+        response (Response): The response, used to set the pagination header.
+        status (LeadStatus, optional): The lead status to filter by.
+        type (LeadType, optional): The lead type to filter by.
+        known_to_agent (str, optional): The referral type to filter by.
+        created_by (str, optional): The ID of the user who created the leads. Only applies to admins.
+        meeting_date_from (datetime, optional): The earliest meeting date to include.
+        meeting_date_to (datetime, optional): The latest meeting date to include.
+        cursor (str, optional): The cursor of the page to retrieve.
+        limit (int, optional): The maximum number of leads to return. Defaults to 100
+            when a cursor is given.
 
     Returns:
         List[LeadResponse]: A list of LeadResponse objects representing the leads for the branch.
     """
-    if user_ctx.role == Role.ADMIN:
-        leads = lead_service.get_leads(branch_id=branch_id)
-    else:
-        leads = lead_service.get_leads(branch_id=branch_id, created_by_id=user_ctx.id)
+    if cursor:
+        try:
+            cursor = decode_cursor(cursor)
+        except ValueError:
+            return raise_custom_exception(400, "Invalid cursor")
+
+    if user_ctx.role != Role.ADMIN:
+        created_by = user_ctx.id
+
+    if cursor is not None or limit is not None:
+        limit = max(1, min(limit or 100, 500))
+    leads = lead_service.get_leads(
+        branch_id=branch_id,
+        created_by_id=created_by,
+        status=status,
+        type=type,
+        known_to_agent=known_to_agent,
+        meeting_date_from=meeting_date_from,
+        meeting_date_to=meeting_date_to,
+        cursor=cursor,
+        limit=limit,
+    )
+
+    if limit is not None and len(leads) == limit:
+        _, last = leads[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last.created_at, last.id)
 
     return [
         LeadResponse(
@@ -280,6 +345,8 @@ def update_lead(
         and lead_req["known_to_agent"] != lead.known_to_agent
     ):
         llm_id = agent_service.get_agent(lead.id).retell_llm_id
+        # The connection isn't held while Retell responds
+        agent_service.commit()
         # retell_service.llm.update(
         #     llm_id, general_prompt=get_system_prompt(lead_req["known_to_agent"])
         # )
@@ -1,19 +1,78 @@
+import json
 import logging
+import time
+from collections.abc import AsyncIterator
 from datetime import datetime
+from typing import Annotated
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 
 import pytz
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials
+from jose import jwt
+from starlette.concurrency import run_in_threadpool
 
 from app.api.deps import (
     MetricsServiceDep,
+    OrganizationServiceDep,
     UserContextDep,
+    UserContextWithPermissions,
+    bearer_scheme,
 )
+from app.core.broker import metrics_broker
+from app.core.config import settings
+from app.models import Action, Granularity, Resource, Role, User
+from app.services.metrics_service import graph_bucket_count
+from app.services.organization_service import OrganizationService
+from app.utils import raise_custom_exception
 
 router = APIRouter()
 
 logger = logging.getLogger("uvicorn")
 
 
+def _to_utc(start_date: datetime, end_date: datetime) -> tuple[datetime, datetime]:
+    """
+    Converts the range of a metrics request to UTC; naive dates are UTC.
+    """
+    if start_date.tzinfo is None or end_date.tzinfo is None:
+        start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
+        end_date = end_date.replace(tzinfo=pytz.timezone("UTC"))
+    else:
+        if start_date.tzinfo.utcoffset(start_date) is not None:
+            start_date = start_date.astimezone(pytz.utc)
+        if end_date.tzinfo.utcoffset(end_date) is not None:
+            end_date = end_date.astimezone(pytz.utc)
+    return start_date, end_date
+
+
+def _graph_error(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity,
+    tz: str,
+    series: int = 1,
+) -> JSONResponse | None:
+    """
+    Checks the time zone of a graph request, and that its series don't have
+    more buckets in total than METRICS_GRAPH_MAX_BUCKETS.
+    """
+    try:
+        ZoneInfo(tz)
+    except (ZoneInfoNotFoundError, ValueError):
+        return raise_custom_exception(400, f"Unknown time zone: {tz}")
+
+    buckets = graph_bucket_count(start_date, end_date, granularity, tz) * series
+    if buckets > settings.METRICS_GRAPH_MAX_BUCKETS:
+        return raise_custom_exception(
+            400,
+            f"Too many graph buckets ({buckets}), use a shorter range or a larger granularity",
+            detail={"max_buckets": settings.METRICS_GRAPH_MAX_BUCKETS},
+        )
+    return None
+
+
 @router.get("/metrics/counts")
 def get_metrics(
     start_date: datetime,
@@ -39,14 +98,7 @@ def get_metrics(
     logger.info(
         f"Retrieving metrics for branch {branch_id} from {start_date} to {end_date}"
     )
-    if start_date.tzinfo is None or end_date.tzinfo is None:
-        start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
-        end_date = end_date.replace(tzinfo=pytz.timezone("UTC"))
-    else:
-        if start_date.tzinfo.utcoffset(start_date) is not None:
-            start_date = start_date.astimezone(pytz.utc)
-        if end_date.tzinfo.utcoffset(end_date) is not None:
-            end_date = end_date.astimezone(pytz.utc)
+    start_date, end_date = _to_utc(start_date, end_date)
 
     funnel_metrics = metrics_service.get_funnel_metrics(
         start_date=start_date, end_date=end_date, branch_id=branch_id
@@ -61,10 +113,11 @@ def get_metrics(
 def get_metrics_graph(
     start_date: datetime,
     end_date: datetime,
-    granularity: str,
+    granularity: Granularity,
     branch_id: str,
     user_ctx: UserContextDep,
     metrics_service: MetricsServiceDep,
+    tz: str = "UTC",
 ):
     """
     Retrieves metrics for a given branch.
@@ -72,30 +125,29 @@ def get_metrics_graph(
     Args:
         start_date (datetime): The start date of the metrics period.
         end_date (datetime): The end date of the metrics period.
+        granularity (Granularity): The size of the graph buckets.
         branch_id (str): The ID of the branch.
         user_ctx (UserContextDep): The user context.
         metrics_service (MetricsServiceDep): The metrics service.
+        tz (str): The IANA time zone the buckets are aligned to, e.g. Asia/Kolkata.
 
     Returns:
         call_graph_metrics (dict): A dictionary containing the call graph metrics.
     """
     logger.info(
-        f"Retrieving metrics graph for branch {branch_id} from {start_date} to {end_date} with granularity {granularity}"
+        f"Retrieving metrics graph for branch {branch_id} from {start_date} to {end_date} with granularity {granularity.value} in {tz}"
     )
-    if start_date.tzinfo is None or end_date.tzinfo is None:
-        start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
-        end_date = end_date.replace(tzinfo=pytz.timezone("UTC"))
-    else:
-        if start_date.tzinfo.utcoffset(start_date) is not None:
-            start_date = start_date.astimezone(pytz.utc)
-        if end_date.tzinfo.utcoffset(end_date) is not None:
-            end_date = end_date.astimezone(pytz.utc)
+    start_date, end_date = _to_utc(start_date, end_date)
+    error = _graph_error(start_date, end_date, granularity, tz)
+    if error is not None:
+        return error
 
     call_graph_metrics = metrics_service.get_call_graph_metrics(
         start_date=start_date,
         end_date=end_date,
         granularity=granularity,
         branch_id=branch_id,
+        tz=tz,
     )
     return call_graph_metrics
 
@@ -117,16 +169,10 @@ def get_funnel_metrics_trends(
 
     Returns:
         funnel_trends (dict): A dictionary containing the funnel trends.
-        call_trends (dict): A dictionary containing the call trends.
+        funnel_metrics (dict): The funnel metrics of the period.
+        previous_funnel_metrics (dict): The funnel metrics of the previous period.
     """
-    if start_date.tzinfo is None or end_date.tzinfo is None:
-        start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
-        end_date = end_date.replace(tzinfo=pytz.timezone("UTC"))
-    else:
-        if start_date.tzinfo.utcoffset(start_date) is not None:
-            start_date = start_date.astimezone(pytz.utc)
-        if end_date.tzinfo.utcoffset(end_date) is not None:
-            end_date = end_date.astimezone(pytz.utc)
+    start_date, end_date = _to_utc(start_date, end_date)
 
     funnel_trends = metrics_service.get_funnel_metrics_with_trends(
         start_date=start_date, end_date=end_date, branch_id=branch_id
@@ -150,19 +196,255 @@ def get_call_metrics_trends(
         branch_id (str): The ID of the branch.
 
     Returns:
-        funnel_trends (dict): A dictionary containing the funnel trends.
         call_trends (dict): A dictionary containing the call trends.
+        call_metrics (dict): The call metrics of the period.
+        previous_call_metrics (dict): The call metrics of the previous period.
     """
-    if start_date.tzinfo is None or end_date.tzinfo is None:
-        start_date = start_date.replace(tzinfo=pytz.timezone("UTC"))
-        end_date = end_date.replace(tzinfo=pytz.timezone("UTC"))
-    else:
-        if start_date.tzinfo.utcoffset(start_date) is not None:
-            start_date = start_date.astimezone(pytz.utc)
-        if end_date.tzinfo.utcoffset(end_date) is not None:
-            end_date = end_date.astimezone(pytz.utc)
+    start_date, end_date = _to_utc(start_date, end_date)
 
     call_trends = metrics_service.get_call_metrics_with_trends(
         start_date=start_date, end_date=end_date, branch_id=branch_id
-    )["call_trends"]
+    )
     return call_trends
+
+
+@router.get("/metrics/dashboard")
+def get_dashboard_metrics(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity,
+    branch_id: str,
+    user_ctx: UserContextDep,
+    metrics_service: MetricsServiceDep,
+    tz: str = "UTC",
+):
+    """
+    Retrieves all the metrics of the dashboard of a branch at once: those of
+    `/metrics/counts`, `/metrics/graphs` and both `/metrics/trends` endpoints.
+
+    Args:
+        start_date (datetime): The start date of the metrics period.
+        end_date (datetime): The end date of the metrics period.
+        granularity (Granularity): The size of the graph buckets.
+        branch_id (str): The ID of the branch.
+        user_ctx (UserContextDep): The user context.
+        metrics_service (MetricsServiceDep): The metrics service.
+        tz (str): The IANA time zone the graph buckets are aligned to.
+
+    Returns:
+        funnel_metrics (dict): The funnel metrics of the period.
+        call_metrics (dict): The call metrics of the period.
+        funnel_trends (dict): The funnel trends.
+        call_trends (dict): The call trends.
+        previous_funnel_metrics (dict): The funnel metrics of the previous period.
+        previous_call_metrics (dict): The call metrics of the previous period.
+        call_graph (dict): The call graph metrics.
+    """
+    logger.info(
+        f"Retrieving dashboard metrics for branch {branch_id} from {start_date} to {end_date}"
+    )
+    start_date, end_date = _to_utc(start_date, end_date)
+    error = _graph_error(start_date, end_date, granularity, tz)
+    if error is not None:
+        return error
+
+    return metrics_service.get_dashboard_metrics(
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        branch_id=branch_id,
+        tz=tz,
+    )
+
+
+@router.get("/metrics/org/counts")
+def get_org_metrics(
+    start_date: datetime,
+    end_date: datetime,
+    user_ctx: Annotated[
+        User | JSONResponse,
+        Depends(UserContextWithPermissions((Resource.METRIC, [Action.READ]))),
+    ],
+    metrics_service: MetricsServiceDep,
+    branch_ids: Annotated[list[str] | None, Query()] = None,
+):
+    """
+    Retrieves the metrics of the branches of the user's organization, each and
+    in total.
+
+    Args:
+        start_date (datetime): The start date of the metrics period.
+        end_date (datetime): The end date of the metrics period.
+        user_ctx (UserContextDep): The user context.
+        metrics_service (MetricsServiceDep): The metrics service.
+        branch_ids (list[str], optional): The IDs of the branches, all the
+            branches of the organization by default.
+
+    Returns:
+        funnel_metrics (dict): The funnel metrics of each branch and their total.
+        call_metrics (dict): The call metrics of each branch and their total.
+    """
+    logger.info(
+        f"Retrieving metrics for organization {user_ctx.organization_id} from {start_date} to {end_date}"
+    )
+    start_date, end_date = _to_utc(start_date, end_date)
+    funnel_metrics = metrics_service.get_org_funnel_metrics(
+        start_date=start_date,
+        end_date=end_date,
+        org_id=user_ctx.organization_id,
+        branch_ids=branch_ids,
+    )
+    call_metrics = metrics_service.get_org_call_metrics(
+        start_date=start_date,
+        end_date=end_date,
+        org_id=user_ctx.organization_id,
+        branch_ids=branch_ids,
+    )
+    return {"funnel_metrics": funnel_metrics, "call_metrics": call_metrics}
+
+
+@router.get("/metrics/org/graphs")
+def get_org_metrics_graph(
+    start_date: datetime,
+    end_date: datetime,
+    granularity: Granularity,
+    user_ctx: Annotated[
+        User | JSONResponse,
+        Depends(UserContextWithPermissions((Resource.METRIC, [Action.READ]))),
+    ],
+    metrics_service: MetricsServiceDep,
+    branch_ids: Annotated[list[str] | None, Query()] = None,
+    tz: str = "UTC",
+):
+    """
+    Retrieves the call graphs of the branches of the user's organization, each
+    and in total.
+
+    Args:
+        start_date (datetime): The start date of the metrics period.
+        end_date (datetime): The end date of the metrics period.
+        granularity (Granularity): The size of the graph buckets.
+        user_ctx (UserContextDep): The user context.
+        metrics_service (MetricsServiceDep): The metrics service.
+        branch_ids (list[str], optional): The IDs of the branches, all the
+            branches of the organization by default.
+        tz (str): The IANA time zone the buckets are aligned to.
+
+    Returns:
+        call_graph_metrics (dict): The call graph of each branch and of their total.
+    """
+    logger.info(
+        f"Retrieving metrics graph for organization {user_ctx.organization_id} from {start_date} to {end_date} with granularity {granularity.value} in {tz}"
+    )
+    start_date, end_date = _to_utc(start_date, end_date)
+    # A series per branch, and their total
+    series = (
+        metrics_service.count_org_branches(user_ctx.organization_id, branch_ids) + 1
+    )
+    error = _graph_error(start_date, end_date, granularity, tz, series)
+    if error is not None:
+        return error
+
+    return metrics_service.get_org_call_graph_metrics(
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        org_id=user_ctx.organization_id,
+        branch_ids=branch_ids,
+        tz=tz,
+    )
+
+
+def _stream_error(
+    branch_id: str, user_ctx: User, organization_service: OrganizationService
+) -> JSONResponse | None:
+    """
+    Checks that the user can stream the metrics of a branch: the branch belongs
+    to their organization, and they are a member of it unless they are an admin.
+    """
+    branch = organization_service.get_branch_by_id(branch_id)
+    if (
+        branch is None
+        or branch.deleted_at is not None
+        or branch.organization_id != user_ctx.organization_id
+    ):
+        return raise_custom_exception(404, "Branch not found")
+    if user_ctx.role != Role.ADMIN and not organization_service.is_branch_member(
+        branch_id, user_ctx.id
+    ):
+        return raise_custom_exception(
+            403, "User does not have permission to view the metrics of the branch"
+        )
+    return None
+
+
+async def _metrics_stream(
+    branch_id: str, expires_at: float | None
+) -> AsyncIterator[str]:
+    subscription = metrics_broker.subscribe(branch_id)
+    try:
+        # Sent once subscribed: metrics loaded from then on miss no delta
+        yield "event: connected\ndata: {}\n\n"
+        while True:
+            timeout = settings.METRICS_STREAM_KEEPALIVE_SECONDS
+            if expires_at is not None:
+                remaining = expires_at - time.time()
+                if remaining <= 0:
+                    # The client reconnects with a fresh token
+                    yield "event: expired\ndata: {}\n\n"
+                    return
+                timeout = min(timeout, remaining)
+
+            message = await subscription.get(timeout=timeout)
+            if message is None:
+                # Keeps proxies from closing the idle connection
+                yield ": keepalive\n\n"
+                continue
+            event, data = message
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+    finally:
+        metrics_broker.unsubscribe(subscription)
+
+
+@router.get("/metrics/stream")
+async def stream_metrics(
+    branch_id: str,
+    token: Annotated[HTTPAuthorizationCredentials, Depends(bearer_scheme)],
+    user_ctx: UserContextDep,
+    organization_service: OrganizationServiceDep,
+):
+    """
+    Streams the metrics deltas of the events of a branch as Server-Sent Events,
+    instead of polling the metrics.
+
+    The stream starts with a `connected` event, after which the client loads
+    the metrics (e.g. from `/metrics/dashboard`) and applies the `metrics`
+    events to them: each holds the increments of the `funnel_metrics` and
+    `call_metrics` changed by one event. On a `resync` event, deltas may have
+    been lost and the client reloads the metrics. The stream ends with an
+    `expired` event when the access token expires.
+
+    Args:
+        branch_id (str): The ID of the branch.
+        token (HTTPAuthorizationCredentials): The access token.
+        user_ctx (UserContextDep): The user context.
+        organization_service (OrganizationServiceDep): The organization service.
+
+    Returns:
+        StreamingResponse: The event stream.
+    """
+    error = await run_in_threadpool(
+        _stream_error, branch_id, user_ctx, organization_service
+    )
+    if error is not None:
+        return error
+
+    # Already verified when resolving the user context
+    expires_at = jwt.get_unverified_claims(token.credentials).get("exp")
+
+    logger.info(f"Streaming metrics of branch {branch_id}")
+    return StreamingResponse(
+        _metrics_stream(branch_id, expires_at),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
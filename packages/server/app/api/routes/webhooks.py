@@ -3,10 +3,15 @@ import logging
 
 from fastapi import APIRouter, Request, status
 
-from app.api.deps import CallServiceDep, EventServiceDep, RetellAIServiceDep
-from app.api.routes.calls import report_generator
+from app.api.deps import (
+    CallServiceDep,
+    EventServiceDep,
+    ReportJobServiceDep,
+)
+from app.core.config import settings
 from app.models import EventType, InterviewData
-from app.utils import timestamp_diff_to_ms
+from app.utils import timestamp_diff_to_ms, timestamp_to_datetime
+from app.workers.report_worker import report_worker_pool
 
 router = APIRouter(prefix="/webhooks")
 
@@ -16,23 +21,23 @@ logger = logging.getLogger("uvicorn")
 @router.post("/retell")
 async def handle_retell_events(
     req: Request,
-    retell_service: RetellAIServiceDep,
     call_service: CallServiceDep,
     event_service: EventServiceDep,
+    report_job_service: ReportJobServiceDep,
 ):
     event_data = await req.json()
 
-    # Once the call has ended, we generate a call report
+    # Once the call has ended, we queue a call report. The report itself is
+    # generated by the report workers so Retell gets its acknowledgement right away.
     if event_data["event"] == "call_ended":
         call_id = event_data["data"]["metadata"]["call_id"]
-        logger.info(f"Call ended event received. Generating report for call: {call_id}")
+        logger.info(f"Call ended event received. Queueing report for call: {call_id}")
         transcript = event_data["data"]["transcript"]
-        report_prompt = event_data["data"]["metadata"].get("report_prompt", None)
-        duration = timestamp_diff_to_ms(
-            start_timestamp=event_data["data"]["start_timestamp"],
-            end_timestamp=event_data["data"]["end_timestamp"],
+        start_timestamp = event_data["data"]["start_timestamp"]
+        end_timestamp = event_data["data"]["end_timestamp"]
+        duration_ms = timestamp_diff_to_ms(
+            start_timestamp=start_timestamp, end_timestamp=end_timestamp
         )
-        report = await report_generator(transcript, report_prompt)
 
         # EVENT: Call ended
         event_service.create_event(
@@ -44,9 +49,9 @@ async def handle_retell_events(
                 "profile_snapshot_id": event_data["data"]["metadata"][
                     "profile_snapshot_id"
                 ],
-                "start_timestamp": event_data["data"]["start_timestamp"],
-                "end_timestamp": event_data["data"]["end_timestamp"],
-                "duration": duration,
+                "start_timestamp": start_timestamp,
+                "end_timestamp": end_timestamp,
+                "duration_ms": duration_ms,
                 "lead_type": event_data["data"]["metadata"]["lead_type"],
                 "lead_status": event_data["data"]["metadata"]["lead_status"],
                 "call_type": event_data["data"]["metadata"]["call_type"],
@@ -54,16 +59,25 @@ async def handle_retell_events(
             branch_id=event_data["data"]["metadata"]["branch_id"],
             org_id=event_data["data"]["metadata"]["org_id"],
         )
-        call_metadata = {"duration": duration}
         call_service.update_call(
             call_id=call_id,
             call={
-                "report": report.model_dump_json(),
                 "transcript": transcript,
-                "call_metadata": json.dumps(call_metadata),
+                "start_timestamp": timestamp_to_datetime(start_timestamp),
+                "end_timestamp": timestamp_to_datetime(end_timestamp),
+                "duration_ms": duration_ms,
             },
         )
-        logger.info(f"Call {call_id} report generated")
+        job = report_job_service.enqueue_job(
+            call_id=call_id,
+            branch_id=event_data["data"]["metadata"]["branch_id"],
+            org_id=event_data["data"]["metadata"]["org_id"],
+            payload=event_data,
+            max_attempts=settings.REPORT_JOB_MAX_ATTEMPTS,
+        )
+        # Wake a worker once the job is committed
+        report_job_service.on_commit(report_worker_pool.notify)
+        logger.info(f"Call {call_id} report queued: {job.id}")
 
     return status.HTTP_200_OK
 
@@ -0,0 +1,119 @@
+import asyncio
+import threading
+from collections import defaultdict
+
+from app.core.config import settings
+
+# Sent instead of the messages a subscriber missed, because it fell behind or
+# the notifications of other workers may have been lost: the subscriber must
+# reload its state
+RESYNC = ("resync", {})
+
+Message = tuple[str, dict]
+
+
+class Subscription:
+    """
+    Messages published to a topic, queued for one subscriber on its event loop.
+    """
+
+    def __init__(self, topic: str, max_pending: int):
+        self.topic = topic
+        self.queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=max_pending)
+        self.loop = asyncio.get_running_loop()
+
+    def _put(self, message: Message):
+        if self.queue.full():
+            # The subscriber can't keep up, it reloads instead
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            message = RESYNC
+        self.queue.put_nowait(message)
+
+    async def get(self, timeout: float) -> Message | None:
+        """
+        Waits for the next message, and returns None after `timeout` seconds
+        without any.
+        """
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker:
+    """
+    In-process fan-out of messages to the subscribers of a topic, e.g. the
+    dashboards streaming the metrics of a branch.
+
+    Subscribers are async, and messages can be published from any thread, e.g.
+    by the database notification listener relaying the messages of the other
+    workers. Each subscriber has a bounded queue, so a slow one never holds up
+    the others.
+    """
+
+    def __init__(self, max_pending: int):
+        """
+        Initializes the broker.
+
+        Args:
+            max_pending (int): The maximum number of messages queued per subscriber.
+        """
+        self.max_pending = max_pending
+        self.published = 0
+        self._subscriptions: defaultdict[str, set[Subscription]] = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, topic: str) -> Subscription:
+        """
+        Subscribes to a topic. Must be called from the subscriber's event loop.
+        """
+        subscription = Subscription(topic, self.max_pending)
+        with self._lock:
+            self._subscriptions[topic].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.topic)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.topic]
+
+    def publish(self, topic: str, message: Message):
+        """
+        Queues a message for every subscriber of the topic. Can be called from
+        any thread.
+        """
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(topic, ()))
+            self.published += 1
+        self._deliver(subscriptions, message)
+
+    def publish_all(self, message: Message):
+        """
+        Queues a message for every subscriber of every topic.
+        """
+        with self._lock:
+            subscriptions = [s for t in self._subscriptions.values() for s in t]
+        self._deliver(subscriptions, message)
+
+    def _deliver(self, subscriptions: list[Subscription], message: Message):
+        for subscription in subscriptions:
+            if not subscription.loop.is_closed():
+                subscription.loop.call_soon_threadsafe(subscription._put, message)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "topics": len(self._subscriptions),
+                "subscribers": sum(len(s) for s in self._subscriptions.values()),
+                "max_pending": self.max_pending,
+                "published": self.published,
+            }
+
+
+# Metrics deltas of the events of each branch, streamed to the dashboards, see
+# `EventService.create_event`
+metrics_broker = Broker(max_pending=settings.METRICS_STREAM_MAX_PENDING)
@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any, Generic, TypeVar
+
+from app.core.config import settings
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Thread-safe, size-bounded cache whose entries expire `ttl` seconds after
+    they are set. The least recently used entry is evicted when the cache is full.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initializes the cache.
+
+        Args:
+            maxsize (int): The maximum number of entries.
+            ttl (float): Seconds an entry is served for; 0 disables the cache.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K, default: Any = None) -> V | Any:
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is _MISSING or entry[0] <= time.monotonic():
+                if entry is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key: K, value: V):
+        if self.ttl <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: K):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+# Users loaded by the authentication dependencies, keyed by user ID. Values are
+# the users' column values, never ORM instances, so that no session state is
+# shared between requests.
+user_cache: TTLCache[str, dict] = TTLCache(
+    maxsize=settings.USER_CACHE_MAX_SIZE, ttl=settings.user_cache_ttl
+)
+
+
+class MetricsCache:
+    """
+    Cache of the metrics of the branches, keyed by branch and by the parameters
+    of the query (range, granularity, ...).
+
+    Concurrent requests for the same metrics share a single computation: the
+    first one computes them while the others wait for its result (single
+    flight). Invalidating a branch bumps its generation, which is part of the
+    keys, so its entries, and the computations in flight when it changed, are
+    never served again and are evicted as they expire.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        """
+        Initializes the cache.
+
+        Args:
+            maxsize (int): The maximum number of entries.
+            ttl (float): Seconds an entry is served for; 0 disables the cache.
+        """
+        self.coalesced = 0
+        self._cache: TTLCache[tuple, Any] = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._generations: defaultdict[str, int] = defaultdict(int)
+        self._epoch = 0
+        self._in_flight: dict[tuple, Future] = {}
+        self._lock = threading.Lock()
+
+    def get_or_compute(
+        self, branch_id: str, key: Hashable, compute: Callable[[], V]
+    ) -> V:
+        """
+        Returns the cached metrics of the branch, or computes them, once for all
+        the concurrent callers. The values are shared and must not be modified.
+
+        Args:
+            branch_id (str): The ID of the branch of the metrics.
+            key (Hashable): The parameters of the metrics.
+            compute (Callable[[], V]): Computes the metrics on a miss.
+
+        Returns:
+            V: The metrics.
+        """
+        if self._cache.ttl <= 0:
+            return compute()
+        with self._lock:
+            key = (self._epoch, branch_id, self._generations[branch_id], key)
+        value = self._cache.get(key, _MISSING)
+        if value is not _MISSING:
+            return value
+
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not leader:
+            # Another request is computing the metrics
+            return future.result()
+
+        try:
+            value = compute()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            self._cache.set(key, value)
+            future.set_result(value)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+        return value
+
+    def invalidate(self, branch_id: str):
+        with self._lock:
+            self._generations[branch_id] += 1
+
+    def clear(self):
+        with self._lock:
+            self._epoch += 1
+            self._generations.clear()
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats(),
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight),
+        }
+
+
+# Metrics of the branches served to the dashboards, see `MetricsService`
+metrics_cache = MetricsCache(
+    maxsize=settings.METRICS_CACHE_MAX_SIZE, ttl=settings.METRICS_CACHE_TTL_SECONDS
+)
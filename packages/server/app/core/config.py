@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     API_V1_STR: str = "/v1"
     SECRET_KEY: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
+    # Issue short-lived access tokens carrying the user's role, organization and
+    # branch, and refresh tokens. Requests are then authorized without loading
+    # the user (see app/core/security.py).
+    STATELESS_AUTH: bool = False
+    STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 30  # 30 days
     DOMAIN: str = "0.0.0.0"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -49,6 +55,79 @@ class Settings(BaseSettings):
     WEBHOOK_URL: str
     AZURE_DB_URL: str = ""
 
+    # Password hashing (see app/core/security.py). Changing the cost rehashes
+    # passwords on the next login.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 2  # Processes; 0 hashes in the threadpool
+    PASSWORD_HASH_MAX_PENDING: int = 32  # Per process, more get a 429
+
+    # Database connection pool, per process (see app/core/db.py)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 60 * 30  # -1 disables recycling
+    DB_POOL_PRE_PING: bool = True
+    # Commit the writes of a request once, after the route returns (see
+    # app/services/base_service.py)
+    DB_UNIT_OF_WORK: bool = True
+
+    # Cache of the users loaded on each authenticated request (see app/core/cache.py)
+    USER_CACHE_TTL_SECONDS: float = 60.0  # 0 disables the cache
+    USER_CACHE_MAX_SIZE: int = 10_000
+    # Invalidate the caches of all workers through Postgres LISTEN/NOTIFY
+    # (see app/core/notify.py). When disabled, other workers may serve a stale
+    # user until its cache entry expires, so with more than one worker users are
+    # only cached for USER_CACHE_UNSYNCED_TTL_SECONDS.
+    PG_NOTIFY_ENABLED: bool = True
+    USER_CACHE_UNSYNCED_TTL_SECONDS: float = 5.0
+    # Processes serving the API, across all hosts. Also the default number of
+    # workers of uvicorn and gunicorn.
+    WEB_CONCURRENCY: int = 1
+
+    @computed_field  # type: ignore[misc]
+    @property
+    def user_cache_ttl(self) -> float:
+        if self.PG_NOTIFY_ENABLED or self.WEB_CONCURRENCY <= 1:
+            return self.USER_CACHE_TTL_SECONDS
+        return min(self.USER_CACHE_TTL_SECONDS, self.USER_CACHE_UNSYNCED_TTL_SECONDS)
+
+    # Retell API client (see app/core/retell.py)
+    RETELL_BASE_URL: str = ""  # Defaults to the Retell API
+    RETELL_MAX_CONCURRENCY: int = 16  # Requests in flight per process
+    RETELL_MAX_CONNECTIONS: int = 16
+    RETELL_MAX_KEEPALIVE_CONNECTIONS: int = 8
+    RETELL_KEEPALIVE_EXPIRY_SECONDS: float = 60.0
+    RETELL_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    RETELL_TIMEOUT_SECONDS: float = 30.0
+    RETELL_MAX_RETRIES: int = 2
+    RETELL_BREAKER_FAILURE_THRESHOLD: int = 5
+    RETELL_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Call report generation (see app/workers/report_worker.py)
+    REPORT_WORKER_CONCURRENCY: int = 4  # 0 disables the in-process worker pool
+    REPORT_WORKER_POLL_INTERVAL_SECONDS: float = 2.0
+    REPORT_JOB_MAX_ATTEMPTS: int = 5
+    REPORT_JOB_BACKOFF_SECONDS: int = 30
+    REPORT_JOB_MAX_BACKOFF_SECONDS: int = 60 * 30
+    REPORT_JOB_STALE_AFTER_SECONDS: int = 60 * 10
+
+    # Serve the whole days of the metrics ranges from the event_rollups table
+    METRICS_USE_ROLLUPS: bool = True
+    # Time zone of the rollups' days, the branches' local time. The rollups must
+    # be rebuilt when it changes (see app/rebuild_rollups.py)
+    METRICS_ROLLUP_TIMEZONE: str = "Asia/Kolkata"
+    # Cache of the metrics served to the dashboards, invalidated when events of
+    # their branch are created (see app/core/cache.py)
+    METRICS_CACHE_TTL_SECONDS: float = 30.0  # 0 disables the cache
+    METRICS_CACHE_MAX_SIZE: int = 1_000
+    # Graph buckets per request, over all the series of the organization graphs.
+    # Longer ranges get a 400: a shorter range or a larger granularity
+    METRICS_GRAPH_MAX_BUCKETS: int = 5_000
+    # Streams of the metrics deltas of the branches' events (see
+    # app/core/broker.py)
+    METRICS_STREAM_MAX_PENDING: int = 100  # Per subscriber, more get a resync
+    METRICS_STREAM_KEEPALIVE_SECONDS: float = 15.0
+
     @computed_field  # type: ignore[misc]
     @property
     def SQLALCHEMY_DATABASE_URI(self) -> PostgresDsn:
@@ -1,9 +1,97 @@
+import threading
+import time
+
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool
 from sqlmodel import Session, create_engine
 
 import app.models
 from app.core.config import settings
+from app.core.stats import LatencyStats
+
+# Session.info key set on the request sessions that commit once per request,
+# see app/services/base_service.py
+UNIT_OF_WORK = "unit_of_work"
+
+
+class PoolStats(LatencyStats):
+    """
+    Counters of the connection checkouts of the engine's pool.
+    """
+
+    def __init__(self, window: int = 1024):
+        super().__init__(window)
+        self.timeouts = 0
+
+    def record(self, wait_ms: float, timed_out: bool):
+        with self._lock:
+            self.timeouts += int(timed_out)
+            self._add(wait_ms)
+
+    def snapshot(self) -> dict:
+        latency = self.latency((0.95,), digits=2)
+        return {
+            "checkouts": self.count,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": latency["avg"],
+            "p95_wait_ms": latency["p95"],
+            "max_wait_ms": latency["max"],
+        }
+
+
+pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(QueuePool):
+    """
+    QueuePool that records how long each checkout waits for a connection,
+    including the time to open a new one.
+    """
+
+    _local = threading.local()
+
+    def _do_get(self):
+        # QueuePool._do_get retries by calling itself, only time the outer call
+        if getattr(self._local, "timing", False):
+            return super()._do_get()
+
+        self._local.timing = True
+        start = time.perf_counter()
+        timed_out = False
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            self._local.timing = False
+            pool_stats.record((time.perf_counter() - start) * 1000, timed_out)
+
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    poolclass=InstrumentedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+def get_pool_stats() -> dict:
+    """
+    Returns the occupancy of the engine's connection pool and its checkout counters.
+    """
+    pool = engine.pool
+    return {
+        "size": pool.size(),
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        **pool_stats.snapshot(),
+    }
 
 
 # NOTE: make sure all SQLModel models are imported (app.models) before initializing DB
@@ -0,0 +1,123 @@
+import logging
+import os
+import select
+import socket
+import threading
+from collections import defaultdict
+from collections.abc import Callable
+
+import psycopg
+from sqlalchemy import text
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.core.db import engine
+
+logger = logging.getLogger("uvicorn")
+
+# Channels used to keep the in-process caches of the workers in sync
+USER_CHANGED = "user_changed"
+EVENT_CREATED = "event_created"
+
+Handler = Callable[[str | None], None]
+
+
+def process_id() -> str:
+    """
+    Identifies this worker in the notifications it sends, so it can tell its
+    own apart. Read on each call, as workers may be forked after import.
+    """
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def notify(db: Session, channel: str, payload: str = ""):
+    """
+    Queues a notification on the session's transaction. Postgres delivers it to
+    the listeners of every process when the transaction commits, and drops it if
+    the transaction is rolled back.
+
+    Args:
+        db (Session): The database session.
+        channel (str): The channel to notify.
+        payload (str): The payload of the notification.
+    """
+    if not settings.PG_NOTIFY_ENABLED:
+        return
+    db.exec(
+        text("SELECT pg_notify(:channel, :payload)"),
+        params={"channel": channel, "payload": payload},
+    )
+
+
+class NotificationListener:
+    """
+    Listens to Postgres notifications on a dedicated connection and dispatches
+    them to the handlers subscribed to their channel, on a background thread.
+
+    Handlers are called with the payload of each notification, and with None
+    whenever the listener (re)connects: notifications sent while it was
+    disconnected are lost, so handlers must then drop whatever they cached.
+    """
+
+    def __init__(self, poll_interval: float = 1.0, reconnect_delay: float = 5.0):
+        self.poll_interval = poll_interval
+        self.reconnect_delay = reconnect_delay
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def subscribe(self, channel: str, handler: Handler):
+        self._handlers[channel].append(handler)
+
+    def start(self):
+        if not settings.PG_NOTIFY_ENABLED or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run, name="pg-listener", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout=self.poll_interval + 1)
+        self._thread = None
+
+    def _dispatch(self, channel: str, payload: str | None):
+        for handler in self._handlers.get(channel, []):
+            try:
+                handler(payload)
+            except Exception as e:
+                logger.error(f"Notification handler for {channel} failed: {e}")
+
+    def _run(self):
+        conninfo = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        while not self._stop.is_set():
+            try:
+                with psycopg.connect(conninfo, autocommit=True) as conn:
+                    conn.add_notify_handler(
+                        lambda n: self._dispatch(n.channel, n.payload)
+                    )
+                    for channel in self._handlers:
+                        conn.execute(f'LISTEN "{channel}"')
+                    for channel in self._handlers:
+                        self._dispatch(channel, None)
+                    logger.info("Listening to database notifications")
+
+                    while not self._stop.is_set():
+                        readable, _, _ = select.select(
+                            [conn.fileno()], [], [], self.poll_interval
+                        )
+                        if readable:
+                            # Reading the result delivers pending notifications
+                            conn.execute("SELECT 1")
+            except psycopg.Error as e:
+                logger.error(f"Database notification listener disconnected: {e}")
+                self._stop.wait(self.reconnect_delay)
+
+
+notification_listener = NotificationListener()
@@ -0,0 +1,88 @@
+from collections.abc import Iterable
+
+from app.models import ROLE_PERMISSIONS, Action, Resource, Role, User
+from app.utils import CustomException
+
+# ROLE_PERMISSIONS compiled into one bit per (resource, action) pair, so a
+# permission check is a single AND instead of walking the nested table.
+_BITS: dict[tuple[Resource, Action], int] = {
+    (resource, action): 1 << (i * len(Action) + j)
+    for i, resource in enumerate(Resource)
+    for j, action in enumerate(Action)
+}
+
+
+def permission_mask(resource: Resource, actions: Iterable[Action]) -> int:
+    """
+    Returns the bitmask of the given actions on a resource.
+    """
+    mask = 0
+    for action in actions:
+        mask |= _BITS[(resource, action)]
+    return mask
+
+
+ROLE_MASKS: dict[Role, int] = {
+    role: sum(
+        permission_mask(resource, set(actions))
+        for resource, actions in permissions.items()
+    )
+    for role, permissions in ROLE_PERMISSIONS.items()
+}
+
+
+class AuthContext:
+    """
+    The authenticated user of a request and their permissions. Resolved once per
+    request, and answers any number of permission checks.
+    """
+
+    __slots__ = ("user", "mask")
+
+    def __init__(self, user: User):
+        self.user = user
+        self.mask = ROLE_MASKS.get(user.role, 0)
+
+    def has_mask(self, mask: int) -> bool:
+        return self.mask & mask == mask
+
+    def can(self, resource: Resource, *actions: Action) -> bool:
+        """
+        Checks if the user can perform all the given actions on a resource.
+        """
+        return self.has_mask(permission_mask(resource, actions))
+
+    def can_many(self, checks: Iterable[tuple[Resource, list[Action]]]) -> list[bool]:
+        """
+        Checks several permissions at once, e.g. one per row of a list.
+
+        Args:
+            checks (Iterable[tuple[Resource, list[Action]]]): The permissions.
+
+        Returns:
+            list[bool]: Whether the user has each permission, in order.
+        """
+        own = self.mask
+        masks: dict[tuple[Resource, tuple[Action, ...]], int] = {}
+        results = []
+        for resource, actions in checks:
+            key = (resource, tuple(actions))
+            mask = masks.get(key)
+            if mask is None:
+                mask = masks[key] = permission_mask(resource, actions)
+            results.append(own & mask == mask)
+        return results
+
+    def require(self, resource: Resource, *actions: Action) -> User:
+        """
+        Checks a permission, raising a 403 if the user doesn't have it.
+
+        Returns:
+            User: The user.
+        """
+        return self.require_mask(permission_mask(resource, actions))
+
+    def require_mask(self, mask: int) -> User:
+        if not self.has_mask(mask):
+            raise CustomException(403, "User not authorized")
+        return self.user
@@ -0,0 +1,340 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, TypeVar
+
+import httpx
+from retell import (
+    APIConnectionError,
+    APIStatusError,
+    Retell,
+    RetellError,
+)
+
+from app.core.config import settings
+from app.core.stats import LatencyStats
+
+T = TypeVar("T")
+
+logger = logging.getLogger("uvicorn")
+
+# Timeouts of the Retell operations used by the application, in seconds. Other
+# operations use RETELL_TIMEOUT_SECONDS.
+OPERATION_TIMEOUTS = {
+    "call.register": 10.0,
+    "llm.create": 20.0,
+    "llm.update": 20.0,
+    "agent.create": 20.0,
+}
+
+# The Retell SDK client is synchronous. Its requests run on a dedicated, bounded
+# pool so they neither block the event loop nor starve the threadpool that
+# serves the sync routes and dependencies.
+executor = ThreadPoolExecutor(
+    max_workers=settings.RETELL_MAX_CONCURRENCY, thread_name_prefix="retell"
+)
+
+
+async def run_retell(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """
+    Run a blocking Retell SDK call without blocking the event loop.
+
+    Args:
+        func (Callable): The SDK method, e.g. `retell_service.call.register`.
+        *args: Positional arguments for the method.
+        **kwargs: Keyword arguments for the method.
+
+    Returns:
+        The result of the SDK call.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(func, *args, **kwargs))
+
+
+class RetellUnavailableError(RetellError):
+    """
+    Raised instead of calling Retell while the circuit breaker is open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Stops calling Retell after consecutive failures, so requests fail fast while
+    it is down instead of each waiting for a timeout. After `reset_after` seconds
+    a single trial request is let through; the circuit closes again if it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_after: float):
+        """
+        Initializes the circuit breaker.
+
+        Args:
+            failure_threshold (int): The number of consecutive failures that open the circuit.
+            reset_after (float): Seconds to wait before letting a trial request through.
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if time.monotonic() - self.opened_at >= self.reset_after:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def before_request(self):
+        """
+        Raises RetellUnavailableError if the request must not be sent.
+        """
+        with self._lock:
+            state = self.state
+            if state == self.CLOSED:
+                return
+            if state == self.HALF_OPEN and not self._trial_running:
+                self._trial_running = True
+                return
+        raise RetellUnavailableError("Retell is unavailable, please try again later")
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def release(self):
+        """
+        Ends a request that neither succeeded nor failed because of Retell, e.g.
+        a 4xx response, without changing the state. A half-open trial is let
+        through again on the next request.
+        """
+        with self._lock:
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logger.warning("Retell circuit breaker opened")
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class OperationStats(LatencyStats):
+    """
+    Request counters and latencies of a Retell operation.
+    """
+
+    def __init__(self, window: int = 512):
+        super().__init__(window)
+        self.errors = 0
+        self.rejected = 0
+
+    def record(self, elapsed_ms: float, error: bool):
+        with self._lock:
+            self.errors += int(error)
+            self._add(elapsed_ms)
+
+    def record_rejected(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self) -> dict:
+        latency = self.latency((0.5, 0.95), digits=1)
+        return {
+            "requests": self.count,
+            "errors": self.errors,
+            "rejected": self.rejected,
+            "avg_ms": latency["avg"],
+            "p50_ms": latency["p50"],
+            "p95_ms": latency["p95"],
+            "max_ms": latency["max"],
+        }
+
+
+class _Resource:
+    """
+    Wraps a resource of the SDK client (`call`, `llm`, `agent`, ...) so its methods
+    go through the circuit breaker, get their operation timeout and are measured.
+    """
+
+    def __init__(self, client: "RetellClient", name: str):
+        self._client = client
+        self._name = name
+
+    def __getattr__(self, method: str):
+        if self._client.sdk is None:
+            self._client.open()
+        func = getattr(getattr(self._client.sdk, self._name), method)
+        if not callable(func):
+            return func
+        return partial(self._client.request, f"{self._name}.{method}", func)
+
+
+class RetellClient:
+    """
+    Process-wide Retell client.
+
+    All requests share one keep-alive connection pool, so TLS connections to
+    Retell are reused across requests. The SDK resources used by the application
+    are exposed under the same names (`client.call.register(...)`,
+    `client.llm.create(...)`, ...).
+    """
+
+    def __init__(self):
+        self.sdk: Retell | None = None
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.RETELL_BREAKER_FAILURE_THRESHOLD,
+            reset_after=settings.RETELL_BREAKER_RESET_SECONDS,
+        )
+        self.operations: dict[str, OperationStats] = {}
+        self._http_client: httpx.Client | None = None
+        self._lock = threading.Lock()
+
+    def open(self):
+        """
+        Creates the connection pool and the SDK client. Called on startup; the
+        client is also opened on first use.
+        """
+        with self._lock:
+            if self.sdk is not None:
+                return
+            self._http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=settings.RETELL_MAX_CONNECTIONS,
+                    max_keepalive_connections=settings.RETELL_MAX_KEEPALIVE_CONNECTIONS,
+                    keepalive_expiry=settings.RETELL_KEEPALIVE_EXPIRY_SECONDS,
+                ),
+                timeout=httpx.Timeout(
+                    settings.RETELL_TIMEOUT_SECONDS,
+                    connect=settings.RETELL_CONNECT_TIMEOUT_SECONDS,
+                ),
+            )
+            self.sdk = Retell(
+                api_key=settings.RETELL_API_KEY,
+                base_url=settings.RETELL_BASE_URL or None,
+                max_retries=settings.RETELL_MAX_RETRIES,
+                http_client=self._http_client,
+            )
+
+    def close(self):
+        """
+        Closes the connection pool.
+        """
+        with self._lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
+            self.sdk = None
+
+    @property
+    def call(self) -> _Resource:
+        return _Resource(self, "call")
+
+    @property
+    def llm(self) -> _Resource:
+        return _Resource(self, "llm")
+
+    @property
+    def agent(self) -> _Resource:
+        return _Resource(self, "agent")
+
+    def request(self, operation: str, func: Callable[..., T], *args, **kwargs) -> T:
+        """
+        Sends a request to Retell.
+
+        Args:
+            operation (str): The name of the operation, e.g. `call.register`.
+            func (Callable): The SDK method.
+            *args: Positional arguments for the method.
+            **kwargs: Keyword arguments for the method.
+
+        Returns:
+            The result of the SDK call.
+        """
+        stats = self.operations.setdefault(operation, OperationStats())
+        try:
+            self.breaker.before_request()
+        except RetellUnavailableError:
+            stats.record_rejected()
+            raise
+
+        kwargs.setdefault(
+            "timeout",
+            httpx.Timeout(
+                OPERATION_TIMEOUTS.get(operation, settings.RETELL_TIMEOUT_SECONDS),
+                connect=settings.RETELL_CONNECT_TIMEOUT_SECONDS,
+            ),
+        )
+        start = time.perf_counter()
+        error, failure = True, False
+        try:
+            result = func(*args, **kwargs)
+            error = False
+            return result
+        except APIStatusError as e:
+            # Only 5xx responses mean Retell is unhealthy, 4xx are the caller's
+            failure = e.status_code >= 500
+            raise
+        except APIConnectionError:
+            # Includes timeouts
+            failure = True
+            raise
+        finally:
+            stats.record((time.perf_counter() - start) * 1000, error=error)
+            if failure:
+                self.breaker.record_failure()
+            elif error:
+                self.breaker.release()
+            else:
+                self.breaker.record_success()
+
+    def stats(self) -> dict:
+        """
+        Returns the state of the circuit breaker, the connection pool and the
+        latency of each operation.
+        """
+        return {
+            "circuit_breaker": {
+                "state": self.breaker.state,
+                "consecutive_failures": self.breaker.failures,
+            },
+            "pool": self._pool_stats(),
+            "executor": {
+                "max_workers": executor._max_workers,
+                "threads": len(executor._threads),
+                "queued": executor._work_queue.qsize(),
+            },
+            "operations": {
+                name: stats.snapshot()
+                for name, stats in sorted(self.operations.items())
+            },
+        }
+
+    def _pool_stats(self) -> dict:
+        stats = {
+            "max_connections": settings.RETELL_MAX_CONNECTIONS,
+            "max_keepalive_connections": settings.RETELL_MAX_KEEPALIVE_CONNECTIONS,
+        }
+        # httpx doesn't expose its pool, read it from the underlying httpcore pool
+        pool = getattr(getattr(self._http_client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []))
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+        return stats
+
+
+retell_client = RetellClient()
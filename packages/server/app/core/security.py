@@ -1,12 +1,26 @@
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta, timezone
-from typing import Any
+from typing import Any, TypeVar
 
 from jose import jwt
 from passlib.context import CryptContext
+from starlette.concurrency import run_in_threadpool
 
 from app.core.config import settings
+from app.models import Token, TokenPayload, TokenType, User
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+T = TypeVar("T")
+
+# Hashes with a different cost are upgraded on login, see `verify_and_update_password`
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS
+)
 
 
 ALGORITHM = "HS256"
@@ -26,14 +40,130 @@ def create_access_token(
     Returns:
         str: The encoded access token.
     """
-    expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
+    now = datetime.now(timezone.utc)
+    expire = now + expires_delta
+    # Millisecond precision, compared to revocation times
+    to_encode = {"exp": expire, "iat": round(now.timestamp(), 3), "sub": str(subject)}
     if metadata is not None:
         to_encode.update(metadata)
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
+def create_tokens(user: User) -> Token:
+    """
+    Create the tokens returned to a user who logs in, registers or refreshes
+    their token.
+
+    Args:
+        user (User): The user.
+
+    Returns:
+        Token: The access token, and with STATELESS_AUTH a refresh token.
+    """
+    metadata = {
+        "organization_id": user.organization_id,
+        "branch_id": user.current_branch_id,
+        "role": user.role,
+    }
+    if not settings.STATELESS_AUTH:
+        return Token(
+            access_token=create_access_token(
+                user.id,
+                timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES),
+                metadata=metadata,
+            )
+        )
+
+    return Token(
+        access_token=create_access_token(
+            user.id,
+            timedelta(minutes=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES),
+            metadata={
+                **metadata,
+                "type": TokenType.ACCESS,
+                "full_name": user.full_name,
+                "is_active": user.is_active,
+            },
+        ),
+        refresh_token=create_access_token(
+            user.id,
+            timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES),
+            metadata={"type": TokenType.REFRESH},
+        ),
+    )
+
+
+def user_from_token(token_data: TokenPayload) -> User | None:
+    """
+    Build the user from the claims of a stateless access token.
+
+    Args:
+        token_data (TokenPayload): The decoded token.
+
+    Returns:
+        User | None: The user, not attached to any session. None if the token
+            doesn't carry the user's claims.
+    """
+    if token_data.type != TokenType.ACCESS or token_data.role is None:
+        return None
+    return User(
+        id=token_data.sub,
+        organization_id=token_data.organization_id,
+        current_branch_id=token_data.branch_id,
+        role=token_data.role,
+        full_name=token_data.full_name,
+        is_active=bool(token_data.is_active),
+    )
+
+
+class RevocationList:
+    """
+    Users whose stateless access tokens issued before a given time are revoked,
+    because the user was deactivated or their claims changed. Entries are kept
+    until the tokens they revoke have expired.
+    """
+
+    def __init__(self, ttl: float):
+        """
+        Initializes the revocation list.
+
+        Args:
+            ttl (float): The lifetime of the access tokens, in seconds.
+        """
+        self.ttl = ttl
+        self._revoked: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def revoke(self, user_id: str, changed_at: float):
+        """
+        Revokes the tokens of a user issued before the user changed. Tokens
+        issued since, with the new claims, stay valid.
+
+        Args:
+            user_id (str): The ID of the user.
+            changed_at (float): When the user changed, as a UNIX timestamp.
+        """
+        now = time.time()
+        with self._lock:
+            self._revoked[user_id] = max(changed_at, self._revoked.get(user_id, 0.0))
+            self._revoked = {
+                user: at for user, at in self._revoked.items() if at > now - self.ttl
+            }
+
+    def is_revoked(self, user_id: str, issued_at: float | None) -> bool:
+        if issued_at is None:
+            return True
+        revoked_at = self._revoked.get(user_id)
+        return revoked_at is not None and issued_at < revoked_at
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+
+revoked_tokens = RevocationList(ttl=settings.STATELESS_ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """
     Verify a password against a hashed password.
@@ -59,3 +189,101 @@ def get_password_hash(password: str) -> str:
         str: The hashed password.
     """
     return pwd_context.hash(password)
+
+
+def _verify_and_update(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class PasswordHasherBusyError(Exception):
+    """
+    Raised when too many password hashes are already queued.
+    """
+
+
+# bcrypt is CPU bound: it runs on a pool of processes so it neither holds the
+# GIL nor occupies the threadpool that serves the sync routes. At most
+# PASSWORD_HASH_MAX_PENDING hashes are queued or running per process, further
+# requests are rejected instead of waiting.
+_executor: ProcessPoolExecutor | None = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(max(settings.PASSWORD_HASH_MAX_PENDING, 1))
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            # Forking a process that runs threads can deadlock the children
+            _executor = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return _executor
+
+
+def shutdown_password_hasher():
+    """
+    Stops the password hashing processes.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(cancel_futures=True)
+        _executor = None
+
+
+async def _run_password_task(func: Callable[..., T], *args: Any) -> T:
+    if not _pending.acquire(blocking=False):
+        raise PasswordHasherBusyError("Too many password hashes in progress")
+    try:
+        if settings.PASSWORD_HASH_WORKERS <= 0:
+            return await run_in_threadpool(func, *args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_executor(), func, *args)
+    except BrokenProcessPool:
+        # A worker died, start a new pool for the next requests
+        shutdown_password_hasher()
+        raise
+    finally:
+        _pending.release()
+
+
+async def hash_password(password: str) -> str:
+    """
+    Hash a password on the password hashing pool.
+
+    Args:
+        password (str): The password to hash.
+
+    Returns:
+        str: The hashed password.
+
+    Raises:
+        PasswordHasherBusyError: If the pool is saturated.
+    """
+    return await _run_password_task(get_password_hash, password)
+
+
+async def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password on the password hashing pool, and rehash it if its hash
+    doesn't use the configured cost.
+
+    Args:
+        plain_password (str): The plain text password.
+        hashed_password (str): The hashed password.
+
+    Returns:
+        bool: True if the password is valid, False otherwise.
+        str | None: The new hash to store, if the password is valid and its hash
+            must be upgraded.
+
+    Raises:
+        PasswordHasherBusyError: If the pool is saturated.
+    """
+    return await _run_password_task(_verify_and_update, plain_password, hashed_password)
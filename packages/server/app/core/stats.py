@@ -0,0 +1,61 @@
+import threading
+from collections import deque
+
+
+class LatencyStats:
+    """
+    Number, average, maximum and percentiles of the latencies of an operation,
+    e.g. the connection checkouts of the database pool or the requests to Retell.
+
+    Percentiles are computed over the last `window` latencies. Subclasses add
+    their own counters, updated under the same lock with `_add`.
+    """
+
+    def __init__(self, window: int):
+        """
+        Initializes the stats.
+
+        Args:
+            window (int): The number of latest latencies kept for the percentiles.
+        """
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._latencies: deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def _add(self, elapsed_ms: float):
+        # Called with the lock held
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self._latencies.append(elapsed_ms)
+
+    def record(self, elapsed_ms: float):
+        with self._lock:
+            self._add(elapsed_ms)
+
+    def latency(self, percentiles: tuple[float, ...], digits: int) -> dict:
+        """
+        Summarizes the latencies.
+
+        Args:
+            percentiles (tuple[float, ...]): The percentiles, e.g. 0.95.
+            digits (int): The number of decimals of the milliseconds.
+
+        Returns:
+            dict: The `avg` latency, one `p<N>` latency per percentile (None
+            until a latency is recorded), and the `max` latency.
+        """
+        with self._lock:
+            count, total_ms, max_ms = self.count, self.total_ms, self.max_ms
+            latencies = sorted(self._latencies)
+
+        summary = {"avg": round(total_ms / count, digits) if count else None}
+        for p in percentiles:
+            index = min(int(len(latencies) * p), len(latencies) - 1)
+            summary[f"p{round(p * 100)}"] = (
+                round(latencies[index], digits) if latencies else None
+            )
+        summary["max"] = round(max_ms, digits)
+        return summary
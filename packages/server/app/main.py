@@ -1,4 +1,5 @@
 import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI, Request, status
 from fastapi.exceptions import RequestValidationError
@@ -6,10 +7,32 @@ from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
 from app.core.config import settings
-from app.utils import custom_generate_unique_id, raise_custom_exception
+from app.core.notify import notification_listener
+from app.core.retell import RetellUnavailableError, retell_client
+from app.core.security import PasswordHasherBusyError, shutdown_password_hasher
+from app.utils import (
+    CustomException,
+    custom_generate_unique_id,
+    raise_custom_exception,
+)
+from app.workers.report_worker import report_worker_pool
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    retell_client.open()
+    notification_listener.start()
+    await report_worker_pool.start()
+    yield
+    await report_worker_pool.stop()
+    notification_listener.stop()
+    retell_client.close()
+    shutdown_password_hasher()
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
     swagger_ui_parameters={"persistAuthorization": True},
@@ -32,6 +55,29 @@ async def global_error_handler(request: Request, exc: Exception):
     )
 
 
+@app.exception_handler(CustomException)
+async def custom_exception_handler(request: Request, exc: CustomException):
+    return raise_custom_exception(exc.status_code, exc.message, exc.detail)
+
+
+@app.exception_handler(RetellUnavailableError)
+async def retell_unavailable_handler(request: Request, exc: RetellUnavailableError):
+    return raise_custom_exception(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        message="The voice service is temporarily unavailable. Please try again later.",
+    )
+
+
+@app.exception_handler(PasswordHasherBusyError)
+async def password_hasher_busy_handler(request: Request, exc: PasswordHasherBusyError):
+    response = raise_custom_exception(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        message="Too many requests. Please try again in a moment.",
+    )
+    response.headers["Retry-After"] = "1"
+    return response
+
+
 @app.exception_handler(RequestValidationError)
 async def validation_exception_handler(request: Request, exc: RequestValidationError):
     return raise_custom_exception(
@@ -51,6 +97,7 @@ if settings.BACKEND_CORS_ORIGINS:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        expose_headers=["X-Next-Cursor"],
     )
 
 
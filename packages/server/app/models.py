@@ -1,12 +1,17 @@
-from datetime import datetime, timezone
+import random
+import threading
+import time
+from datetime import date, datetime
 from enum import Enum
 
 from nanoid import generate
-from pydantic import BaseModel, EmailStr, SecretStr
-from sqlalchemy import JSON, Integer
+from pydantic import BaseModel, EmailStr, SecretStr, computed_field
+from sqlalchemy import JSON, BigInteger, Index, Integer, func, text
 from sqlalchemy.dialects.postgresql import JSONB
 from sqlmodel import Column, DateTime, Field, Relationship, SQLModel, Text
 
+from app.utils import format_duration
+
 
 class Role(str, Enum):
     ADMIN = "admin"
@@ -70,6 +75,15 @@ class CallType(str, Enum):
     MEETING_CALL = "meeting_call"
 
 
+class Granularity(str, Enum):
+    HOUR = "hour"
+    DAY = "day"
+    WEEK = "week"
+    MONTH = "month"
+    QUARTER = "quarter"
+    YEAR = "year"
+
+
 class LeadType(str, Enum):
     SUSPECT = "suspect"
     PROSPECT = "prospect"
@@ -106,6 +120,7 @@ class ObjectType(str, Enum):
     PROMPT = "prompt"
     AGENT = "agent"
     INVITE = "invite"
+    REPORT_JOB = "report_job"
 
 
 class InviteStatus(str, Enum):
@@ -115,6 +130,56 @@ class InviteStatus(str, Enum):
     EXPIRED = "expired"
 
 
+class ReportJobStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+OBJECT_ABBREVIATIONS: dict[ObjectType, str] = {
+    ObjectType.ORGANIZATION: "org",
+    ObjectType.USER: "usr",
+    ObjectType.BRANCH: "br",
+    ObjectType.ROLE: "rol",
+    ObjectType.PERMISSION: "perm",
+    ObjectType.ATTRIBUTE: "attr",
+    ObjectType.PROFILE: "prof",
+    ObjectType.LEAD: "lead",
+    ObjectType.PROFILE_SNAPSHOT: "snap",
+    ObjectType.EVENT: "evnt",
+    ObjectType.CALL: "call",
+    ObjectType.METRIC: "metr",
+    ObjectType.DOCUMENT: "doc",
+    ObjectType.RECORDING: "rec",
+    ObjectType.PROFILE_ATTRIBUTE_MAPPING: "pamap",
+    ObjectType.ROLE_PERMISSION_MAPPING: "rpmap",
+    ObjectType.USER_BRANCH_MAPPING: "ubmap",
+    ObjectType.USER_ROLE_MAPPING: "urmap",
+    ObjectType.PROMPT: "prompt",
+    ObjectType.AGENT: "agent",
+    ObjectType.INVITE: "inv",
+    ObjectType.REPORT_JOB: "rjob",
+}
+
+# The "<abbreviation>_" prefix of the IDs of each object type
+_ID_PREFIXES: dict[ObjectType, str] = {
+    obj: f"{abbrv}_" for obj, abbrv in OBJECT_ABBREVIATIONS.items()
+}
+
+ID_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyz"
+_ID_ALPHABET_PAIRS = [a + b for a in ID_ALPHABET for b in ID_ALPHABET]
+# IDs are 9 characters of milliseconds since the epoch (until year 5188)
+# followed by 12 characters of a 62 bits random number, in base 36: as long as
+# the previous random IDs, and sorted by creation time. The IDs generated by a
+# process in the same millisecond increment the random number of the first one
+# so that they stay sorted.
+_ID_RANDOM_BITS = 62
+_ID_RANDOM_RANGE = len(ID_ALPHABET) ** 12
+_id_lock = threading.Lock()
+_last_id_value = 0
+
+
 def get_object_abbreviation(obj: ObjectType) -> str:
     """
     Returns the abbreviation for the given object type. Used for public IDs.
@@ -128,56 +193,20 @@ def get_object_abbreviation(obj: ObjectType) -> str:
     Raises:
         ValueError: If the object type is unknown.
     """
-    if obj == ObjectType.ORGANIZATION:
-        return "org"
-    elif obj == ObjectType.USER:
-        return "usr"
-    elif obj == ObjectType.BRANCH:
-        return "br"
-    elif obj == ObjectType.ROLE:
-        return "rol"
-    elif obj == ObjectType.PERMISSION:
-        return "perm"
-    elif obj == ObjectType.ATTRIBUTE:
-        return "attr"
-    elif obj == ObjectType.PROFILE:
-        return "prof"
-    elif obj == ObjectType.LEAD:
-        return "lead"
-    elif obj == ObjectType.PROFILE_SNAPSHOT:
-        return "snap"
-    elif obj == ObjectType.EVENT:
-        return "evnt"
-    elif obj == ObjectType.CALL:
-        return "call"
-    elif obj == ObjectType.METRIC:
-        return "metr"
-    elif obj == ObjectType.DOCUMENT:
-        return "doc"
-    elif obj == ObjectType.RECORDING:
-        return "rec"
-    elif obj == ObjectType.PROFILE_ATTRIBUTE_MAPPING:
-        return "pamap"
-    elif obj == ObjectType.ROLE_PERMISSION_MAPPING:
-        return "rpmap"
-    elif obj == ObjectType.USER_BRANCH_MAPPING:
-        return "ubmap"
-    elif obj == ObjectType.USER_ROLE_MAPPING:
-        return "urmap"
-    elif obj == ObjectType.PROMPT:
-        return "prompt"
-    elif obj == ObjectType.AGENT:
-        return "agent"
-    elif obj == ObjectType.INVITE:
-        return "inv"
-    else:
-        raise ValueError(f"Unknown object type: {obj}")
+    try:
+        return OBJECT_ABBREVIATIONS[obj]
+    except KeyError:
+        raise ValueError(f"Unknown object type: {obj}") from None
 
 
 def get_id(obj: ObjectType) -> str:
     """
     Generate a ID for the given object.
 
+    IDs start with the creation time, so new rows are appended to the end of
+    the primary key indexes instead of being inserted at random places. They
+    are unique but not secret, use `get_random_id` for tokens.
+
     Args:
         obj (ObjectType): The object for which the ID is generated.
 
@@ -185,24 +214,66 @@ def get_id(obj: ObjectType) -> str:
         str: The generated publication ID.
 
     """
+    try:
+        prefix = _ID_PREFIXES[obj]
+    except KeyError:
+        raise ValueError(f"Unknown object type: {obj}") from None
+    global _last_id_value
+    value = time.time_ns() // 1_000_000 * _ID_RANDOM_RANGE + random.getrandbits(
+        _ID_RANDOM_BITS
+    )
+    with _id_lock:
+        if value <= _last_id_value:
+            value = _last_id_value + 1
+        _last_id_value = value
+
+    # 21 base 36 digits, two at a time
+    chars = [""] * 11
+    for i in range(10, 0, -1):
+        value, pair = divmod(value, 1296)
+        chars[i] = _ID_ALPHABET_PAIRS[pair]
+    chars[0] = ID_ALPHABET[value]
+    return prefix + "".join(chars)
+
+
+def get_random_id(obj: ObjectType) -> str:
+    """
+    Generate a random, unguessable ID for the given object, e.g. for tokens.
+
+    Args:
+        obj (ObjectType): The object for which the ID is generated.
+
+    Returns:
+        str: The generated ID.
+    """
     abbrv = get_object_abbreviation(obj)
-    id = generate("0123456789abcdefghijklmnopqrstuvwxyz")
+    id = generate(ID_ALPHABET)
     return f"{abbrv}_{id}"
 
 
 # Organization: Represents the organization that the application is serving.
 class Organization(SQLModel, table=True):
     __tablename__ = "organizations"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.ORGANIZATION)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -214,16 +285,26 @@ class Organization(SQLModel, table=True):
 # Branch: Represents the different branches (or teams) within the organization.
 class Branch(SQLModel, table=True):
     __tablename__ = "branches"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.BRANCH)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -236,16 +317,27 @@ class Branch(SQLModel, table=True):
 # User: Represents the users of the application, with the ability to have multiple roles.
 class User(SQLModel, table=True):
     __tablename__ = "users"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (Index("ix_users_email", "email"),)
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.USER)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -266,18 +358,28 @@ class User(SQLModel, table=True):
 # User-Branch Mapping
 class UserBranchMapping(SQLModel, table=True):
     __tablename__ = "user_branch_mappings"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.USER_BRANCH_MAPPING)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -294,16 +396,26 @@ class UserBranchMapping(SQLModel, table=True):
 # Attribute: Represents the different attributes that can be associated with a profile (these are dynamic properties that can be added to a profile).
 class Attribute(SQLModel, table=True):
     __tablename__ = "attributes"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.ATTRIBUTE)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -323,16 +435,27 @@ class Attribute(SQLModel, table=True):
 # Profile: Represents the profile information of a lead or prospect.
 class Profile(SQLModel, table=True):
     __tablename__ = "profiles"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (Index("ix_profiles_lead_id", "lead_id"),)
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.PROFILE)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -388,18 +511,28 @@ class Profile(SQLModel, table=True):
 # Profile Attribute Mapping: Maps a profile to the dynamic attributes.
 class ProfileAttributeMapping(SQLModel, table=True):
     __tablename__ = "profile_attribute_mappings"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.PROFILE_ATTRIBUTE_MAPPING)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -416,18 +549,53 @@ class ProfileAttributeMapping(SQLModel, table=True):
 # Lead: Represents the details of a lead, can be prospect or suspect.
 class Lead(SQLModel, table=True):
     __tablename__ = "leads"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index(
+            "ix_leads_branch_id_created_at",
+            "branch_id",
+            "created_at",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+        *(
+            Index(
+                f"ix_leads_branch_id_{column}_created_at",
+                "branch_id",
+                column,
+                "created_at",
+                "id",
+                postgresql_where=text("deleted_at IS NULL"),
+            )
+            for column in ("status", "type", "known_to_agent", "created_by_id")
+        ),
+        Index(
+            "ix_leads_branch_id_meeting_date",
+            "branch_id",
+            "meeting_date",
+            postgresql_where=text("deleted_at IS NULL"),
+        ),
+    )
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.LEAD)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -452,18 +620,28 @@ class Lead(SQLModel, table=True):
 # Profile Snapshots: Represents the snapshots of profile data. Keeps a record of the last state of the profile before it was updated.
 class ProfileSnapshot(SQLModel, table=True):
     __tablename__ = "profile_snapshots"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.PROFILE_SNAPSHOT)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -483,21 +661,51 @@ class ProfileSnapshot(SQLModel, table=True):
     )
 
 
+# The columns of `events` extracted from their data
+EVENT_TYPED_COLUMNS = [
+    "lead_id",
+    "status",
+    "lead_type",
+    "call_type",
+    "duration_seconds",
+]
+
+
 # Events: Represents the events that occur within the organization
 class Event(SQLModel, table=True):
     __tablename__ = "events"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        # Covers the typed columns, so the metrics scans are index-only
+        Index(
+            "ix_events_branch_id_name_created_at_include",
+            "branch_id",
+            "name",
+            "created_at",
+            postgresql_include=EVENT_TYPED_COLUMNS,
+        ),
+    )
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.EVENT)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -512,20 +720,72 @@ class Event(SQLModel, table=True):
         foreign_key="organizations.id",
     )
 
+    # Typed copies of the fields of `data` that the metrics filter and aggregate on
+    lead_id: str | None = Field(default=None, index=True)
+    status: str | None = Field(default=None)  # data["status"]
+    lead_type: str | None = Field(default=None)  # data["type"]
+    call_type: str | None = Field(default=None)
+    duration_seconds: int | None = Field(default=None)  # data["duration_ms"]
+
+
+# Event Rollups: Daily aggregates of the events of a branch, kept up to date as events are created.
+class EventRollup(SQLModel, table=True):
+    __tablename__ = "event_rollups"
+
+    branch_id: str = Field(primary_key=True, foreign_key="branches.id")
+    # Local day the events were created on, in METRICS_ROLLUP_TIMEZONE
+    day: date = Field(primary_key=True)
+    name: str = Field(primary_key=True)
+    # Dimensions are empty strings when they don't apply to the event, so they can be part of the key
+    status: str = Field(default="", primary_key=True)
+    lead_type: str = Field(default="", primary_key=True)
+    call_type: str = Field(default="", primary_key=True)
+    # Lead of the funnel events, so that distinct leads can be counted over any days
+    lead_id: str = Field(default="", primary_key=True)
+    organization_id: str = Field(
+        foreign_key="organizations.id",
+    )
+    updated_at: datetime = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
+    )
+
+    event_count: int = Field(default=0)
+    duration_seconds: int = Field(default=0)  # Summed call duration
+
 
 # Call: Represents the history of calls made for a lead.
 class Call(SQLModel, table=True):
     __tablename__ = "calls"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_calls_branch_id_created_at", "branch_id", "created_at"),
+        Index("ix_calls_user_id", "user_id"),
+    )
 
     id: str = Field(primary_key=True)
     object: str = Field(default=ObjectType.CALL)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -559,12 +819,20 @@ class Call(SQLModel, table=True):
         sa_column=Column(
             DateTime(timezone=True),
             nullable=False,
-            default=datetime.now(tz=timezone.utc),
+            server_default=func.clock_timestamp(),
         ),
     )
     agent_id: str = Field(
         foreign_key="agents.id",
     )
+    # Set when Retell reports the end of the call
+    start_timestamp: datetime | None = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    end_timestamp: datetime | None = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    duration_ms: int | None = Field(default=None, sa_type=BigInteger)
     call_metadata: str | None = Field(
         default=None, sa_column=Column(JSON, nullable=False)
     )  # JSON serialized profile data
@@ -581,18 +849,28 @@ class Call(SQLModel, table=True):
 # Prompts: Represents user defined prompts that can be used when initiating a call with a lead.
 class Prompt(SQLModel, table=True):
     __tablename__ = "prompts"
+    __mapper_args__ = {"eager_defaults": True}
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.PROMPT)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -620,18 +898,29 @@ class Prompt(SQLModel, table=True):
 # Agents: Represents the AI agent config for a lead.
 class Agent(SQLModel, table=True):
     __tablename__ = "agents"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (Index("ix_agents_lead_id", "lead_id"),)
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.AGENT)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -653,18 +942,31 @@ class Agent(SQLModel, table=True):
 
 class Invite(SQLModel, table=True):
     __tablename__ = "invites"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_invites_organization_id_branch_id", "organization_id", "branch_id"),
+    )
 
     id: str = Field(
         primary_key=True,
     )
     object: str = Field(default=ObjectType.INVITE)
     created_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
     )
     updated_at: datetime = Field(
-        default=datetime.now(tz=timezone.utc),
-        sa_column=Column(DateTime(timezone=True), nullable=False),
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
     )
     deleted_at: datetime | None = Field(
         default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
@@ -685,6 +987,62 @@ class Invite(SQLModel, table=True):
     organization_name: str = Field(default="")
 
 
+# Report Jobs: Outbox of call reports waiting to be generated by the report workers.
+class ReportJob(SQLModel, table=True):
+    __tablename__ = "report_jobs"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (Index("ix_report_jobs_status_run_after", "status", "run_after"),)
+
+    id: str = Field(
+        primary_key=True,
+    )
+    object: str = Field(default=ObjectType.REPORT_JOB)
+    created_at: datetime = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+        ),
+    )
+    updated_at: datetime = Field(
+        default=None,
+        sa_column=Column(
+            DateTime(timezone=True),
+            nullable=False,
+            server_default=func.clock_timestamp(),
+            onupdate=func.clock_timestamp(),
+        ),
+    )
+    deleted_at: datetime | None = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+    # Not a foreign key: the webhook must accept the payload even if the call is unknown
+    call_id: str = Field(index=True)
+    branch_id: str = Field(foreign_key="branches.id")
+    organization_id: str = Field(
+        foreign_key="organizations.id",
+    )
+    status: ReportJobStatus = Field(default=ReportJobStatus.PENDING)
+    payload: dict = Field(
+        default=None, sa_column=Column(JSONB, nullable=False)
+    )  # Raw Retell webhook payload
+    attempts: int = Field(default=0)
+    max_attempts: int = Field(default=5)
+    run_after: datetime = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=False)
+    )  # Earliest time the job can be picked up (used for retry backoff)
+    locked_at: datetime | None = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+    locked_by: str | None = Field(default=None)
+    last_error: str | None = Field(default=None, sa_column=Column(Text, nullable=True))
+    completed_at: datetime | None = Field(
+        default=None, sa_column=Column(DateTime(timezone=True), nullable=True)
+    )
+
+
 #####################  Internal Pydantic models ######################
 
 
@@ -818,12 +1176,30 @@ class UpdatePromptRequest(BaseModel):
 class Token(BaseModel):
     access_token: str
     token_type: str = "bearer"
+    refresh_token: str | None = None  # Only issued with STATELESS_AUTH
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class TokenType(str, Enum):
+    ACCESS = "access"
+    REFRESH = "refresh"
 
 
 # Contents of JWT token
 class TokenPayload(BaseModel):
     sub: str | None = None
     exp: int | None = None
+    iat: float | None = None
+    type: TokenType | None = None  # None in tokens issued without STATELESS_AUTH
+    # User claims, only trusted in access tokens issued with STATELESS_AUTH
+    organization_id: str | None = None
+    branch_id: str | None = None
+    role: Role | None = None
+    full_name: str | None = None
+    is_active: bool | None = None
 
 
 class DeleteResponse(BaseModel):
@@ -842,6 +1218,28 @@ class CallResponse(BaseModel):
     profile_snapshot: ProfileSnapshot
 
 
+# Call Summary: The columns of a call shown in the call history, without the
+# transcript, report, analytics and profile snapshot.
+class CallSummary(BaseModel):
+    id: str
+    created_at: datetime
+    call_timestamp: datetime
+    user_id: str
+    caller_name: str
+    lead_id: str
+    type: CallType | None
+    duration_ms: int | None
+    performance: str | None
+    has_report: bool
+    lead_name: str | None
+    lead_status: str | None
+
+    @computed_field
+    @property
+    def duration(self) -> str | None:  # M:S
+        return format_duration(self.duration_ms)
+
+
 class CreateBranchInviteRequest(BaseModel):
     email: str
     name: str
@@ -868,6 +1266,33 @@ class ModifyMemberAccessRequest(BaseModel):
     is_active: bool
 
 
+# Report Job Response: A report job without its payload, the raw Retell webhook
+# payload with the transcript of the call.
+class ReportJobResponse(BaseModel):
+    id: str
+    object: str
+    created_at: datetime
+    updated_at: datetime
+    call_id: str
+    branch_id: str
+    organization_id: str
+    status: ReportJobStatus
+    attempts: int
+    max_attempts: int
+    run_after: datetime
+    locked_at: datetime | None
+    locked_by: str | None
+    last_error: str | None
+    completed_at: datetime | None
+
+
+class ReportJobStats(BaseModel):
+    pending: int = 0
+    running: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
 #####################  Instructor models ######################
 
 
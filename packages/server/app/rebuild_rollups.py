@@ -0,0 +1,37 @@
+import argparse
+import logging
+from datetime import date
+
+from sqlmodel import Session
+
+from app.core.db import engine
+from app.services.rollup_service import RollupService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def rebuild(branch_id: str | None = None, since: date | None = None) -> int:
+    with Session(engine) as session:
+        return RollupService(session).rebuild(branch_id=branch_id, since=since)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Rebuild the daily event rollups from the events table."
+    )
+    parser.add_argument("--branch-id", help="Only rebuild the rollups of this branch")
+    parser.add_argument(
+        "--since",
+        type=date.fromisoformat,
+        help="Only rebuild the rollups from this local day onwards (YYYY-MM-DD)",
+    )
+    args = parser.parse_args()
+
+    logger.info("Rebuilding event rollups")
+    rows = rebuild(branch_id=args.branch_id, since=args.since)
+    logger.info(f"Event rollups rebuilt: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,3 @@
-from datetime import datetime, timezone
-
 from sqlmodel import Session, select
 
 from app.models import (
@@ -7,9 +5,10 @@ from app.models import (
     ObjectType,
     get_id,
 )
+from app.services.base_service import BaseService
 
 
-class AgentService:
+class AgentService(BaseService):
     """
     Service class for managing agents.
     """
@@ -51,14 +50,10 @@ class AgentService:
                 "lead_id": lead_id,
                 "retell_llm_id": retell_llm_id,
                 "retell_agent_id": retell_agent_id,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
             update={"id": get_id(ObjectType.AGENT)},
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
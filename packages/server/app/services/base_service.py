@@ -0,0 +1,96 @@
+from collections.abc import Callable
+
+from sqlalchemy import event
+from sqlmodel import Session, SQLModel
+
+from app.core.db import UNIT_OF_WORK
+
+
+class BaseService:
+    """
+    Base class of the services, handling how their writes are committed.
+
+    In a unit of work (the request sessions created by `deps.get_db` with
+    DB_UNIT_OF_WORK), services only flush their writes and the session is
+    committed once, after the route returns, so all the writes of a request are
+    atomic. Otherwise, e.g. in the report workers, each write commits right away.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initializes the service with a database session.
+
+        Args:
+            db (Session): The database session to be used for database operations.
+        """
+        self.db = db
+
+    @property
+    def unit_of_work(self) -> bool:
+        return self.db.info.get(UNIT_OF_WORK, False)
+
+    def _save(self, *objs: SQLModel):
+        """
+        Writes the given objects, and commits them unless in a unit of work.
+
+        The models use `eager_defaults`: their INSERT and UPDATE statements
+        return the columns generated by the database (timestamps), so the
+        objects are complete after the flush without reading them back. They are
+        only reloaded if the session expires them on commit.
+        """
+        self.db.add_all(objs)
+        self.db.flush()
+        if self.unit_of_work:
+            return
+        self.db.commit()
+        if self.db.expire_on_commit:
+            for obj in objs:
+                self.db.refresh(obj)
+
+    def _commit(self):
+        """
+        Commits statements executed by the service, unless in a unit of work.
+        """
+        if self.unit_of_work:
+            self.db.flush()
+        else:
+            self.db.commit()
+
+    def commit(self):
+        """
+        Commits the writes made so far, even in a unit of work, and returns the
+        session's connection to the pool.
+
+        Routes call it before slow external requests (Retell, OpenAI), so the
+        connection doesn't sit idle in a transaction holding row locks while
+        they run. The writes that follow are committed with the rest of the
+        unit of work.
+        """
+        self.db.commit()
+
+    def on_commit(self, func: Callable[[], None]):
+        """
+        Calls `func` once the service's writes are committed: right away outside
+        of a unit of work, when the unit of work commits otherwise. It is not
+        called if the unit of work is rolled back.
+        """
+        if not self.unit_of_work:
+            func()
+            return
+        callbacks = self.db.info.setdefault(_ON_COMMIT, [])
+        if not callbacks:
+            event.listen(self.db, "after_commit", _run_on_commit, once=True)
+            event.listen(self.db, "after_soft_rollback", _clear_on_commit, once=True)
+        callbacks.append(func)
+
+
+_ON_COMMIT = "on_commit"
+
+
+def _run_on_commit(session: Session):
+    for func in session.info.pop(_ON_COMMIT, []):
+        func()
+
+
+def _clear_on_commit(session: Session, previous_transaction):
+    session.info.pop(_ON_COMMIT, None)
@@ -1,16 +1,28 @@
-from datetime import datetime, timezone
+from datetime import datetime
 
-from sqlmodel import Session, desc, select
+from sqlalchemy import cast, literal_column, tuple_
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlmodel import Session, desc, func, select, update
 
 from app.models import (
     Call,
+    CallSummary,
     ObjectType,
     ProfileSnapshot,
     get_id,
 )
+from app.services.base_service import BaseService
 
 
-class CallService:
+def _decode_json(column):
+    """
+    The JSON columns of calls and snapshots hold documents serialized with
+    `json.dumps`, i.e. a JSON string. Returns the decoded document as JSONB.
+    """
+    return cast(column.op("#>>")(literal_column("'{}'")), JSONB)
+
+
+class CallService(BaseService):
     """
     Service class for managing calls.
     """
@@ -65,15 +77,10 @@ class CallService:
                 "agent_id": agent_id,
                 "prompt_id": prompt_id,
                 "call_metadata": call_metadata,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
-                "call_timestamp": datetime.now(tz=timezone.utc),
             },
             update={"id": get_id(ObjectType.CALL)},
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -143,6 +150,69 @@ class CallService:
 
         return self.db.exec(query).all()
 
+    def get_call_summaries(
+        self,
+        branch_id: str,
+        user_id: str = None,
+        cursor: tuple[datetime, str] = None,
+        limit: int = None,
+    ) -> list[CallSummary]:
+        """
+        Retrieve the call history of a branch, newest first. Only the columns shown
+        in the history are read, along with the lead's name and status from the
+        profile snapshot.
+
+        Args:
+            branch_id (str): The ID of the branch.
+            user_id (str, optional): The ID of the user associated with the calls. Defaults to None.
+            cursor (Tuple[datetime, str], optional): The created_at and ID of the last
+                call of the previous page.
+            limit (int, optional): The maximum number of calls to return.
+
+        Returns:
+            List[CallSummary]: A list of call summaries.
+        """
+        where_clause = (
+            Call.branch_id == branch_id,
+            Call.deleted_at == None,  # noqa: E711
+            ProfileSnapshot.deleted_at == None,  # noqa: E711
+        )
+
+        if user_id:
+            where_clause += (Call.user_id == user_id,)
+        if cursor:
+            where_clause += (tuple_(Call.created_at, Call.id) < cursor,)
+
+        snapshot = _decode_json(ProfileSnapshot.data)
+        profile = cast(snapshot["profile"].astext, JSONB)
+        lead = cast(snapshot["lead"].astext, JSONB)
+        report = _decode_json(Call.report)
+
+        query = (
+            select(
+                Call.id,
+                Call.created_at,
+                Call.call_timestamp,
+                Call.user_id,
+                Call.caller_name,
+                Call.lead_id,
+                Call.type,
+                Call.duration_ms,
+                report[("overall_call_metrics", "performance")].astext.label(
+                    "performance"
+                ),
+                report.is_not(None).label("has_report"),
+                profile["full_name"].astext.label("lead_name"),
+                lead["status"].astext.label("lead_status"),
+            )
+            .join(ProfileSnapshot)
+            .where(*where_clause)
+            .order_by(desc(Call.created_at), desc(Call.id))
+            .limit(limit)
+        )
+
+        return [CallSummary.model_validate(row._mapping) for row in self.db.exec(query)]
+
     def update_call(self, call_id: str, call: dict):
         """
         Update a call.
@@ -154,14 +224,28 @@ class CallService:
         Returns:
             bool: True if the call was updated successfully, False otherwise.
         """
-        _call = self.get_call(call_id=call_id)
-        if _call is None:
-            return False
+        result = self.db.exec(
+            update(Call)
+            .where(Call.id == call_id, Call.deleted_at == None)  # noqa: E711
+            .values(**call)
+        )
+        self._commit()
+        return result.rowcount > 0
+
+    def delete_call(self, call_id: str):
+        """
+        Delete a call.
 
-        _call.sqlmodel_update(
-            call, update={"updated_at": datetime.now(tz=timezone.utc)}
+        Args:
+            call_id (str): The ID of the call to delete.
+
+        Returns:
+            bool: True if the call was deleted, False otherwise.
+        """
+        result = self.db.exec(
+            update(Call)
+            .where(Call.id == call_id, Call.deleted_at == None)  # noqa: E711
+            .values(deleted_at=func.clock_timestamp())
         )
-        self.db.add(_call)
-        self.db.commit()
-        self.db.refresh(_call)
-        return True
+        self._commit()
+        return result.rowcount > 0
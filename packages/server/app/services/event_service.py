@@ -1,16 +1,79 @@
-from datetime import datetime, timezone
+import json
+from enum import Enum
+from functools import partial
 
 from sqlmodel import Session, select
 
+from app.core.broker import RESYNC, metrics_broker
+from app.core.cache import metrics_cache
+from app.core.config import settings
+from app.core.notify import EVENT_CREATED, notification_listener, notify
 from app.models import (
     Event,
     EventType,
     ObjectType,
     get_id,
 )
+from app.services.base_service import BaseService
+from app.services.metrics_service import event_metrics_deltas
+from app.services.rollup_service import RollupService
+from app.utils import duration_to_seconds
 
 
-class EventService:
+def _text(value) -> str | None:
+    if isinstance(value, Enum):
+        return value.value
+    return value
+
+
+def _on_event_created(payload: str | None):
+    if payload:
+        message = json.loads(payload)
+        metrics_cache.invalidate(message["branch_id"])
+        metrics_broker.publish(message["branch_id"], ("metrics", message))
+    else:
+        metrics_cache.clear()
+        metrics_broker.publish_all(RESYNC)
+
+
+# Events created by every worker, this one included
+notification_listener.subscribe(EVENT_CREATED, _on_event_created)
+
+
+def _event_message(event: Event) -> dict:
+    """
+    Builds the message streamed to the dashboards of the event's branch.
+    """
+    return {
+        "branch_id": event.branch_id,
+        "event_id": event.id,
+        "name": _text(event.name),
+        "created_at": event.created_at.isoformat(),
+        **event_metrics_deltas(event),
+    }
+
+
+def _typed_columns(data: dict) -> dict:
+    """
+    Extracts the typed columns of an event from its data.
+    """
+    duration_ms = data.get("duration_ms")
+    if duration_ms is not None:
+        duration_seconds = duration_ms // 1000
+    elif data.get("duration") is not None:
+        duration_seconds = duration_to_seconds(data["duration"])
+    else:
+        duration_seconds = None
+    return {
+        "lead_id": _text(data.get("lead_id")),
+        "status": _text(data.get("status")),
+        "lead_type": _text(data.get("type")),
+        "call_type": _text(data.get("call_type")),
+        "duration_seconds": duration_seconds,
+    }
+
+
+class EventService(BaseService):
     """
     Service class for managing events.
     """
@@ -26,7 +89,9 @@ class EventService:
         org_id: str,
     ):
         """
-        Creates a new event and saves it to the database.
+        Creates a new event and saves it to the database, along with its daily rollup.
+        Once it is committed, the cached metrics of the branch are invalidated and
+        its metrics deltas are streamed to the dashboards of the branch.
 
         Args:
             name (EventType): The type of the event.
@@ -43,14 +108,23 @@ class EventService:
                 "branch_id": branch_id,
                 "name": name,
                 "data": data,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
+                **_typed_columns(data or {}),
             },
             update={"id": get_id(ObjectType.EVENT)},
         )
         self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        # The rollup's day is the event's creation time, set by the database
+        self.db.flush()
+        RollupService(self.db).record_event(db_obj)
+        message = _event_message(db_obj)
+        notify(self.db, EVENT_CREATED, json.dumps(message))
+        self._save(db_obj)
+        self.on_commit(partial(metrics_cache.invalidate, branch_id))
+        if not settings.PG_NOTIFY_ENABLED:
+            # Otherwise the notification is relayed to this worker's streams too
+            self.on_commit(
+                partial(metrics_broker.publish, branch_id, ("metrics", message))
+            )
 
         return db_obj
 
@@ -1,19 +1,22 @@
 import json
-from datetime import datetime, timezone
+from datetime import datetime
 
-from sqlmodel import Session, desc, select
+from sqlalchemy import func, tuple_
+from sqlmodel import Session, desc, select, update
 
 from app.models import (
     Lead,
+    LeadStatus,
     LeadType,
     ObjectType,
     Profile,
     ProfileSnapshot,
     get_id,
 )
+from app.services.base_service import BaseService
 
 
-class LeadService:
+class LeadService(BaseService):
     """
     Service class for managing leads.
     """
@@ -55,14 +58,10 @@ class LeadService:
                 "type": type,
                 "created_by_id": created_by_id,
                 "created_by_name": created_by_name,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
             update={"id": get_id(ObjectType.LEAD)},
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -86,26 +85,44 @@ class LeadService:
                 "lead_id": lead_id,
                 "branch_id": branch_id,
                 "organization_id": org_id,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
-    def get_leads(self, branch_id: str, created_by_id: str = None):
+    def get_leads(
+        self,
+        branch_id: str,
+        created_by_id: str = None,
+        status: LeadStatus = None,
+        type: LeadType = None,
+        known_to_agent: str = None,
+        meeting_date_from: datetime = None,
+        meeting_date_to: datetime = None,
+        cursor: tuple[datetime, str] = None,
+        limit: int = None,
+    ):
         """
-        Retrieves all the leads for a given branch.
+        Retrieves the leads for a given branch, newest first.
+
+        Leads are ordered by (created_at, id), so a page can be continued from the
+        last lead of the previous one without the cost of an OFFSET.
 
         Args:
             branch_id (str): The ID of the branch to retrieve the leads for.
             created_by_id (str): The ID of the user to filter the leads by.
+            status (LeadStatus, optional): The lead status to filter by.
+            type (LeadType, optional): The lead type to filter by.
+            known_to_agent (str, optional): The referral type to filter by.
+            meeting_date_from (datetime, optional): The earliest meeting date to include.
+            meeting_date_to (datetime, optional): The latest meeting date to include.
+            cursor (Tuple[datetime, str], optional): The created_at and ID of the last
+                lead of the previous page.
+            limit (int, optional): The maximum number of leads to return.
 
         Returns:
-            List[Lead]: A list of lead objects.
+            List[Tuple[Profile, Lead]]: A list of profile and lead objects.
         """
         where_clause = (
             Lead.deleted_at == None,
@@ -115,12 +132,25 @@ class LeadService:
 
         if created_by_id:
             where_clause += (Lead.created_by_id == created_by_id,)
+        if status:
+            where_clause += (Lead.status == status,)
+        if type:
+            where_clause += (Lead.type == type,)
+        if known_to_agent:
+            where_clause += (Lead.known_to_agent == known_to_agent,)
+        if meeting_date_from:
+            where_clause += (Lead.meeting_date >= meeting_date_from,)
+        if meeting_date_to:
+            where_clause += (Lead.meeting_date <= meeting_date_to,)
+        if cursor:
+            where_clause += (tuple_(Lead.created_at, Lead.id) < cursor,)
 
         query = (
             select(Profile, Lead)
             .join(Lead)
             .where(*where_clause)
-            .order_by(desc(Lead.created_at))
+            .order_by(desc(Lead.created_at), desc(Lead.id))
+            .limit(limit)
         )
 
         return self.db.exec(query).all()
@@ -161,10 +191,7 @@ class LeadService:
         Returns:
             Tuple[Lead, Profile]: The updated lead and profile objects.
         """
-        self.db.add_all([lead, profile])
-        self.db.commit()
-        self.db.refresh(lead)
-        self.db.refresh(profile)
+        self._save(lead, profile)
         return lead, profile
 
     def delete_lead(self, lead_id: str, created_by_id: str = None):
@@ -178,23 +205,35 @@ class LeadService:
         Returns:
             bool: True if the lead was successfully deleted, False otherwise.
         """
-        try:
-            if created_by_id:
-                profile, lead = self.get_lead(lead_id, created_by_id=created_by_id)
-            else:
-                profile, lead = self.get_lead(lead_id)
-
-            if profile and lead:
-                lead.sqlmodel_update({"deleted_at": datetime.now(tz=timezone.utc)})
-                profile.sqlmodel_update({"deleted_at": datetime.now(tz=timezone.utc)})
-                self.db.add_all([lead, profile])
-                self.db.commit()
-                self.db.refresh(lead)
-                self.db.refresh(profile)
-                return True
-        except Exception as e:
-            print(f"Error deleting lead: {e}")
-            return False
+        where_clause = (Lead.deleted_at == None, Lead.id == lead_id)  # noqa: E711
+
+        if created_by_id:
+            where_clause += (Lead.created_by_id == created_by_id,)
+
+        # Deletes the lead and its profile in one statement
+        leads = (
+            update(Lead)
+            .where(*where_clause)
+            .values(deleted_at=func.clock_timestamp())
+            .returning(Lead.id)
+            .cte("deleted_leads")
+        )
+        profiles = (
+            update(Profile)
+            .where(
+                Profile.lead_id.in_(select(leads.c.id)),
+                Profile.deleted_at == None,  # noqa: E711
+            )
+            .values(deleted_at=func.clock_timestamp())
+            .returning(Profile.id)
+            .cte("deleted_profiles")
+        )
+        # The profile's rowcount says nothing of the lead, e.g. if it has none
+        deleted = self.db.exec(
+            select(func.count()).select_from(leads).add_cte(profiles)
+        ).one()
+        self._commit()
+        return deleted > 0
 
     def create_profile_snapshot(
         self, lead_id: str, profile: Profile = None, lead: Lead = None
@@ -222,14 +261,10 @@ class LeadService:
                 "branch_id": profile.branch_id,
                 "organization_id": profile.organization_id,
                 "data": data,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
             update={"id": get_id(ObjectType.PROFILE_SNAPSHOT)},
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
         return db_obj
 
     def get_profile_snapshot(self, profile_snapshot_id: str):
@@ -1,130 +1,583 @@
-from datetime import datetime
+import inspect
+from collections.abc import Callable
+from datetime import date, datetime, time, timedelta
+from functools import partial, wraps
+from itertools import groupby
+from typing import Any
+from zoneinfo import ZoneInfo
 
-import pytz
-from sqlalchemy import text
-from sqlmodel import Session
+from sqlalchemy import (
+    DateTime,
+    Select,
+    and_,
+    cast,
+    distinct,
+    func,
+    literal,
+    literal_column,
+    null,
+    true,
+    union_all,
+)
+from sqlmodel import Session, select
+
+from app.core.cache import metrics_cache
+from app.core.config import settings
+from app.models import (
+    Branch,
+    CallType,
+    Event,
+    EventRollup,
+    EventType,
+    Granularity,
+    LeadStatus,
+    LeadType,
+)
+
+# Response keys of the funnel stages, one per lead status
+FUNNEL_STAGE_KEYS = {
+    LeadStatus.YET_TO_CONTACT: "lead_status_yet_to_contact",
+    LeadStatus.CONTACT_DROPPED: "lead_status_contacted_dropped",
+    LeadStatus.FIRST_MEETING_SCHEDULED: "first_meeting_scheduled",
+    LeadStatus.FIRST_MEETING_COMPLETED: "first_meeting_completed",
+    LeadStatus.SECOND_MEETING_SCHEDULED: "second_meeting_scheduled",
+    LeadStatus.CALL_CLOSED: "call_closed",
+}
+
+FUNNEL_EVENTS = [EventType.LEAD_CREATED.value, EventType.LEAD_STATUS_UPDATED.value]
+CALL_EVENTS = [EventType.CALL_STARTED.value, EventType.CALL_ENDED.value]
+
+# The metrics of a period without events
+EMPTY_FUNNEL_METRICS = dict.fromkeys(
+    ["lead_created_suspect", *FUNNEL_STAGE_KEYS.values()], 0
+)
+EMPTY_CALL_METRICS = {
+    "event_count_call_started": 0,
+    "event_count_appointment_call": 0,
+    "event_count_meeting_call": 0,
+    "duration_sum": None,
+}
+
+# Values of the period column of the queries comparing two periods
+CURRENT_PERIOD = "current"
+PREVIOUS_PERIOD = "previous"
+
+# Step between the buckets of each graph granularity
+GRAPH_STEPS = {
+    Granularity.HOUR: "1 hour",
+    Granularity.DAY: "1 day",
+    Granularity.WEEK: "1 week",
+    Granularity.MONTH: "1 month",
+    Granularity.QUARTER: "3 months",
+    Granularity.YEAR: "1 year",
+}
+
+# Graph granularities that can be served from the daily rollups
+ROLLUP_GRANULARITIES = set(GRAPH_STEPS) - {Granularity.HOUR}
+
+# Length of the graph buckets of a fixed length
+BUCKET_LENGTHS = {
+    Granularity.HOUR: timedelta(hours=1),
+    Granularity.DAY: timedelta(days=1),
+    Granularity.WEEK: timedelta(weeks=1),
+}
+
+
+def event_metrics_deltas(event: Event) -> dict:
+    """
+    Returns how an event changes the funnel and call metrics of its branch, as
+    returned by `MetricsService.get_funnel_metrics` and `get_call_metrics`.
+
+    Funnel stages count distinct leads, so a lead entering a stage it already
+    reached in the period is counted again: the deltas keep dashboards live
+    between reloads, which correct them.
+
+    Args:
+        event (Event): The created event.
+
+    Returns:
+        dict: The increments of the funnel and call metrics changed by the event.
+    """
+    funnel, call = {}, {}
+    if event.name == EventType.LEAD_CREATED.value:
+        if event.lead_type == LeadType.SUSPECT.value:
+            funnel["lead_created_suspect"] = 1
+    elif event.name == EventType.LEAD_STATUS_UPDATED.value:
+        if event.status in FUNNEL_STAGE_KEYS:
+            funnel[FUNNEL_STAGE_KEYS[event.status]] = 1
+    elif event.name == EventType.CALL_STARTED.value:
+        call["event_count_call_started"] = 1
+        if event.call_type == CallType.APPOINTMENT_CALL.value:
+            call["event_count_appointment_call"] = 1
+        elif event.call_type == CallType.MEETING_CALL.value:
+            call["event_count_meeting_call"] = 1
+    elif event.name == EventType.CALL_ENDED.value:
+        if event.duration_seconds is not None:
+            call["duration_sum"] = event.duration_seconds / 60.0
+    return {"funnel_metrics": funnel, "call_metrics": call}
+
+
+def graph_bucket_count(
+    start_date: datetime, end_date: datetime, granularity: Granularity, tz: str
+) -> int:
+    """
+    Returns the number of buckets of the series of a call graph, or a bound
+    within one of it, without generating them.
+
+    Args:
+        start_date (datetime): The start of the range.
+        end_date (datetime): The end of the range.
+        granularity (Granularity): The size of the buckets.
+        tz (str): The IANA time zone of the buckets.
+
+    Returns:
+        int: The number of buckets.
+    """
+    zone = ZoneInfo(tz)
+    start, end = start_date.astimezone(zone), end_date.astimezone(zone)
+    if end < start:
+        return 0
+    if granularity in BUCKET_LENGTHS:
+        # The range may start and end within a bucket
+        return (end - start) // BUCKET_LENGTHS[granularity] + 2
+    # Months since year 0, so that quarters are 3 of them
+    first_month = start.year * 12 + start.month - 1
+    last_month = end.year * 12 + end.month - 1
+    if granularity == Granularity.MONTH:
+        return last_month - first_month + 1
+    if granularity == Granularity.QUARTER:
+        return last_month // 3 - first_month // 3 + 1
+    return end.year - start.year + 1
+
+
+def rollup_midnight(day: date) -> datetime:
+    """
+    Returns the start of a day of the rollups, in METRICS_ROLLUP_TIMEZONE.
+    """
+    return datetime.combine(
+        day, time.min, tzinfo=ZoneInfo(settings.METRICS_ROLLUP_TIMEZONE)
+    )
+
+
+def rollup_days(
+    start: datetime, end: datetime
+) -> tuple[tuple[date, date] | None, list[tuple[datetime, datetime]]]:
+    """
+    Splits a range into the whole days of the rollups it covers, and the parts
+    of days around them, which are computed from the events.
+
+    Args:
+        start (datetime): The start of the range.
+        end (datetime): The end of the range, excluded.
+
+    Returns:
+        tuple: The first and last whole days, or None if the range has none, and
+        the ranges of the parts of days, the end excluded.
+    """
+    zone = ZoneInfo(settings.METRICS_ROLLUP_TIMEZONE)
+    first_day = start.astimezone(zone).date()
+    if rollup_midnight(first_day) < start:
+        first_day += timedelta(days=1)
+    # The end's day is partial, or empty if the range ends at midnight
+    last_day = end.astimezone(zone).date() - timedelta(days=1)
+    if last_day < first_day:
+        return None, [(start, end)] if start < end else []
+
+    edges = [
+        (start, rollup_midnight(first_day)),
+        (rollup_midnight(last_day + timedelta(days=1)), end),
+    ]
+    return (first_day, last_day), [(a, b) for a, b in edges if a < b]
+
+
+def _cached(method: Callable) -> Callable:
+    """
+    Serves the metrics computed by `method` from the metrics cache, keyed by
+    the method and its arguments. The ranges are compared as instants, so the
+    same range in different time zones shares an entry.
+    """
+    signature = inspect.signature(method)
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        arguments = signature.bind(self, *args, **kwargs)
+        arguments.apply_defaults()
+        params = {k: v for k, v in arguments.arguments.items() if k != "self"}
+        return metrics_cache.get_or_compute(
+            params["branch_id"],
+            (method.__name__, *params.items()),
+            partial(method, self, *args, **kwargs),
+        )
+
+    return wrapper
 
 
 class MetricsService:
     """
     Service class for managing metrics.
+
+    The metrics served to the dashboards are cached per branch until an event
+    of the branch is created, see `EventService.create_event`.
     """
 
     def __init__(self, db: Session):
         self.db = db
 
-    def get_funnel_metrics(
-        self, start_date: datetime, end_date: datetime, branch_id: str
+    def _source(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        branch_id: str | Select,
+        names: list[str],
+        with_previous: bool = False,
+        graph: tuple[Granularity, str] | None = None,
+        metrics: bool = True,
     ):
-        query = text(
-            """
-            SELECT
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_created' 
-                AND data->>'type' = 'suspect' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_lead_created_suspect,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = 'Yet to Contact' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_lead_status_yet_to_contact,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = 'Contacted & Dropped' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_lead_status_contacted_dropped,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = '1st Meeting Scheduled' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_1st_meeting_scheduled,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = '1st Meeting Completed' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_1st_meeting_completed,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = '2nd Meeting Scheduled' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_2nd_meeting_scheduled,
-
-                (SELECT COUNT(DISTINCT data->>'lead_id') FROM events 
-                WHERE name = 'lead_status_updated' 
-                AND data->>'status' = 'Call Closed' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_call_closed
-            """
+        """
+        Builds the rows the metrics of a range are aggregated from: the daily
+        rollups of the whole local days of the range, and the events of the
+        parts of days around them, e.g. when the range ends now. Rollup rows
+        stand for `event_count` events, event rows for one.
+
+        With `with_previous`, the rows of the previous period of the same length,
+        which ends where the current one starts, are included, with a `period`
+        column: CURRENT_PERIOD or PREVIOUS_PERIOD.
+
+        With a `graph`, the rows have the `bucket` of the graph they fall in,
+        NULL for the previous period. The rollups are only used for the buckets
+        if they are made of their days: otherwise, the graph is computed from
+        the events of the current period, and with `metrics`, the `counted`
+        column tells the rows the other metrics are computed from.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            branch_id (str | Select): The ID of the branch, or a query of the IDs
+                of the branches.
+            names (list[str]): The names of the events aggregated.
+            with_previous (bool, optional): Whether to add the previous period.
+            graph (tuple[Granularity, str], optional): The granularity and IANA
+                time zone of the graph buckets.
+            metrics (bool, optional): Whether metrics other than the graph are
+                aggregated from the rows.
+
+        Returns:
+            The subquery.
+        """
+        # The ranges below exclude their end
+        end = end_date + timedelta(microseconds=1)
+        periods = {CURRENT_PERIOD: (start_date, end)}
+        if with_previous:
+            periods[PREVIOUS_PERIOD] = (start_date - (end - start_date), start_date)
+
+        graph_days = graph is not None and (
+            graph[0] in ROLLUP_GRANULARITIES
+            and graph[1] == settings.METRICS_ROLLUP_TIMEZONE
         )
+        use_rollups = settings.METRICS_USE_ROLLUPS and (metrics or graph_days)
+        # (period, first day, last day) of the rollups and (period, start, end,
+        # counted) of the events
+        days, ranges = [], []
+        for period, (start, stop) in periods.items():
+            if not use_rollups:
+                ranges.append((period, start, stop, True))
+                continue
+            period_days, edges = rollup_days(start, stop)
+            ranges += [(period, *edge, True) for edge in edges]
+            if period_days is None:
+                continue
+            days.append((period, *period_days))
+            if graph is not None and not graph_days and period == CURRENT_PERIOD:
+                first_day, last_day = period_days
+                ranges.append(
+                    (
+                        period,
+                        rollup_midnight(first_day),
+                        rollup_midnight(last_day + timedelta(days=1)),
+                        False,
+                    )
+                )
 
-        params = {
-            "branch_id": branch_id,
-            "start_date": start_date,
-            "end_date": end_date,
-        }
+        def where(table) -> list:
+            if isinstance(branch_id, str):
+                return [table.branch_id == branch_id, table.name.in_(names)]
+            return [table.branch_id.in_(branch_id), table.name.in_(names)]
 
-        result = self.db.exec(query, params=params).one()
+        # A query per range, so each one is an index range scan
+        queries = []
+        for period, start, stop, counted in ranges:
+            columns = [
+                Event.branch_id,
+                Event.name,
+                Event.status,
+                Event.lead_type,
+                Event.call_type,
+                Event.lead_id,
+                literal(1).label("event_count"),
+                Event.duration_seconds,
+            ]
+            if with_previous:
+                columns.append(literal(period).label("period"))
+            if graph is not None:
+                bucket = func.date_trunc(
+                    graph[0].value, func.timezone(graph[1], Event.created_at)
+                )
+                if period != CURRENT_PERIOD:
+                    bucket = null()
+                columns += [
+                    cast(bucket, DateTime).label("bucket"),
+                    literal(counted).label("counted"),
+                ]
+            queries.append(
+                select(*columns).where(
+                    *where(Event),
+                    Event.created_at >= start,
+                    Event.created_at < stop,
+                )
+            )
 
-        return {
-            "lead_created_suspect": result.event_count_lead_created_suspect,
-            "lead_status_yet_to_contact": result.event_count_lead_status_yet_to_contact,
-            "lead_status_contacted_dropped": result.event_count_lead_status_contacted_dropped,
-            "first_meeting_scheduled": result.event_count_1st_meeting_scheduled,
-            "first_meeting_completed": result.event_count_1st_meeting_completed,
-            "second_meeting_scheduled": result.event_count_2nd_meeting_scheduled,
-            "call_closed": result.event_count_call_closed,
-        }
+        for period, first_day, last_day in days:
+            columns = [
+                EventRollup.branch_id,
+                EventRollup.name,
+                func.nullif(EventRollup.status, "").label("status"),
+                func.nullif(EventRollup.lead_type, "").label("lead_type"),
+                func.nullif(EventRollup.call_type, "").label("call_type"),
+                func.nullif(EventRollup.lead_id, "").label("lead_id"),
+                EventRollup.event_count,
+                EventRollup.duration_seconds,
+            ]
+            if with_previous:
+                columns.append(literal(period).label("period"))
+            if graph is not None:
+                bucket = null()
+                if graph_days and period == CURRENT_PERIOD:
+                    bucket = func.date_trunc(
+                        graph[0].value, cast(EventRollup.day, DateTime)
+                    )
+                columns += [
+                    cast(bucket, DateTime).label("bucket"),
+                    true().label("counted"),
+                ]
+            queries.append(
+                select(*columns).where(
+                    *where(EventRollup), EventRollup.day.between(first_day, last_day)
+                )
+            )
 
-    def get_call_metrics(
-        self, start_date: datetime, end_date: datetime, branch_id: str
+        if len(queries) == 1:
+            return queries[0].subquery("source")
+        return union_all(*queries).subquery("source")
+
+    def _counted(self, source) -> tuple:
+        # The rows the metrics other than the graph are computed from
+        if "counted" in source.c:
+            return (source.c.counted,)
+        return ()
+
+    def _funnel_columns(self, source) -> list:
+        """
+        Builds one `COUNT(DISTINCT lead_id) FILTER (...)` aggregate per funnel
+        stage, so every stage is computed in the same pass over the rows of
+        `_source`.
+
+        Returns:
+            list: The labeled aggregate columns.
+        """
+        leads = func.count(distinct(source.c.lead_id))
+        counted = self._counted(source)
+        columns = [
+            leads.filter(
+                *counted,
+                source.c.name == EventType.LEAD_CREATED.value,
+                source.c.lead_type == LeadType.SUSPECT.value,
+            ).label("lead_created_suspect")
+        ]
+        for status in LeadStatus:
+            columns.append(
+                leads.filter(
+                    *counted,
+                    source.c.name == EventType.LEAD_STATUS_UPDATED.value,
+                    source.c.status == status.value,
+                ).label(FUNNEL_STAGE_KEYS[status])
+            )
+        return columns
+
+    def _call_columns(self, source) -> list:
+        """
+        Builds the call metrics aggregates, computed in one pass over the rows of
+        `_source`.
+
+        Returns:
+            list: The labeled aggregate columns.
+        """
+        calls = func.sum(source.c.event_count)
+        counted = self._counted(source)
+        started = source.c.name == EventType.CALL_STARTED.value
+        return [
+            func.coalesce(calls.filter(*counted, started), 0).label(
+                "event_count_call_started"
+            ),
+            func.coalesce(
+                calls.filter(
+                    *counted,
+                    started,
+                    source.c.call_type == CallType.APPOINTMENT_CALL.value,
+                ),
+                0,
+            ).label("event_count_appointment_call"),
+            func.coalesce(
+                calls.filter(
+                    *counted,
+                    started,
+                    source.c.call_type == CallType.MEETING_CALL.value,
+                ),
+                0,
+            ).label("event_count_meeting_call"),
+            (
+                func.sum(source.c.duration_seconds).filter(
+                    *counted, source.c.name == EventType.CALL_ENDED.value
+                )
+                / 60.0
+            ).label("duration_sum"),
+        ]
+
+    def _graph_columns(self, source) -> list:
+        """
+        Builds the aggregates of the call graph buckets over the rows of
+        `_source`.
+
+        Returns:
+            list: The labeled aggregate columns.
+        """
+        return [
+            func.sum(source.c.event_count)
+            .filter(source.c.name == EventType.CALL_STARTED.value)
+            .label("call_count"),
+            (
+                func.sum(source.c.duration_seconds).filter(
+                    source.c.name == EventType.CALL_ENDED.value
+                )
+                / 60.0
+            ).label("total_duration_minutes"),
+        ]
+
+    def _metrics_query(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        branch_id: str | Select,
+        names: list[str],
+        columns: Callable[[Any], list],
+        with_previous: bool = False,
     ):
-        query = text(
-            """
-            SELECT
-                (SELECT COUNT(*) FROM events 
-                WHERE name = 'call_started' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_call_started,
-
-                (SELECT COUNT(*) FROM events 
-                WHERE name = 'call_started' 
-                AND data->>'call_type' = 'appointment_call' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_appointment_call,
-
-                (SELECT COUNT(*) FROM events 
-                WHERE name = 'call_started' 
-                AND data->>'call_type' = 'meeting_call' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS event_count_meeting_call,
-
-                (SELECT SUM(EXTRACT('epoch' FROM cast(data->>'duration' AS INTERVAL)) / 60) FROM events 
-                WHERE name = 'call_ended' 
-                AND branch_id = :branch_id 
-                AND created_at BETWEEN :start_date AND :end_date) AS duration_sum
-            """
+        """
+        Builds the query of metrics over the events of a branch, answered from
+        the daily rollups for the whole days of the range, see `_source`.
+
+        Given a query of branch IDs instead of a branch ID, the metrics are
+        grouped by branch, in the same scan, with a row per branch and a total
+        row whose `branch_id` is NULL.
+
+        With `with_previous`, the previous period of the same length, which ends
+        where the current one starts, is aggregated in the same scan: the rows
+        are grouped by a `period` column, CURRENT_PERIOD or PREVIOUS_PERIOD.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            branch_id (str | Select): The ID of the branch, or a query of the IDs
+                of the branches.
+            names (list[str]): The names of the events aggregated.
+            columns (Callable[[Any], list]): Builds the aggregates over the rows
+                of `_source`.
+            with_previous (bool, optional): Whether to group by period.
+
+        Returns:
+            The query.
+        """
+        source = self._source(start_date, end_date, branch_id, names, with_previous)
+        if isinstance(branch_id, str):
+            query = select(*columns(source)).select_from(source)
+        else:
+            # Every branch gets a row, even without events, and the total row
+            # added by the rollup has a NULL branch_id
+            branches = branch_id.subquery("branches")
+            query = (
+                select(branches.c.id.label("branch_id"), *columns(source))
+                .select_from(
+                    branches.outerjoin(source, source.c.branch_id == branches.c.id)
+                )
+                .group_by(func.rollup(branches.c.id))
+                .order_by(branches.c.id)
+            )
+
+        if with_previous:
+            query = query.add_columns(source.c.period).group_by(source.c.period)
+        return query
+
+    def _get_periods(self, query, empty: dict) -> tuple[dict, dict]:
+        """
+        Runs a metrics query grouped by period.
+
+        Args:
+            query: The query built by `_metrics_query` with `with_previous`.
+            empty (dict): The metrics of a period without events.
+
+        Returns:
+            tuple[dict, dict]: The metrics of the current and previous periods.
+        """
+        periods = {CURRENT_PERIOD: dict(empty), PREVIOUS_PERIOD: dict(empty)}
+        for row in self.db.exec(query):
+            metrics = dict(row._mapping)
+            periods[metrics.pop("period")] = metrics
+        return periods[CURRENT_PERIOD], periods[PREVIOUS_PERIOD]
+
+    def _funnel_query(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        branch_id: str | Select,
+        with_previous: bool = False,
+    ):
+        return self._metrics_query(
+            start_date,
+            end_date,
+            branch_id,
+            names=FUNNEL_EVENTS,
+            columns=self._funnel_columns,
+            with_previous=with_previous,
         )
 
-        params = {
-            "branch_id": branch_id,
-            "start_date": start_date,
-            "end_date": end_date,
-        }
+    def _call_query(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        branch_id: str | Select,
+        with_previous: bool = False,
+    ):
+        return self._metrics_query(
+            start_date,
+            end_date,
+            branch_id,
+            names=CALL_EVENTS,
+            columns=self._call_columns,
+            with_previous=with_previous,
+        )
 
-        result = self.db.exec(query, params=params).one()
+    @_cached
+    def get_funnel_metrics(
+        self, start_date: datetime, end_date: datetime, branch_id: str
+    ):
+        query = self._funnel_query(start_date, end_date, branch_id)
+        return dict(self.db.exec(query).one()._mapping)
 
-        return {
-            "event_count_call_started": result.event_count_call_started,
-            "event_count_appointment_call": result.event_count_appointment_call,
-            "event_count_meeting_call": result.event_count_meeting_call,
-            "duration_sum": result.duration_sum,
-        }
+    @_cached
+    def get_call_metrics(
+        self, start_date: datetime, end_date: datetime, branch_id: str
+    ):
+        query = self._call_query(start_date, end_date, branch_id)
+        return dict(self.db.exec(query).one()._mapping)
 
     def calculate_trend_percentage(
         self, current_count: int, previous_count: int
@@ -136,104 +589,452 @@ class MetricsService:
         else:
             return ((current_count - previous_count) / previous_count) * 100
 
+    def _trends(self, current: dict, previous: dict) -> dict:
+        return {
+            key: self.calculate_trend_percentage(current[key], previous[key])
+            for key in current
+        }
+
+    @_cached
     def get_funnel_metrics_with_trends(
         self, start_date: datetime, end_date: datetime, branch_id: str
     ):
-        # Calculate the previous period
-        period_delta = end_date - start_date
-        previous_start_date = start_date - period_delta
-        previous_end_date = end_date - period_delta
-
-        # Fetch current and previous metrics
-        current_funnel_metrics = self.get_funnel_metrics(
-            start_date, end_date, branch_id
-        )
-        previous_funnel_metrics = self.get_funnel_metrics(
-            previous_start_date, previous_end_date, branch_id
-        )
-
-        # Calculate trends for funnel metrics
-        funnel_trends = {
-            key: self.calculate_trend_percentage(
-                current_funnel_metrics[key], previous_funnel_metrics[key]
-            )
-            for key in current_funnel_metrics
-        }
+        """
+        Computes the funnel metrics of a period and of the previous period of
+        the same length, in one query, and their trends.
 
+        Returns:
+            dict: The trend percentages, and the metrics of both periods.
+        """
+        current, previous = self._get_periods(
+            self._funnel_query(start_date, end_date, branch_id, with_previous=True),
+            EMPTY_FUNNEL_METRICS,
+        )
         return {
-            "funnel_trends": funnel_trends,
+            "funnel_trends": self._trends(current, previous),
+            "funnel_metrics": current,
+            "previous_funnel_metrics": previous,
         }
 
+    @_cached
     def get_call_metrics_with_trends(
         self, start_date: datetime, end_date: datetime, branch_id: str
     ):
-        # Calculate the previous period
-        period_delta = end_date - start_date
-        previous_start_date = start_date - period_delta
-        previous_end_date = end_date - period_delta
-
-        current_call_metrics = self.get_call_metrics(start_date, end_date, branch_id)
-        previous_call_metrics = self.get_call_metrics(
-            previous_start_date, previous_end_date, branch_id
-        )
-
-        # Calculate trends for call metrics
-        call_trends = {
-            key: self.calculate_trend_percentage(
-                current_call_metrics[key], previous_call_metrics[key]
-            )
-            for key in current_call_metrics
-        }
+        """
+        Computes the call metrics of a period and of the previous period of the
+        same length, in one query, and their trends.
 
+        Returns:
+            dict: The trend percentages, and the metrics of both periods.
+        """
+        current, previous = self._get_periods(
+            self._call_query(start_date, end_date, branch_id, with_previous=True),
+            EMPTY_CALL_METRICS,
+        )
         return {
-            "call_trends": call_trends,
+            "call_trends": self._trends(current, previous),
+            "call_metrics": current,
+            "previous_call_metrics": previous,
         }
 
+    @_cached
     def get_call_graph_metrics(
-        self, start_date: datetime, end_date: datetime, granularity: str, branch_id: str
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity,
+        branch_id: str,
+        tz: str = "UTC",
     ):
-        start_date_str = start_date.replace(tzinfo=pytz.utc).isoformat()
-        end_date_str = end_date.replace(tzinfo=pytz.utc).isoformat()
-
-        query_call_count = """
-            SELECT DATE_TRUNC(:granularity, created_at) AS event_date,
-                COUNT(*) AS call_count
-            FROM events
-            WHERE name = 'call_started'
-            AND branch_id = :branch_id
-            AND created_at BETWEEN :start_date AND :end_date
-            GROUP BY DATE_TRUNC(:granularity, created_at)
-            ORDER BY DATE_TRUNC(:granularity, created_at)
-        """
-
-        query_total_duration_minutes = """
-            SELECT DATE_TRUNC(:granularity, created_at) AS event_date,
-                SUM(EXTRACT('epoch' FROM cast(data->>'duration' AS INTERVAL)) / 60) AS total_duration_minutes
-            FROM events
-            WHERE name = 'call_ended'
-            AND branch_id = :branch_id
-            AND created_at BETWEEN :start_date AND :end_date
-            GROUP BY DATE_TRUNC(:granularity, created_at)
-            ORDER BY DATE_TRUNC(:granularity, created_at)
-        """
-
-        params = {
-            "start_date": start_date_str,
-            "end_date": end_date_str,
-            "branch_id": branch_id,
-            "granularity": granularity,
-        }
+        """
+        Computes the calls and their total duration per time bucket.
+
+        The buckets are generated by the database for the whole range, so the
+        series is dense: buckets without calls are zeros. They start at the
+        boundaries of the granularity in the given time zone, e.g. at midnight
+        IST for days in Asia/Kolkata.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            granularity (Granularity): The size of the buckets.
+            branch_id (str): The ID of the branch.
+            tz (str, optional): The IANA time zone of the buckets.
 
-        result_call_count = [
-            dict(zip(row._fields, row))
-            for row in self.db.exec(text(query_call_count), params=params)
+        Returns:
+            dict: The series, with both measures of each bucket side by side, and
+            the series of each measure.
+        """
+        query = self._graph_query(start_date, end_date, granularity, branch_id, tz)
+        return self._graph(self.db.exec(query), ZoneInfo(tz))
+
+    def _graph_query(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity,
+        branch_id: str | Select,
+        tz: str,
+    ):
+        """
+        Builds the query of the call graph of `get_call_graph_metrics`.
+
+        Given a query of branch IDs instead of a branch ID, the buckets are
+        grouped by branch, in the same scan, with a dense series per branch and
+        a total series whose `branch_id` is NULL, ordered by branch and bucket.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            granularity (Granularity): The size of the buckets.
+            branch_id (str | Select): The ID of the branch, or a query of the IDs
+                of the branches.
+            tz (str): The IANA time zone of the buckets.
+
+        Returns:
+            The query.
+        """
+        source = self._source(
+            start_date,
+            end_date,
+            branch_id,
+            CALL_EVENTS,
+            graph=(granularity, tz),
+            metrics=False,
+        )
+        totals = select(source.c.bucket, *self._graph_columns(source))
+        if isinstance(branch_id, str):
+            totals = totals.group_by(source.c.bucket)
+        else:
+            totals = totals.add_columns(source.c.branch_id).group_by(
+                source.c.bucket, func.rollup(source.c.branch_id)
+            )
+        return self._dense_graph(
+            totals.subquery("totals"), start_date, end_date, granularity, branch_id, tz
+        )
+
+    def _dense_graph(
+        self,
+        totals,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity,
+        branch_id: str | Select,
+        tz: str,
+    ):
+        """
+        Builds the query of the dense series of a graph, with a row per bucket of
+        the range, from the aggregates of its buckets with events.
+
+        Args:
+            totals: The subquery of the buckets' aggregates, by `bucket` (and
+                `branch_id`).
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            granularity (Granularity): The size of the buckets.
+            branch_id (str | Select): The ID of the branch, or a query of the IDs
+                of the branches.
+            tz (str): The IANA time zone of the buckets.
+
+        Returns:
+            The query.
+        """
+        unit = granularity.value
+        step = literal_column(f"INTERVAL '{GRAPH_STEPS[granularity]}'")
+
+        # Buckets are generated in local time, so they follow DST changes
+        buckets = select(
+            func.generate_series(
+                func.date_trunc(unit, func.timezone(tz, start_date)),
+                func.timezone(tz, end_date),
+                step,
+            ).label("bucket")
+        ).subquery("buckets")
+
+        columns = [
+            func.timezone(tz, buckets.c.bucket).label("event_date"),
+            func.coalesce(totals.c.call_count, 0).label("call_count"),
+            func.coalesce(totals.c.total_duration_minutes, 0).label(
+                "total_duration_minutes"
+            ),
         ]
-        result_total_duration_minutes = [
-            dict(zip(row._fields, row))
-            for row in self.db.exec(text(query_total_duration_minutes), params=params)
+        if isinstance(branch_id, str):
+            return (
+                select(*columns)
+                .select_from(
+                    buckets.outerjoin(totals, totals.c.bucket == buckets.c.bucket)
+                )
+                .order_by(buckets.c.bucket)
+            )
+
+        # Every bucket of every branch, and of the total (NULL)
+        branches = branch_id.union_all(select(null())).subquery("branches")
+        return (
+            select(branches.c.id.label("branch_id"), *columns)
+            .select_from(
+                buckets.join(branches, true()).outerjoin(
+                    totals,
+                    and_(
+                        totals.c.bucket == buckets.c.bucket,
+                        totals.c.branch_id.is_not_distinct_from(branches.c.id),
+                    ),
+                )
+            )
+            .order_by(branches.c.id, buckets.c.bucket)
+        )
+
+    def _graph(self, rows, zone: ZoneInfo) -> dict:
+        """
+        Formats the rows of a graph query as the series of
+        `get_call_graph_metrics`.
+        """
+        series = [
+            {
+                "event_date": row.event_date.astimezone(zone),
+                "call_count": row.call_count,
+                "total_duration_minutes": row.total_duration_minutes,
+            }
+            for row in rows
         ]
+        return {
+            "series": series,
+            "call_count": [
+                {"event_date": point["event_date"], "call_count": point["call_count"]}
+                for point in series
+            ],
+            "total_duration_minutes": [
+                {
+                    "event_date": point["event_date"],
+                    "total_duration_minutes": point["total_duration_minutes"],
+                }
+                for point in series
+            ],
+        }
 
+    @_cached
+    def get_dashboard_metrics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity,
+        branch_id: str,
+        tz: str = "UTC",
+    ):
+        """
+        Computes everything the branch dashboard shows: the funnel and call
+        metrics of the period and of the previous one, their trends, and the call
+        graph, in a single statement. Its rows are aggregated from one source
+        (see `_source`), grouped both by period and by graph bucket with
+        GROUPING SETS: a row per period, followed by the dense graph series.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            granularity (Granularity): The size of the graph buckets.
+            branch_id (str): The ID of the branch.
+            tz (str, optional): The IANA time zone of the graph buckets.
+
+        Returns:
+            dict: The metrics of `get_funnel_metrics_with_trends` and
+            `get_call_metrics_with_trends`, and the `call_graph` of
+            `get_call_graph_metrics`.
+        """
+        source = self._source(
+            start_date,
+            end_date,
+            branch_id,
+            FUNNEL_EVENTS + CALL_EVENTS,
+            with_previous=True,
+            graph=(granularity, tz),
+        )
+        totals = (
+            select(
+                source.c.period,
+                source.c.bucket,
+                *self._funnel_columns(source),
+                *self._call_columns(source),
+                *self._graph_columns(source),
+            )
+            .group_by(func.grouping_sets(source.c.period, source.c.bucket))
+            .cte("totals")
+        )
+        keys = [*EMPTY_FUNNEL_METRICS, *EMPTY_CALL_METRICS]
+        graph = self._dense_graph(
+            totals, start_date, end_date, granularity, branch_id, tz
+        ).subquery("graph")
+        query = union_all(
+            select(
+                totals.c.period,
+                null().label("event_date"),
+                *(totals.c[key] for key in keys),
+                null().label("call_count"),
+                null().label("total_duration_minutes"),
+            ).where(totals.c.period.is_not(None)),
+            select(
+                null(),
+                graph.c.event_date,
+                *(null() for _ in keys),
+                graph.c.call_count,
+                graph.c.total_duration_minutes,
+            ),
+        ).order_by(literal_column("event_date").nulls_first())
+
+        periods = {
+            period: ({**EMPTY_FUNNEL_METRICS}, {**EMPTY_CALL_METRICS})
+            for period in (CURRENT_PERIOD, PREVIOUS_PERIOD)
+        }
+        points = []
+        for row in self.db.exec(query):
+            if row.period is None:
+                points.append(row)
+                continue
+            for metrics in periods[row.period]:
+                metrics.update((key, getattr(row, key)) for key in metrics)
+
+        (funnel, call), (previous_funnel, previous_call) = (
+            periods[CURRENT_PERIOD],
+            periods[PREVIOUS_PERIOD],
+        )
         return {
-            "call_count": result_call_count,
-            "total_duration_minutes": result_total_duration_minutes,
+            "funnel_trends": self._trends(funnel, previous_funnel),
+            "funnel_metrics": funnel,
+            "previous_funnel_metrics": previous_funnel,
+            "call_trends": self._trends(call, previous_call),
+            "call_metrics": call,
+            "previous_call_metrics": previous_call,
+            "call_graph": self._graph(points, ZoneInfo(tz)),
         }
+
+    def _org_branches(self, org_id: str, branch_ids: list[str] | None = None):
+        """
+        Builds the query of the IDs of the branches of an organization, or of
+        those of `branch_ids` that belong to it. Deleted branches are left out.
+        """
+        query = select(Branch.id).where(
+            Branch.organization_id == org_id, Branch.deleted_at.is_(None)
+        )
+        if branch_ids:
+            query = query.where(Branch.id.in_(branch_ids))
+        return query
+
+    def count_org_branches(self, org_id: str, branch_ids: list[str] | None = None):
+        """
+        Counts the branches of an organization, or those of `branch_ids` that
+        belong to it, e.g. the series of its graphs.
+        """
+        query = select(func.count()).select_from(
+            self._org_branches(org_id, branch_ids).subquery()
+        )
+        return self.db.exec(query).one()
+
+    def _get_branches(self, query) -> dict:
+        """
+        Runs a metrics query grouped by branch.
+
+        Args:
+            query: The query built by `_metrics_query` with a query of branches.
+
+        Returns:
+            dict: The metrics of each branch, with its `branch_id`, and their
+            total.
+        """
+        branches, total = [], None
+        for row in self.db.exec(query):
+            metrics = dict(row._mapping)
+            if metrics["branch_id"] is None:
+                del metrics["branch_id"]
+                total = metrics
+            else:
+                branches.append(metrics)
+        return {"branches": branches, "total": total}
+
+    def get_org_funnel_metrics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        org_id: str,
+        branch_ids: list[str] | None = None,
+    ):
+        """
+        Computes the funnel metrics of every branch of an organization, or of
+        some of them, and their total, in one query.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            org_id (str): The ID of the organization.
+            branch_ids (list[str], optional): The IDs of the branches, all the
+                branches of the organization by default.
+
+        Returns:
+            dict: The metrics of each branch, and their total.
+        """
+        branches = self._org_branches(org_id, branch_ids)
+        return self._get_branches(self._funnel_query(start_date, end_date, branches))
+
+    def get_org_call_metrics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        org_id: str,
+        branch_ids: list[str] | None = None,
+    ):
+        """
+        Computes the call metrics of every branch of an organization, or of
+        some of them, and their total, in one query.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            org_id (str): The ID of the organization.
+            branch_ids (list[str], optional): The IDs of the branches, all the
+                branches of the organization by default.
+
+        Returns:
+            dict: The metrics of each branch, and their total.
+        """
+        branches = self._org_branches(org_id, branch_ids)
+        return self._get_branches(self._call_query(start_date, end_date, branches))
+
+    def get_org_call_graph_metrics(
+        self,
+        start_date: datetime,
+        end_date: datetime,
+        granularity: Granularity,
+        org_id: str,
+        branch_ids: list[str] | None = None,
+        tz: str = "UTC",
+    ):
+        """
+        Computes the call graph of every branch of an organization, or of some
+        of them, and of their total, in one query.
+
+        Args:
+            start_date (datetime): The start of the range.
+            end_date (datetime): The end of the range.
+            granularity (Granularity): The size of the buckets.
+            org_id (str): The ID of the organization.
+            branch_ids (list[str], optional): The IDs of the branches, all the
+                branches of the organization by default.
+            tz (str, optional): The IANA time zone of the buckets.
+
+        Returns:
+            dict: The graph of each branch, with its `branch_id`, and of their
+            total, as returned by `get_call_graph_metrics`.
+        """
+        query = self._graph_query(
+            start_date,
+            end_date,
+            granularity,
+            self._org_branches(org_id, branch_ids),
+            tz,
+        )
+        zone = ZoneInfo(tz)
+        branches, total = [], None
+        for branch_id, rows in groupby(self.db.exec(query), lambda row: row.branch_id):
+            graph = self._graph(rows, zone)
+            if branch_id is None:
+                total = graph
+            else:
+                branches.append({"branch_id": branch_id, **graph})
+        return {"branches": branches, "total": total}
@@ -1,6 +1,4 @@
-from datetime import datetime, timezone
-
-from sqlmodel import Session, select
+from sqlmodel import Session, select, update
 
 from app.models import (
     Branch,
@@ -14,10 +12,12 @@ from app.models import (
     User,
     UserBranchMapping,
     get_id,
+    get_random_id,
 )
+from app.services.base_service import BaseService
 
 
-class OrganizationService:
+class OrganizationService(BaseService):
     """
     Service class for managing organizations.
     """
@@ -39,13 +39,9 @@ class OrganizationService:
             org.model_dump(),
             update={
                 "id": get_id(ObjectType.ORGANIZATION),
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -77,13 +73,9 @@ class OrganizationService:
             update={
                 "id": get_id(ObjectType.BRANCH),
                 "organization_id": org_id,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -103,16 +95,30 @@ class OrganizationService:
                 "id": get_id(ObjectType.USER_BRANCH_MAPPING),
                 "branch_id": branch_id,
                 "user_id": user_id,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             }
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
+    def is_branch_member(self, branch_id: str, user_id: str) -> bool:
+        """
+        Checks whether a user was added to a branch.
+
+        Args:
+            branch_id (str): The ID of the branch.
+            user_id (str): The ID of the user.
+
+        Returns:
+            bool: True if the user is a member of the branch, False otherwise.
+        """
+        query = select(UserBranchMapping.id).where(
+            UserBranchMapping.branch_id == branch_id,
+            UserBranchMapping.user_id == user_id,
+            UserBranchMapping.deleted_at == None,  # noqa: E711
+        )
+        return self.db.exec(query.limit(1)).first() is not None
+
     def get_branch_by_id(self, branch_id: str) -> Branch | None:
         """
         Retrieve a branch by its ID.
@@ -148,22 +154,19 @@ class OrganizationService:
         Accepts an invite.
 
         Args:
-            token (str): The token of the invite.
+            invite (Invite): The invite to accept.
+
+        Returns:
+            bool: True if the invite was accepted, False if it isn't pending
+            anymore.
         """
-        try:
-            invite.sqlmodel_update(
-                {
-                    "status": InviteStatus.ACCEPTED,
-                    "updated_at": datetime.now(tz=timezone.utc),
-                }
-            )
-            self.db.add(invite)
-            self.db.commit()
-            self.db.refresh(invite)
-            return True
-        except Exception as e:
-            print(f"Error accepting invite: {e}")
-            return False
+        result = self.db.exec(
+            update(Invite)
+            .where(Invite.id == invite.id, Invite.status == InviteStatus.PENDING)
+            .values(status=InviteStatus.ACCEPTED)
+        )
+        self._commit()
+        return result.rowcount > 0
 
     def create_invite(
         self,
@@ -210,16 +213,12 @@ class OrganizationService:
                 "branch_id": branch_id,
                 "invited_by": invited_by,
                 "role": role,
-                "token": get_id(ObjectType.INVITE),
+                "token": get_random_id(ObjectType.INVITE),
                 "name": name,
                 "organization_name": organization_name,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
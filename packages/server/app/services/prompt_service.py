@@ -1,11 +1,11 @@
-from datetime import datetime, timezone
-
+from sqlalchemy import func
 from sqlmodel import Session, select, update
 
 from app.models import LeadStatus, ObjectType, Prompt, PromptType, get_id
+from app.services.base_service import BaseService
 
 
-class PromptService:
+class PromptService(BaseService):
     """
     Service class for managing prompts.
     """
@@ -58,14 +58,10 @@ class PromptService:
                 "prompt_type": prompt_type,
                 "report_prompt_text": report_prompt_text,
                 "description": description,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
             update={"id": get_id(ObjectType.PROMPT)},
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -111,9 +107,7 @@ class PromptService:
         Returns:
             Prompt: The updated prompt object.
         """
-        self.db.add(prompt)
-        self.db.commit()
-        self.db.refresh(prompt)
+        self._save(prompt)
         return prompt
 
     def delete_prompt(self, prompt_id: str):
@@ -126,16 +120,13 @@ class PromptService:
         Returns:
             bool: True if the prompt was successfully deleted, False otherwise.
         """
-        try:
-            prompt = self.get_prompt(prompt_id)
-            prompt.sqlmodel_update({"deleted_at": datetime.now(tz=timezone.utc)})
-            self.db.add(prompt)
-            self.db.commit()
-            self.db.refresh(prompt)
-            return True
-        except Exception as e:
-            print(f"Error deleting prompt: {e}")
-            return False
+        result = self.db.exec(
+            update(Prompt)
+            .where(Prompt.id == prompt_id, Prompt.deleted_at == None)  # noqa: E711
+            .values(deleted_at=func.clock_timestamp())
+        )
+        self._commit()
+        return result.rowcount > 0
 
     def set_default_prompt(self, prompt_id: str):
         """
@@ -168,9 +159,7 @@ class PromptService:
             # Set the selected prompt as default
             prompt.is_default = True
 
-            self.db.add(prompt)
-            self.db.commit()
-            self.db.refresh(prompt)
+            self._save(prompt)
             return True
         except Exception as e:
             self.db.rollback()
@@ -0,0 +1,347 @@
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func
+from sqlmodel import Session, desc, select, update
+
+from app.models import (
+    ObjectType,
+    ReportJob,
+    ReportJobStats,
+    ReportJobStatus,
+    get_id,
+)
+from app.services.base_service import BaseService
+
+
+class ReportJobService(BaseService):
+    """
+    Service class for managing call report jobs.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initializes the ReportJobService class with a database session.
+
+        Args:
+            db (Session): The database session to be used for database operations.
+        """
+        self.db = db
+
+    def enqueue_job(
+        self,
+        call_id: str,
+        branch_id: str,
+        org_id: str,
+        payload: dict,
+        max_attempts: int,
+    ) -> ReportJob:
+        """
+        Persists a new report job so it can be picked up by a report worker.
+
+        Args:
+            call_id (str): The ID of the call the report is generated for.
+            branch_id (str): The ID of the branch associated with the call.
+            org_id (str): The ID of the organization associated with the call.
+            payload (dict): The raw Retell webhook payload.
+            max_attempts (int): The number of attempts before the job is marked as failed.
+
+        Returns:
+            ReportJob: The created report job.
+        """
+        now = datetime.now(tz=timezone.utc)
+        db_obj = ReportJob.model_validate(
+            {
+                "call_id": call_id,
+                "branch_id": branch_id,
+                "organization_id": org_id,
+                "payload": payload,
+                "status": ReportJobStatus.PENDING,
+                "max_attempts": max_attempts,
+                "run_after": now,
+            },
+            update={"id": get_id(ObjectType.REPORT_JOB)},
+        )
+        self._save(db_obj)
+
+        return db_obj
+
+    def claim_job(self, worker_id: str) -> ReportJob | None:
+        """
+        Claims the next runnable job for a worker.
+
+        Rows are locked with `FOR UPDATE SKIP LOCKED`, so any number of workers
+        (in any number of processes) can poll the table without handing out the
+        same job twice.
+
+        Args:
+            worker_id (str): The ID of the worker claiming the job.
+
+        Returns:
+            ReportJob | None: The claimed job, or None if there is nothing to run.
+        """
+        now = datetime.now(tz=timezone.utc)
+        query = (
+            select(ReportJob)
+            .where(
+                ReportJob.status == ReportJobStatus.PENDING,
+                ReportJob.run_after <= now,
+                ReportJob.deleted_at == None,  # noqa: E711
+            )
+            .order_by(ReportJob.run_after)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        job = self.db.exec(query).first()
+        if job is None:
+            self.db.rollback()
+            return None
+
+        job.sqlmodel_update(
+            {
+                "status": ReportJobStatus.RUNNING,
+                "attempts": job.attempts + 1,
+                "locked_at": now,
+                "locked_by": worker_id,
+                "updated_at": now,
+            }
+        )
+        self._save(job)
+
+        return job
+
+    def complete_job(self, job_id: str, worker_id: str) -> bool:
+        """
+        Marks a job as completed, if the worker still holds it.
+
+        Args:
+            job_id (str): The ID of the job.
+            worker_id (str): The ID of the worker that claimed the job.
+
+        Returns:
+            bool: True if the job was updated, False if the worker lost it (it went
+            stale and was released, or claimed by another worker).
+        """
+        now = datetime.now(tz=timezone.utc)
+        result = self.db.exec(
+            update(ReportJob)
+            .where(*self._held_by(job_id, worker_id))
+            .values(
+                status=ReportJobStatus.COMPLETED,
+                locked_at=None,
+                locked_by=None,
+                last_error=None,
+                completed_at=now,
+                updated_at=now,
+            )
+        )
+        self._commit()
+        return result.rowcount > 0
+
+    def fail_job(
+        self,
+        job: ReportJob,
+        worker_id: str,
+        error: str,
+        backoff_seconds: int,
+        max_backoff_seconds: int,
+    ) -> bool:
+        """
+        Records a failed attempt, if the worker still holds the job. The job is
+        rescheduled with exponential backoff until it runs out of attempts, after
+        which it is marked as failed.
+
+        Args:
+            job (ReportJob): The job that failed, as claimed by the worker.
+            worker_id (str): The ID of the worker that claimed the job.
+            error (str): A description of the error.
+            backoff_seconds (int): The base delay before the next attempt.
+            max_backoff_seconds (int): The upper bound of the delay.
+
+        Returns:
+            bool: True if the job was updated, False if the worker lost it.
+        """
+        now = datetime.now(tz=timezone.utc)
+        values = {
+            "last_error": error,
+            "locked_at": None,
+            "locked_by": None,
+            "updated_at": now,
+        }
+        if job.attempts >= job.max_attempts:
+            values["status"] = ReportJobStatus.FAILED
+        else:
+            delay = min(backoff_seconds * 2 ** (job.attempts - 1), max_backoff_seconds)
+            values["status"] = ReportJobStatus.PENDING
+            values["run_after"] = now + timedelta(seconds=delay)
+
+        result = self.db.exec(
+            update(ReportJob).where(*self._held_by(job.id, worker_id)).values(**values)
+        )
+        self._commit()
+        return result.rowcount > 0
+
+    def _held_by(self, job_id: str, worker_id: str) -> tuple:
+        # A stale job released and claimed again no longer matches its first worker
+        return (
+            ReportJob.id == job_id,
+            ReportJob.status == ReportJobStatus.RUNNING,
+            ReportJob.locked_by == worker_id,
+        )
+
+    def recover_stale_jobs(self, stale_after: timedelta) -> int:
+        """
+        Releases jobs held by workers that crashed or were killed mid-run. A job
+        is considered stale once it has been running for longer than `stale_after`.
+
+        Args:
+            stale_after (timedelta): How long a job may run before it is reclaimed.
+
+        Returns:
+            int: The number of jobs that were released.
+        """
+        now = datetime.now(tz=timezone.utc)
+        where_clause = (
+            ReportJob.status == ReportJobStatus.RUNNING,
+            ReportJob.locked_at < now - stale_after,
+        )
+        retried = self.db.exec(
+            update(ReportJob)
+            .where(*where_clause, ReportJob.attempts < ReportJob.max_attempts)
+            .values(
+                status=ReportJobStatus.PENDING,
+                locked_at=None,
+                locked_by=None,
+                run_after=now,
+                last_error="Worker did not finish the job in time",
+                updated_at=now,
+            )
+        )
+        exhausted = self.db.exec(
+            update(ReportJob)
+            .where(*where_clause, ReportJob.attempts >= ReportJob.max_attempts)
+            .values(
+                status=ReportJobStatus.FAILED,
+                locked_at=None,
+                locked_by=None,
+                last_error="Worker did not finish the job in time",
+                updated_at=now,
+            )
+        )
+        self._commit()
+        return retried.rowcount + exhausted.rowcount
+
+    def retry_job(self, job_id: str, org_id: str) -> bool:
+        """
+        Requeues a failed job with a fresh set of attempts.
+
+        Args:
+            job_id (str): The ID of the job.
+            org_id (str): The ID of the organization the job belongs to.
+
+        Returns:
+            bool: True if the job was requeued, False otherwise.
+        """
+        now = datetime.now(tz=timezone.utc)
+        result = self.db.exec(
+            update(ReportJob)
+            .where(
+                ReportJob.id == job_id,
+                ReportJob.organization_id == org_id,
+                ReportJob.status == ReportJobStatus.FAILED,
+            )
+            .values(
+                status=ReportJobStatus.PENDING,
+                attempts=0,
+                run_after=now,
+                updated_at=now,
+            )
+        )
+        self._commit()
+        return result.rowcount > 0
+
+    def get_job(self, job_id: str, org_id: str = None) -> ReportJob | None:
+        """
+        Retrieve a job by its ID.
+
+        Args:
+            job_id (str): The ID of the job.
+            org_id (str, optional): The ID of the organization to scope the lookup to.
+
+        Returns:
+            ReportJob | None: The job object, or None if not found.
+        """
+        where_clause = (
+            ReportJob.id == job_id,
+            ReportJob.deleted_at == None,  # noqa: E711
+        )
+        if org_id:
+            where_clause += (ReportJob.organization_id == org_id,)
+
+        query = select(ReportJob).where(*where_clause)
+        return self.db.exec(query).one_or_none()
+
+    def get_jobs(
+        self,
+        org_id: str,
+        branch_id: str = None,
+        call_id: str = None,
+        status: ReportJobStatus = None,
+        limit: int = 100,
+    ) -> list[ReportJob]:
+        """
+        Retrieve the most recent jobs for an organization.
+
+        Args:
+            org_id (str): The ID of the organization.
+            branch_id (str, optional): The ID of the branch to filter by.
+            call_id (str, optional): The ID of the call to filter by.
+            status (ReportJobStatus, optional): The job status to filter by.
+            limit (int, optional): The maximum number of jobs to return. Defaults to 100.
+
+        Returns:
+            List[ReportJob]: A list of job objects.
+        """
+        where_clause = (
+            ReportJob.organization_id == org_id,
+            ReportJob.deleted_at == None,  # noqa: E711
+        )
+        if branch_id:
+            where_clause += (ReportJob.branch_id == branch_id,)
+        if call_id:
+            where_clause += (ReportJob.call_id == call_id,)
+        if status:
+            where_clause += (ReportJob.status == status,)
+
+        query = (
+            select(ReportJob)
+            .where(*where_clause)
+            .order_by(desc(ReportJob.created_at))
+            .limit(limit)
+        )
+        return self.db.exec(query).all()
+
+    def get_job_stats(self, org_id: str, branch_id: str = None) -> ReportJobStats:
+        """
+        Count jobs per status for an organization.
+
+        Args:
+            org_id (str): The ID of the organization.
+            branch_id (str, optional): The ID of the branch to filter by.
+
+        Returns:
+            ReportJobStats: The number of jobs in each status.
+        """
+        where_clause = (
+            ReportJob.organization_id == org_id,
+            ReportJob.deleted_at == None,  # noqa: E711
+        )
+        if branch_id:
+            where_clause += (ReportJob.branch_id == branch_id,)
+
+        query = (
+            select(ReportJob.status, func.count())
+            .where(*where_clause)
+            .group_by(ReportJob.status)
+        )
+        counts = {status.value: count for status, count in self.db.exec(query).all()}
+        return ReportJobStats(**counts)
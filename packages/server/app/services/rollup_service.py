@@ -0,0 +1,150 @@
+from datetime import date, datetime, time, timezone
+from enum import Enum
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import text
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import Session
+
+from app.core.config import settings
+from app.models import Event, EventRollup, EventType
+
+# Events whose rollups keep their lead, counted by the funnel stages
+LEAD_EVENTS = (EventType.LEAD_CREATED.value, EventType.LEAD_STATUS_UPDATED.value)
+
+
+def _dimension(value) -> str:
+    if isinstance(value, Enum):
+        return value.value
+    return value or ""
+
+
+class RollupService:
+    """
+    Service class for maintaining the daily event rollups.
+
+    Each row of `event_rollups` aggregates the events of one branch, local day
+    (in METRICS_ROLLUP_TIMEZONE), event name and dimension (status, lead type,
+    call type). The counts and durations can be summed over any number of days.
+    Distinct leads can't, so the rows of the lead events also have the lead as
+    a key: the funnel stages count the distinct leads of the rows of their days.
+    """
+
+    def __init__(self, db: Session):
+        """
+        Initializes the RollupService class with a database session.
+
+        Args:
+            db (Session): The database session to be used for database operations.
+        """
+        self.db = db
+
+    def record_event(self, event: Event):
+        """
+        Adds an event to its daily rollup. Runs in the caller's transaction, so the
+        rollup is committed together with the event.
+
+        Args:
+            event (Event): The event that was just added to the session.
+        """
+        created_at = event.created_at.astimezone(
+            ZoneInfo(settings.METRICS_ROLLUP_TIMEZONE)
+        )
+        key = {
+            "branch_id": event.branch_id,
+            "day": created_at.date(),
+            "name": _dimension(event.name),
+            "status": _dimension(event.status),
+            "lead_type": _dimension(event.lead_type),
+            "call_type": _dimension(event.call_type),
+            "lead_id": "",
+        }
+        if key["name"] in LEAD_EVENTS:
+            key["lead_id"] = _dimension(event.lead_id)
+
+        duration = 0
+        if key["name"] == EventType.CALL_ENDED.value:
+            duration = event.duration_seconds or 0
+
+        stmt = insert(EventRollup).values(
+            **key,
+            organization_id=event.organization_id,
+            event_count=1,
+            duration_seconds=duration,
+            updated_at=datetime.now(tz=timezone.utc),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(key),
+            set_={
+                "event_count": EventRollup.event_count + stmt.excluded.event_count,
+                "duration_seconds": EventRollup.duration_seconds
+                + stmt.excluded.duration_seconds,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        self.db.exec(stmt)
+
+    def rebuild(self, branch_id: str = None, since: date = None) -> int:
+        """
+        Recomputes the rollups from the raw events.
+
+        The rollup table is locked against concurrent writers for the duration
+        of the rebuild; events created meanwhile are added once it commits.
+
+        Args:
+            branch_id (str, optional): Only rebuild the rollups of this branch.
+            since (date, optional): Only rebuild the rollups from this local day
+                onwards.
+
+        Returns:
+            int: The number of rollup rows written.
+        """
+        event_filters, rollup_filters = "", ""
+        zone = settings.METRICS_ROLLUP_TIMEZONE
+        params = {"zone": zone, "lead_events": list(LEAD_EVENTS)}
+        if branch_id:
+            event_filters += " AND branch_id = :branch_id"
+            rollup_filters += " AND branch_id = :branch_id"
+            params["branch_id"] = branch_id
+        if since:
+            event_filters += " AND created_at >= :since"
+            rollup_filters += " AND day >= :since_day"
+            params["since"] = datetime.combine(since, time.min, tzinfo=ZoneInfo(zone))
+            params["since_day"] = since
+
+        self.db.exec(text("LOCK TABLE event_rollups IN SHARE ROW EXCLUSIVE MODE"))
+        self.db.exec(
+            text(f"DELETE FROM event_rollups WHERE TRUE{rollup_filters}"),
+            params=params,
+        )
+        result = self.db.exec(
+            text(f"""
+                INSERT INTO event_rollups (
+                    branch_id, day, name, status, lead_type, call_type, lead_id,
+                    organization_id, updated_at, event_count, duration_seconds
+                )
+                SELECT
+                    branch_id,
+                    CAST(created_at AT TIME ZONE :zone AS DATE) AS day,
+                    name,
+                    COALESCE(status, '') AS status,
+                    COALESCE(lead_type, '') AS lead_type,
+                    COALESCE(call_type, '') AS call_type,
+                    CASE
+                        WHEN name = ANY(:lead_events) THEN COALESCE(lead_id, '')
+                        ELSE ''
+                    END AS lead_id,
+                    MIN(organization_id),
+                    CLOCK_TIMESTAMP(),
+                    COUNT(*),
+                    COALESCE(
+                        SUM(duration_seconds) FILTER (WHERE name = 'call_ended'), 0
+                    )
+                FROM events
+                WHERE TRUE{event_filters}
+                GROUP BY 1, 2, 3, 4, 5, 6, 7
+                """),
+            params=params,
+        )
+        self.db.commit()
+        return result.rowcount
@@ -1,12 +1,58 @@
-from datetime import datetime, timezone
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from functools import partial
+
+from sqlmodel import Session, select, update
+
+from app.core.cache import user_cache
+from app.core.config import settings
+from app.core.db import engine
+from app.core.notify import USER_CHANGED, notification_listener, notify, process_id
+from app.core.security import revoked_tokens
+from app.models import ObjectType, Role, User, UserRegisterRequest, get_id
+from app.services.base_service import BaseService
 
-from sqlmodel import Session, select
 
-from app.core.security import get_password_hash
-from app.models import ObjectType, Role, User, UserRegisterRequest, get_id
+def _forget_user(user_id: str, changed_at: float):
+    user_cache.invalidate(user_id)
+    if settings.STATELESS_AUTH:
+        revoked_tokens.revoke(user_id, changed_at)
+
+
+def _resync_users():
+    """
+    Catches up with the users changed while the listener was disconnected, or
+    before this worker started: only tokens issued before each user's last
+    update are revoked, and only within the tokens' lifetime.
+    """
+    user_cache.clear()
+    if not settings.STATELESS_AUTH:
+        return
+    since = datetime.now(timezone.utc) - timedelta(seconds=revoked_tokens.ttl)
+    with Session(engine) as db:
+        users = db.exec(
+            select(User.id, User.updated_at).where(User.updated_at > since)
+        ).all()
+    for user_id, updated_at in users:
+        revoked_tokens.revoke(user_id, updated_at.timestamp())
+
 
+def _on_user_changed(payload: str | None):
+    if payload is None:
+        _resync_users()
+        return
+    message = json.loads(payload)
+    # This worker's own changes are applied when they are committed
+    if message["origin"] != process_id():
+        _forget_user(message["user_id"], message["changed_at"])
 
-class UserService:
+
+# Users updated by other workers
+notification_listener.subscribe(USER_CHANGED, _on_user_changed)
+
+
+class UserService(BaseService):
     """
     Service class for managing user-related operations.
     """
@@ -19,6 +65,7 @@ class UserService:
         user: UserRegisterRequest,
         org_id: int,
         role: Role,
+        hashed_password: str,
     ) -> User:
         """
         Creates a new user.
@@ -27,6 +74,8 @@ class UserService:
             user (UserRegisterRequest): The user registration request object.
             org_id (int): The ID of the organization.
             role (Role): The role of the user.
+            hashed_password (str): The hash of the user's password, see
+                `app.core.security.hash_password`.
 
         Returns:
             User: The created user object.
@@ -36,15 +85,11 @@ class UserService:
             update={
                 "id": get_id(ObjectType.USER),
                 "organization_id": org_id,
-                "hashed_password": get_password_hash(user.password.get_secret_value()),
+                "hashed_password": hashed_password,
                 "role": role,
-                "created_at": datetime.now(tz=timezone.utc),
-                "updated_at": datetime.now(tz=timezone.utc),
             },
         )
-        self.db.add(db_obj)
-        self.db.commit()
-        self.db.refresh(db_obj)
+        self._save(db_obj)
 
         return db_obj
 
@@ -75,6 +120,45 @@ class UserService:
         query = select(User).where(User.id == user_id)
         return self.db.exec(query).first()
 
+    def get_cached_user_by_id(self, user_id: str) -> User | None:
+        """
+        Retrieves a user based on its ID, from the user cache if possible.
+
+        The returned user is not attached to the session, changes to it are not
+        saved and must be made on a user loaded with `get_user_by_id`.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            User: The user object if found, None otherwise.
+        """
+        data = user_cache.get(user_id)
+        if data is None:
+            user = self.get_user_by_id(user_id)
+            if user is None:
+                return None
+            data = user.model_dump()
+            user_cache.set(user_id, data)
+        return User.model_validate(data)
+
+    def _user_changed(self, user_id: str) -> float:
+        """
+        Notifies every worker that a user changed, once the current transaction
+        commits. They drop the user from their cache and, with STATELESS_AUTH,
+        revoke the user's access tokens issued before the change so their claims
+        are refreshed; deactivated users can't refresh them. Tokens issued after
+        the change, e.g. by the same request, stay valid.
+
+        Returns:
+            float: The time of the change, applied to this worker with
+            `_forget_user` once committed.
+        """
+        changed_at = time.time()
+        message = {"user_id": user_id, "changed_at": changed_at, "origin": process_id()}
+        notify(self.db, USER_CHANGED, json.dumps(message))
+        return changed_at
+
     def set_current_branch(self, user_id: str, branch_id: str) -> bool:
         """
         Sets the current branch for a user.
@@ -82,14 +166,18 @@ class UserService:
         Args:
             user_id (str): The ID of the user.
             branch_id (str): The ID of the branch.
+
+        Returns:
+            bool: True if the user was updated, False if the user doesn't exist.
         """
-        user = self.get_user_by_id(user_id)
-        if user is None:
+        result = self.db.exec(
+            update(User).where(User.id == user_id).values(current_branch_id=branch_id)
+        )
+        if result.rowcount == 0:
             return False
-        user.sqlmodel_update({"current_branch_id": branch_id})
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        changed_at = self._user_changed(user_id)
+        self._commit()
+        self.on_commit(partial(_forget_user, user_id, changed_at))
         return True
 
     def update_user(self, user: User):
@@ -102,7 +190,7 @@ class UserService:
         Returns:
             User: The updated user object.
         """
-        self.db.add(user)
-        self.db.commit()
-        self.db.refresh(user)
+        changed_at = self._user_changed(user.id)
+        self._save(user)
+        self.on_commit(partial(_forget_user, user.id, changed_at))
         return user
@@ -0,0 +1,92 @@
+import threading
+from datetime import timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.api.routes.authentication import refresh
+from app.core import security
+from app.core.config import settings
+from app.core.security import create_access_token, create_tokens
+from app.main import app
+from app.models import RefreshTokenRequest, Token, TokenType, User
+from app.services.user_service import UserService
+
+
+@pytest.fixture
+def stateless(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+
+
+def test_refresh_issues_new_tokens(db: Session, user: User, stateless: None):
+    tokens = create_tokens(user)
+
+    new_tokens = refresh(
+        RefreshTokenRequest(refresh_token=tokens.refresh_token), UserService(db)
+    )
+
+    assert isinstance(new_tokens, Token)
+    assert new_tokens.refresh_token is not None
+
+
+@pytest.mark.parametrize(
+    "metadata",
+    [
+        # Access tokens, with and without STATELESS_AUTH
+        {"type": TokenType.ACCESS, "role": "admin"},
+        {"role": "admin"},
+    ],
+)
+def test_refresh_rejects_other_tokens(
+    db: Session, user: User, stateless: None, metadata: dict
+):
+    token = create_access_token(user.id, timedelta(minutes=5), metadata=metadata)
+
+    response = refresh(RefreshTokenRequest(refresh_token=token), UserService(db))
+
+    assert response.status_code == 403
+
+
+def test_refresh_rejects_expired_tokens(db: Session, user: User, stateless: None):
+    token = create_access_token(
+        user.id, timedelta(minutes=-1), metadata={"type": TokenType.REFRESH}
+    )
+
+    response = refresh(RefreshTokenRequest(refresh_token=token), UserService(db))
+
+    assert response.status_code == 403
+
+
+def test_refresh_rejects_deactivated_users(db: Session, user: User, stateless: None):
+    tokens = create_tokens(user)
+    user.is_active = False
+    db.add(user)
+    db.commit()
+
+    response = refresh(
+        RefreshTokenRequest(refresh_token=tokens.refresh_token), UserService(db)
+    )
+
+    assert response.status_code == 403
+
+
+def test_register_is_rejected_while_the_password_hasher_is_busy(
+    monkeypatch: pytest.MonkeyPatch,
+):
+    busy = threading.BoundedSemaphore(1)
+    busy.acquire()
+    monkeypatch.setattr(security, "_pending", busy)
+
+    # Without the lifespan, the request doesn't need the database or Retell
+    response = TestClient(app).post(
+        f"{settings.API_V1_STR}/register",
+        json={
+            "full_name": "Test",
+            "email": "test@example.com",
+            "password": "password",
+        },
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "1"
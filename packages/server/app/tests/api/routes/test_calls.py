@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+from sqlmodel import Session, select
+
+from app.api.routes.calls import create_call
+from app.core.db import UNIT_OF_WORK
+from app.core.retell import RetellClient, RetellUnavailableError
+from app.models import Branch, Call, CallType, CreateCallRequest, LeadType, User
+from app.services.agent_service import AgentService
+from app.services.call_service import CallService
+from app.services.event_service import EventService
+from app.services.lead_service import LeadService
+from app.services.prompt_service import PromptService
+
+
+def test_create_call_deletes_the_call_if_registration_fails(
+    db: Session, branch: Branch, user: User, retell_unavailable: RetellClient
+):
+    org_id = branch.organization_id
+    lead_service = LeadService(db)
+    lead = lead_service.create_lead(
+        org_id, branch.id, LeadType.SUSPECT, user.id, user.full_name
+    )
+    lead_service.create_profile({"full_name": "Test"}, org_id, branch.id, lead.id)
+    AgentService(db).create_agent(org_id, branch.id, lead.id, "llm_1", "agent_1")
+    prompt = PromptService(db).create_prompt(
+        "Test", "Test", org_id, branch.id, user.id, user.full_name
+    )
+    db.info[UNIT_OF_WORK] = True
+    req = CreateCallRequest(
+        lead_id=lead.id, prompt_id=prompt.id, call_type=CallType.APPOINTMENT_CALL
+    )
+
+    with pytest.raises(RetellUnavailableError):
+        asyncio.run(
+            create_call(
+                req=req,
+                user_ctx=user,
+                agent_service=AgentService(db),
+                lead_service=lead_service,
+                retell_service=retell_unavailable,
+                call_service=CallService(db),
+                prompt_service=PromptService(db),
+                event_service=EventService(db),
+            )
+        )
+    db.rollback()
+
+    (call,) = db.exec(select(Call).where(Call.lead_id == lead.id)).all()
+    assert call.deleted_at is not None
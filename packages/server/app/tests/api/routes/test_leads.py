@@ -0,0 +1,35 @@
+import pytest
+from sqlmodel import Session, select
+
+from app.api.routes.leads import create_lead
+from app.core.db import UNIT_OF_WORK
+from app.core.retell import RetellClient, RetellUnavailableError
+from app.models import Branch, CreateLeadRequest, Lead, LeadType, Profile, User
+from app.services.agent_service import AgentService
+from app.services.event_service import EventService
+from app.services.lead_service import LeadService
+
+
+def test_create_lead_deletes_the_lead_if_retell_fails(
+    db: Session, branch: Branch, user: User, retell_unavailable: RetellClient
+):
+    db.info[UNIT_OF_WORK] = True
+    req = CreateLeadRequest(
+        branch_id=branch.id, type=LeadType.SUSPECT, profile={"full_name": "Test"}
+    )
+
+    with pytest.raises(RetellUnavailableError):
+        create_lead(
+            req=req,
+            user_ctx=user,
+            lead_service=LeadService(db),
+            agent_service=AgentService(db),
+            retell_service=retell_unavailable,
+            event_service=EventService(db),
+        )
+    db.rollback()
+
+    (lead,) = db.exec(select(Lead).where(Lead.branch_id == branch.id)).all()
+    (profile,) = db.exec(select(Profile).where(Profile.lead_id == lead.id)).all()
+    assert lead.deleted_at is not None
+    assert profile.deleted_at is not None
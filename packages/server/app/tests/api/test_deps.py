@@ -0,0 +1,26 @@
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+from sqlmodel import Session
+
+from app.api.deps import _resolve_user
+from app.core.config import settings
+from app.core.security import create_tokens
+from app.models import User
+from app.services.user_service import UserService
+from app.utils import CustomException
+
+
+def bearer(token: str) -> HTTPAuthorizationCredentials:
+    return HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+
+def test_refresh_tokens_are_not_access_tokens(
+    db: Session, user: User, monkeypatch: pytest.MonkeyPatch
+):
+    monkeypatch.setattr(settings, "STATELESS_AUTH", True)
+    tokens = create_tokens(user)
+
+    assert _resolve_user(bearer(tokens.access_token), UserService(db)).id == user.id
+    with pytest.raises(CustomException) as e:
+        _resolve_user(bearer(tokens.refresh_token), UserService(db))
+    assert e.value.status_code == 403
@@ -0,0 +1,175 @@
+import os
+import time
+from collections.abc import Generator
+
+import pytest
+
+# Settings required to import the app, for the tests that don't use the
+# database or the external APIs
+for name, value in {
+    "SECRET_KEY": "test",
+    "PROJECT_NAME": "insureai",
+    "POSTGRES_SERVER": "localhost",
+    "POSTGRES_USER": "postgres",
+    "POSTGRES_DB": "app",
+    "RETELL_API_KEY": "test",
+    "OPENAI_API_KEY": "test",
+    "WEBHOOK_URL": "http://localhost",
+}.items():
+    os.environ.setdefault(name, value)
+
+from sqlalchemy import exc, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+from sqlmodel import Session  # noqa: E402
+
+from app.core.retell import RetellClient  # noqa: E402
+from app.models import (  # noqa: E402
+    Agent,
+    Branch,
+    Call,
+    Lead,
+    ObjectType,
+    Organization,
+    ProfileSnapshot,
+    Role,
+    User,
+    get_id,
+)
+
+# Tables cleaned up after the tests, children first
+ORGANIZATION_TABLES = (
+    "report_jobs",
+    "event_rollups",
+    "events",
+    "calls",
+    "prompts",
+    "agents",
+    "profile_snapshots",
+    "profiles",
+    "leads",
+    "users",
+    "branches",
+)
+
+
+@pytest.fixture(scope="session")
+def engine() -> Engine:
+    """
+    The engine of the configured database, migrated to the latest revision. The
+    tests using it are skipped when the database is not available.
+    """
+    from app.core.db import engine
+
+    try:
+        with engine.connect():
+            pass
+    except exc.OperationalError:
+        pytest.skip("The database is not available")
+    return engine
+
+
+@pytest.fixture
+def db(engine: Engine) -> Generator[Session, None, None]:
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+
+
+@pytest.fixture
+def branch(db: Session) -> Generator[Branch, None, None]:
+    """
+    A branch of a new organization. The rows of the organization are deleted
+    after the test.
+    """
+    organization = Organization(id=get_id(ObjectType.ORGANIZATION), name="Test")
+    branch = Branch(
+        id=get_id(ObjectType.BRANCH), name="Test", organization_id=organization.id
+    )
+    db.add(organization)
+    db.flush()
+    db.add(branch)
+    db.commit()
+
+    yield branch
+
+    db.rollback()
+    for table in ORGANIZATION_TABLES:
+        db.exec(
+            text(f"DELETE FROM {table} WHERE organization_id = :org_id"),
+            params={"org_id": organization.id},
+        )
+    db.delete(organization)
+    db.commit()
+
+
+@pytest.fixture
+def user(db: Session, branch: Branch) -> User:
+    """
+    An admin of the branch's organization.
+    """
+    user = User(
+        id=get_id(ObjectType.USER),
+        email=f"{get_id(ObjectType.USER)}@example.com",
+        hashed_password="",
+        full_name="Test",
+        organization_id=branch.organization_id,
+        role=Role.ADMIN,
+    )
+    db.add(user)
+    db.commit()
+    return user
+
+
+@pytest.fixture
+def call(db: Session, branch: Branch, user: User) -> Call:
+    """
+    A call of the branch, with its lead, profile snapshot and agent.
+    """
+    org_id = branch.organization_id
+    lead = Lead(
+        id=get_id(ObjectType.LEAD),
+        branch_id=branch.id,
+        organization_id=org_id,
+        created_by_id=user.id,
+        created_by_name=user.full_name,
+    )
+    snapshot = ProfileSnapshot(
+        id=get_id(ObjectType.PROFILE_SNAPSHOT),
+        lead_id=lead.id,
+        data={},
+        branch_id=branch.id,
+        organization_id=org_id,
+    )
+    agent = Agent(
+        id=get_id(ObjectType.AGENT),
+        retell_llm_id="llm_test",
+        retell_agent_id="agent_test",
+        lead_id=lead.id,
+        branch_id=branch.id,
+        organization_id=org_id,
+    )
+    call = Call(
+        id=get_id(ObjectType.CALL),
+        user_id=user.id,
+        lead_id=lead.id,
+        profile_snapshot_id=snapshot.id,
+        branch_id=branch.id,
+        organization_id=org_id,
+        agent_id=agent.id,
+        call_metadata={},
+    )
+    for obj in (lead, snapshot, agent, call):
+        db.add(obj)
+        db.flush()
+    db.commit()
+    return call
+
+
+@pytest.fixture
+def retell_unavailable() -> RetellClient:
+    """
+    A Retell client whose circuit breaker is open, so its requests fail without
+    being sent.
+    """
+    client = RetellClient()
+    client.breaker.opened_at = time.monotonic()
+    return client
@@ -0,0 +1,202 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.core import cache as cache_module
+from app.core.cache import MetricsCache, TTLCache
+
+BRANCH = "br_1"
+OTHER_BRANCH = "br_2"
+KEY = ("get_call_metrics", ("start_date", 1), ("end_date", 2))
+
+
+class Computation:
+    """
+    Counts its calls, and blocks them until `release` is set, if it's given.
+    """
+
+    def __init__(self, value: object = "metrics", release: threading.Event = None):
+        self.value = value
+        self.release = release
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return self.value
+
+
+def wait_until(condition):
+    deadline = time.monotonic() + 5
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.001)
+
+
+def test_serves_cached_metrics():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    compute = Computation()
+
+    assert cache.get_or_compute(BRANCH, KEY, compute) == "metrics"
+    assert cache.get_or_compute(BRANCH, KEY, compute) == "metrics"
+    assert compute.calls == 1
+
+
+def test_concurrent_requests_share_one_computation():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    release = threading.Event()
+    compute = Computation(release=release)
+    requests = 8
+
+    with ThreadPoolExecutor(requests) as executor:
+        futures = [
+            executor.submit(cache.get_or_compute, BRANCH, KEY, compute)
+            for _ in range(requests)
+        ]
+        # Every request but the first waits for its computation
+        wait_until(lambda: cache.coalesced == requests - 1)
+        release.set()
+        results = [future.result() for future in futures]
+
+    assert results == ["metrics"] * requests
+    assert compute.calls == 1
+    assert cache.stats()["in_flight"] == 0
+
+
+def test_waiting_requests_get_the_error_of_the_computation():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise RuntimeError("database unavailable")
+
+    with ThreadPoolExecutor(2) as executor:
+        leader = executor.submit(cache.get_or_compute, BRANCH, KEY, fail)
+        wait_until(lambda: cache.stats()["in_flight"] == 1)
+        waiter = executor.submit(cache.get_or_compute, BRANCH, KEY, fail)
+        wait_until(lambda: cache.coalesced == 1)
+        release.set()
+        for future in (leader, waiter):
+            with pytest.raises(RuntimeError):
+                future.result()
+
+    # Errors aren't cached
+    assert cache.get_or_compute(BRANCH, KEY, Computation()) == "metrics"
+
+
+def test_invalidate_recomputes_only_the_branch():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    compute, other = Computation(), Computation()
+    cache.get_or_compute(BRANCH, KEY, compute)
+    cache.get_or_compute(OTHER_BRANCH, KEY, other)
+
+    cache.invalidate(BRANCH)
+
+    cache.get_or_compute(BRANCH, KEY, compute)
+    cache.get_or_compute(OTHER_BRANCH, KEY, other)
+    assert compute.calls == 2
+    assert other.calls == 1
+
+
+def test_invalidate_discards_computations_in_flight():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    release = threading.Event()
+    stale = Computation("stale", release=release)
+
+    with ThreadPoolExecutor(1) as executor:
+        future = executor.submit(cache.get_or_compute, BRANCH, KEY, stale)
+        wait_until(lambda: stale.calls == 1)
+        # An event of the branch is created while the metrics are computed
+        cache.invalidate(BRANCH)
+        release.set()
+        assert future.result() == "stale"
+
+    assert cache.get_or_compute(BRANCH, KEY, Computation("fresh")) == "fresh"
+
+
+def test_clear_recomputes_every_branch():
+    cache = MetricsCache(maxsize=10, ttl=60)
+    compute = Computation()
+    cache.get_or_compute(BRANCH, KEY, compute)
+
+    cache.clear()
+
+    cache.get_or_compute(BRANCH, KEY, compute)
+    assert compute.calls == 2
+
+
+def test_zero_ttl_disables_the_cache():
+    cache = MetricsCache(maxsize=10, ttl=0)
+    compute = Computation()
+
+    cache.get_or_compute(BRANCH, KEY, compute)
+    cache.get_or_compute(BRANCH, KEY, compute)
+    assert compute.calls == 2
+
+
+class Clock:
+    """
+    A monotonic clock moved by the tests.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> Clock:
+    clock = Clock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    return clock
+
+
+def test_users_expire_after_the_ttl(clock: Clock):
+    users = TTLCache(maxsize=10, ttl=5)
+    users.set("usr_1", {"id": "usr_1"})
+
+    clock.now += 4.9
+    assert users.get("usr_1") == {"id": "usr_1"}
+    clock.now += 0.1
+    assert users.get("usr_1") is None
+    stats = users.stats()
+    assert (stats["size"], stats["hits"], stats["misses"]) == (0, 1, 1)
+
+
+def test_least_recently_used_user_is_evicted(clock: Clock):
+    users = TTLCache(maxsize=2, ttl=5)
+    users.set("usr_1", {"id": "usr_1"})
+    users.set("usr_2", {"id": "usr_2"})
+    users.get("usr_1")
+
+    users.set("usr_3", {"id": "usr_3"})
+
+    assert users.get("usr_2") is None
+    assert users.get("usr_1") == {"id": "usr_1"}
+    assert users.get("usr_3") == {"id": "usr_3"}
+
+
+def test_invalidated_user_is_reloaded(clock: Clock):
+    users = TTLCache(maxsize=10, ttl=5)
+    users.set("usr_1", {"id": "usr_1"})
+    users.set("usr_2", {"id": "usr_2"})
+
+    users.invalidate("usr_1")
+
+    assert users.get("usr_1") is None
+    assert users.get("usr_2") == {"id": "usr_2"}
+
+
+@pytest.mark.parametrize(("maxsize", "ttl"), [(10, 0), (0, 5)])
+def test_user_cache_can_be_disabled(clock: Clock, maxsize: int, ttl: float):
+    users = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    users.set("usr_1", {"id": "usr_1"})
+
+    assert users.get("usr_1") is None
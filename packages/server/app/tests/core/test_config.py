@@ -0,0 +1,27 @@
+import pytest
+
+from app.core.config import Settings
+
+USER_CACHE = {"USER_CACHE_TTL_SECONDS": 60.0, "USER_CACHE_UNSYNCED_TTL_SECONDS": 5.0}
+
+
+@pytest.mark.parametrize(
+    ("pg_notify_enabled", "web_concurrency", "ttl"),
+    [(True, 4, 60.0), (False, 1, 60.0), (False, 4, 5.0)],
+)
+def test_user_cache_ttl_is_short_without_notifications_across_workers(
+    pg_notify_enabled: bool, web_concurrency: int, ttl: float
+):
+    settings = Settings(
+        **USER_CACHE,
+        PG_NOTIFY_ENABLED=pg_notify_enabled,
+        WEB_CONCURRENCY=web_concurrency,
+    )
+    assert settings.user_cache_ttl == ttl
+
+
+def test_user_cache_stays_disabled_without_notifications():
+    settings = Settings(
+        USER_CACHE_TTL_SECONDS=0, PG_NOTIFY_ENABLED=False, WEB_CONCURRENCY=4
+    )
+    assert settings.user_cache_ttl == 0
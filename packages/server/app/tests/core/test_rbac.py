@@ -0,0 +1,49 @@
+from itertools import combinations
+
+import pytest
+
+from app.core.rbac import AuthContext
+from app.models import ROLE_PERMISSIONS, Action, Resource, Role, User
+from app.utils import CustomException
+
+# Every non-empty set of actions on every resource
+CHECKS = [
+    (resource, list(actions))
+    for resource in Resource
+    for n in range(1, len(Action) + 1)
+    for actions in combinations(Action, n)
+]
+
+
+def table_allows(role: Role, resource: Resource, actions: list[Action]) -> bool:
+    """
+    The permission check as it was before the masks, walking ROLE_PERMISSIONS.
+    """
+    if role not in ROLE_PERMISSIONS:
+        return False
+    if resource not in ROLE_PERMISSIONS[role]:
+        return False
+    return all(action in ROLE_PERMISSIONS[role][resource] for action in actions)
+
+
+@pytest.mark.parametrize("role", list(Role))
+def test_masks_match_the_permission_table(role: Role):
+    auth = AuthContext(User(id="usr_1", role=role))
+
+    expected = [table_allows(role, resource, actions) for resource, actions in CHECKS]
+
+    assert [auth.can(resource, *actions) for resource, actions in CHECKS] == expected
+    assert auth.can_many(CHECKS) == expected
+    for (resource, actions), allowed in zip(CHECKS, expected, strict=True):
+        if allowed:
+            assert auth.require(resource, *actions) is auth.user
+        else:
+            with pytest.raises(CustomException) as e:
+                auth.require(resource, *actions)
+            assert e.value.status_code == 403
+
+
+def test_roles_without_permissions_are_denied():
+    auth = AuthContext(User.model_construct(id="usr_1", role="auditor"))
+
+    assert auth.can_many(CHECKS) == [False] * len(CHECKS)
@@ -0,0 +1,329 @@
+import importlib.util
+import socket
+import threading
+import time
+from collections.abc import Callable, Generator
+from pathlib import Path
+
+import httpx
+import pytest
+import uvicorn
+from fastapi import FastAPI
+from retell import APITimeoutError, BadRequestError, InternalServerError, Retell
+
+from app.core.config import settings
+from app.core.retell import (
+    OPERATION_TIMEOUTS,
+    CircuitBreaker,
+    RetellClient,
+    RetellUnavailableError,
+)
+
+FAILURE_THRESHOLD = 3
+RESET_AFTER = 30.0
+
+FAKE_RETELL_SERVER = Path(__file__).parents[3] / "scripts" / "fake_retell_server.py"
+
+REGISTER_CALL = {
+    "agent_id": "agent_1",
+    "audio_encoding": "s16le",
+    "audio_websocket_protocol": "web",
+    "sample_rate": 24000,
+}
+
+
+def expire(breaker: CircuitBreaker):
+    """
+    Moves the time the breaker opened back, as if `reset_after` had elapsed.
+    """
+    breaker.opened_at -= breaker.reset_after
+
+
+class StubTransport(httpx.MockTransport):
+    """
+    Answers the SDK's requests with `handler`, and keeps the requests sent.
+    """
+
+    def __init__(self, handler: Callable[[httpx.Request], httpx.Response]):
+        self.requests: list[httpx.Request] = []
+
+        def record(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            return handler(request)
+
+        super().__init__(record)
+
+
+def make_client(
+    transport: httpx.BaseTransport | None = None, base_url: str = "http://retell.test"
+) -> RetellClient:
+    client = RetellClient()
+    client.breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    client._http_client = httpx.Client(transport=transport)
+    client.sdk = Retell(
+        api_key="test",
+        base_url=base_url,
+        max_retries=0,
+        http_client=client._http_client,
+    )
+    return client
+
+
+def ok(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"llm_id": "llm_1", "call_id": "call_1"})
+
+
+def server_error(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(500, json={"error": "unavailable"})
+
+
+def bad_request(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(400, json={"error": "invalid"})
+
+
+@pytest.fixture(scope="module")
+def fake_retell_server() -> Generator[FastAPI, None, None]:
+    """
+    The app of scripts/fake_retell_server.py, served on a free local port. Its
+    URL is `app.state.base_url`.
+    """
+    spec = importlib.util.spec_from_file_location(
+        "fake_retell_server", FAKE_RETELL_SERVER
+    )
+    assert spec is not None and spec.loader is not None
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    host, port = sock.getsockname()
+    server = uvicorn.Server(uvicorn.Config(module.app, log_level="warning"))
+    thread = threading.Thread(target=server.run, kwargs={"sockets": [sock]})
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+    module.app.state.base_url = f"http://{host}:{port}"
+
+    yield module.app
+
+    server.should_exit = True
+    thread.join()
+    sock.close()
+
+
+@pytest.fixture
+def fake_retell(fake_retell_server: FastAPI) -> Generator[FastAPI, None, None]:
+    """
+    The fake Retell server, without the latency and failures injected by the test
+    once it ends.
+    """
+    yield fake_retell_server
+    fake_retell_server.state.latency = 0.0
+    fake_retell_server.state.failure_rate = 0.0
+
+
+def test_breaker_opens_after_consecutive_failures():
+    breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.before_request()
+        breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(RetellUnavailableError):
+        breaker.before_request()
+
+
+def test_breaker_success_resets_failures():
+    breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        breaker.record_failure()
+    breaker.record_success()
+    breaker.record_failure()
+    assert breaker.failures == 1
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_breaker_half_open_lets_a_single_trial_through():
+    breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    expire(breaker)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.before_request()
+    with pytest.raises(RetellUnavailableError):
+        breaker.before_request()
+
+
+def test_breaker_closes_after_successful_trial():
+    breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.failures == 0
+    breaker.before_request()
+
+
+def test_breaker_reopens_after_failed_trial():
+    breaker = CircuitBreaker(FAILURE_THRESHOLD, RESET_AFTER)
+    for _ in range(FAILURE_THRESHOLD):
+        breaker.record_failure()
+    expire(breaker)
+
+    breaker.before_request()
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(RetellUnavailableError):
+        breaker.before_request()
+
+
+def test_client_request_succeeds():
+    transport = StubTransport(ok)
+    client = make_client(transport)
+
+    llm = client.llm.retrieve("llm_1")
+
+    assert llm.llm_id == "llm_1"
+    assert transport.requests[0].url.path == "/get-retell-llm/llm_1"
+    stats = client.stats()
+    assert stats["circuit_breaker"] == {
+        "state": CircuitBreaker.CLOSED,
+        "consecutive_failures": 0,
+    }
+    operation = stats["operations"]["llm.retrieve"]
+    assert operation["requests"] == 1
+    assert operation["errors"] == 0
+    assert operation["rejected"] == 0
+    assert operation["p50_ms"] is not None
+
+
+def test_client_registers_a_call(fake_retell: FastAPI):
+    client = make_client(base_url=fake_retell.state.base_url)
+
+    llm = client.llm.create(general_prompt="Hello")
+    agent = client.agent.create(
+        llm_websocket_url=llm.llm_websocket_url, voice_id="voice_1"
+    )
+    call = client.call.register(**{**REGISTER_CALL, "agent_id": agent.agent_id})
+
+    assert call.agent_id == agent.agent_id
+    assert call.call_status == "registered"
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_server_errors_open_the_breaker(fake_retell: FastAPI):
+    fake_retell.state.failure_rate = 1.0
+    client = make_client(base_url=fake_retell.state.base_url)
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(InternalServerError):
+            client.llm.create(general_prompt="Hello")
+    assert client.breaker.state == CircuitBreaker.OPEN
+
+    # Rejected without calling Retell
+    with pytest.raises(RetellUnavailableError):
+        client.llm.create(general_prompt="Hello")
+
+    operation = client.stats()["operations"]["llm.create"]
+    assert operation["requests"] == FAILURE_THRESHOLD
+    assert operation["errors"] == FAILURE_THRESHOLD
+    assert operation["rejected"] == 1
+
+
+def test_client_closes_the_breaker_after_successful_trial(fake_retell: FastAPI):
+    fake_retell.state.failure_rate = 1.0
+    client = make_client(base_url=fake_retell.state.base_url)
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(InternalServerError):
+            client.llm.create(general_prompt="Hello")
+    fake_retell.state.failure_rate = 0.0
+    expire(client.breaker)
+
+    client.llm.create(general_prompt="Hello")
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_4xx_errors_dont_open_the_breaker():
+    transport = StubTransport(bad_request)
+    client = make_client(transport)
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(BadRequestError):
+            client.llm.retrieve("llm_1")
+
+    assert client.breaker.state == CircuitBreaker.CLOSED
+    assert client.stats()["operations"]["llm.retrieve"]["errors"] == FAILURE_THRESHOLD
+
+
+def test_client_4xx_errors_dont_reset_failures():
+    responses = iter([server_error] * (FAILURE_THRESHOLD - 1) + [bad_request])
+    transport = StubTransport(lambda request: next(responses)(request))
+    client = make_client(transport)
+    for _ in range(FAILURE_THRESHOLD - 1):
+        with pytest.raises(InternalServerError):
+            client.llm.retrieve("llm_1")
+
+    with pytest.raises(BadRequestError):
+        client.llm.retrieve("llm_1")
+    assert client.breaker.failures == FAILURE_THRESHOLD - 1
+
+
+def test_client_4xx_trial_releases_the_half_open_slot():
+    responses = iter([server_error] * FAILURE_THRESHOLD + [bad_request, ok])
+    transport = StubTransport(lambda request: next(responses)(request))
+    client = make_client(transport)
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(InternalServerError):
+            client.llm.retrieve("llm_1")
+    expire(client.breaker)
+
+    with pytest.raises(BadRequestError):
+        client.llm.retrieve("llm_1")
+    assert client.breaker.state == CircuitBreaker.HALF_OPEN
+
+    # The next request is the trial
+    client.llm.retrieve("llm_1")
+    assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_client_timeouts_count_as_failures(
+    fake_retell: FastAPI, monkeypatch: pytest.MonkeyPatch
+):
+    fake_retell.state.latency = 0.2
+    monkeypatch.setitem(OPERATION_TIMEOUTS, "llm.create", 0.05)
+    client = make_client(base_url=fake_retell.state.base_url)
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(APITimeoutError):
+            client.llm.create(general_prompt="Hello")
+
+    assert client.breaker.state == CircuitBreaker.OPEN
+    assert client.stats()["operations"]["llm.create"]["errors"] == FAILURE_THRESHOLD
+
+
+def test_client_sends_operation_timeouts():
+    transport = StubTransport(ok)
+    client = make_client(transport)
+
+    client.call.register(**REGISTER_CALL)
+    client.llm.retrieve("llm_1")
+
+    register, retrieve = (
+        request.extensions["timeout"] for request in transport.requests
+    )
+    assert register["read"] == OPERATION_TIMEOUTS["call.register"]
+    assert retrieve["read"] == settings.RETELL_TIMEOUT_SECONDS
+    assert register["connect"] == settings.RETELL_CONNECT_TIMEOUT_SECONDS
+
+
+def test_client_keeps_explicit_timeout():
+    transport = StubTransport(ok)
+    client = make_client(transport)
+
+    client.llm.retrieve("llm_1", timeout=1.5)
+
+    assert transport.requests[0].extensions["timeout"]["read"] == 1.5
@@ -0,0 +1,86 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.core import security
+from app.core.config import settings
+from app.core.security import (
+    PasswordHasherBusyError,
+    RevocationList,
+    hash_password,
+    verify_and_update_password,
+)
+
+TTL = 60.0
+
+
+def test_revocation_revokes_tokens_issued_before_the_change():
+    revoked = RevocationList(TTL)
+    changed_at = time.time()
+
+    revoked.revoke("usr_1", changed_at)
+
+    assert revoked.is_revoked("usr_1", changed_at - 1)
+    assert not revoked.is_revoked("usr_1", changed_at)
+    assert not revoked.is_revoked("usr_1", changed_at + 1)
+    assert not revoked.is_revoked("usr_2", changed_at - 1)
+
+
+def test_revocation_keeps_the_latest_change():
+    revoked = RevocationList(TTL)
+    changed_at = time.time()
+
+    revoked.revoke("usr_1", changed_at)
+    # e.g. a notification delivered late
+    revoked.revoke("usr_1", changed_at - 10)
+
+    assert revoked.is_revoked("usr_1", changed_at - 1)
+
+
+def test_tokens_without_issue_time_are_revoked():
+    assert RevocationList(TTL).is_revoked("usr_1", None)
+
+
+def test_revocations_expire_with_the_tokens():
+    revoked = RevocationList(TTL)
+    now = time.time()
+    revoked.revoke("usr_1", now - TTL - 1)
+
+    revoked.revoke("usr_2", now)
+
+    # The tokens usr_1's revocation applies to have expired
+    assert len(revoked) == 1
+    assert not revoked.is_revoked("usr_1", now - TTL - 2)
+    assert revoked.is_revoked("usr_2", now - 1)
+
+
+@pytest.fixture
+def threadpool_hasher(monkeypatch: pytest.MonkeyPatch):
+    """
+    Hashes in the threadpool, with a single pending hash allowed.
+    """
+    monkeypatch.setattr(settings, "PASSWORD_HASH_WORKERS", 0)
+    monkeypatch.setattr(security, "_pending", threading.BoundedSemaphore(1))
+
+
+def test_password_hashes_are_verified(threadpool_hasher: None):
+    hashed = asyncio.run(hash_password("password"))
+
+    assert asyncio.run(verify_and_update_password("password", hashed))[0]
+    assert not asyncio.run(verify_and_update_password("wrong", hashed))[0]
+
+
+def test_hashes_beyond_the_pending_limit_are_rejected(threadpool_hasher: None):
+    security._pending.acquire()
+    try:
+        with pytest.raises(PasswordHasherBusyError):
+            asyncio.run(hash_password("password"))
+        with pytest.raises(PasswordHasherBusyError):
+            asyncio.run(verify_and_update_password("password", "hash"))
+    finally:
+        security._pending.release()
+
+    # The rejected hashes didn't take a slot
+    assert asyncio.run(hash_password("password"))
@@ -0,0 +1,550 @@
+import random
+from datetime import datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import delete, text
+from sqlmodel import Session, select
+
+from app.core.cache import MetricsCache
+from app.core.config import settings
+from app.models import (
+    Branch,
+    CallType,
+    Event,
+    EventRollup,
+    EventType,
+    Granularity,
+    LeadStatus,
+    LeadType,
+    ObjectType,
+    get_id,
+)
+from app.services import event_service, metrics_service
+from app.services.event_service import EventService
+from app.services.metrics_service import (
+    FUNNEL_STAGE_KEYS,
+    MetricsService,
+    rollup_days,
+    rollup_midnight,
+)
+from app.services.rollup_service import RollupService
+
+# The events of the tests are spread over the 60 days from EPOCH
+EPOCH = datetime(2026, 3, 1, tzinfo=timezone.utc)
+DAYS = 60
+
+# Ranges starting and ending within a day, at local midnights
+# (METRICS_ROLLUP_TIMEZONE), within a single day, and over all the events
+RANGES = [
+    (EPOCH + timedelta(days=10, hours=5, minutes=17), EPOCH + timedelta(days=24.6)),
+    (EPOCH + timedelta(days=19, hours=18.5), EPOCH + timedelta(days=33, hours=18.5)),
+    (EPOCH + timedelta(days=3, hours=1), EPOCH + timedelta(days=3, hours=7)),
+    (EPOCH, EPOCH + timedelta(days=DAYS)),
+]
+
+
+def make_event(branch: Branch, name: EventType, created_at: datetime, **data) -> Event:
+    return Event(
+        id=get_id(ObjectType.EVENT),
+        name=name.value,
+        data=data,
+        branch_id=branch.id,
+        organization_id=branch.organization_id,
+        created_at=created_at,
+        lead_id=data.get("lead_id"),
+        status=data.get("status"),
+        lead_type=data.get("type"),
+        call_type=data.get("call_type"),
+        duration_seconds=data.get("duration_ms", 0) // 1000 or None,
+    )
+
+
+def add_events(db: Session, *events: Event) -> list[Event]:
+    """
+    Adds events and their rollups.
+    """
+    db.add_all(events)
+    db.flush()
+    for event in events:
+        RollupService(db).record_event(event)
+    db.commit()
+    return list(events)
+
+
+def random_events(branch: Branch, seed: int = 0) -> list[Event]:
+    """
+    Random lead and call events of a few leads over the days from EPOCH.
+    """
+    rng = random.Random(seed)
+
+    def event(name: EventType, **data) -> Event:
+        created_at = EPOCH + timedelta(seconds=rng.randrange(DAYS * 24 * 3600))
+        return make_event(branch, name, created_at, **data)
+
+    events = []
+    for _ in range(15):
+        lead_id = get_id(ObjectType.LEAD)
+        lead_type = rng.choice(list(LeadType)).value
+        events.append(event(EventType.LEAD_CREATED, lead_id=lead_id, type=lead_type))
+        for _ in range(rng.randrange(8)):
+            status = rng.choice(list(LeadStatus)).value
+            events.append(
+                event(EventType.LEAD_STATUS_UPDATED, lead_id=lead_id, status=status)
+            )
+        for _ in range(rng.randrange(6)):
+            call_type = rng.choice(list(CallType)).value
+            duration_ms = rng.randrange(1000, 600_000)
+            events += [
+                event(EventType.CALL_STARTED, lead_id=lead_id, call_type=call_type),
+                event(EventType.CALL_ENDED, lead_id=lead_id, duration_ms=duration_ms),
+            ]
+    return events
+
+
+def old_funnel_metrics(
+    db: Session, branch_id: str, start: datetime, end: datetime
+) -> dict:
+    """
+    The funnel metrics as they were computed before the FILTER aggregates: one
+    COUNT(DISTINCT) subquery per stage, over the JSON data of the events.
+    """
+    count = text("""
+        SELECT COUNT(DISTINCT data->>'lead_id') FROM events
+        WHERE name = :name
+        AND data->>:field = :value
+        AND branch_id = :branch_id
+        AND created_at BETWEEN :start AND :end
+    """)
+    stages = {
+        "lead_created_suspect": (EventType.LEAD_CREATED, "type", LeadType.SUSPECT),
+        **{
+            key: (EventType.LEAD_STATUS_UPDATED, "status", status)
+            for status, key in FUNNEL_STAGE_KEYS.items()
+        },
+    }
+    return {
+        key: db.exec(
+            count,
+            params={
+                "name": name.value,
+                "field": field,
+                "value": value.value,
+                "branch_id": branch_id,
+                "start": start,
+                "end": end,
+            },
+        ).one()[0]
+        for key, (name, field, value) in stages.items()
+    }
+
+
+def expected_call_metrics(events: list[Event], start: datetime, end: datetime) -> dict:
+    """
+    The call metrics of the events created in the range, the end included.
+    """
+    events = [e for e in events if start <= e.created_at <= end]
+    started = [e for e in events if e.name == EventType.CALL_STARTED.value]
+    durations = [
+        e.duration_seconds for e in events if e.name == EventType.CALL_ENDED.value
+    ]
+    return {
+        "event_count_call_started": len(started),
+        "event_count_appointment_call": sum(
+            e.call_type == CallType.APPOINTMENT_CALL.value for e in started
+        ),
+        "event_count_meeting_call": sum(
+            e.call_type == CallType.MEETING_CALL.value for e in started
+        ),
+        "duration_sum": sum(durations) / 60.0 if durations else None,
+    }
+
+
+def expected_daily_graph(
+    events: list[Event], start: datetime, end: datetime, tz: str
+) -> list[dict]:
+    """
+    The calls and their duration of each local day of the range, in `tz`.
+    """
+    zone = ZoneInfo(tz)
+    days = {}
+    day, last_day = start.astimezone(zone).date(), end.astimezone(zone).date()
+    while day <= last_day:
+        days[day] = {
+            "event_date": datetime.combine(day, time.min, tzinfo=zone),
+            "call_count": 0,
+            "total_duration_minutes": 0,
+        }
+        day += timedelta(days=1)
+    for event in events:
+        if not start <= event.created_at <= end:
+            continue
+        point = days[event.created_at.astimezone(zone).date()]
+        if event.name == EventType.CALL_STARTED.value:
+            point["call_count"] += 1
+        elif event.name == EventType.CALL_ENDED.value:
+            point["total_duration_minutes"] += event.duration_seconds / 60.0
+    return list(days.values())
+
+
+def total(metrics: list[dict]) -> dict:
+    """
+    Sums the metrics of branches, None where none of them has a value.
+    """
+    totals = {}
+    for key in metrics[0]:
+        values = [m[key] for m in metrics if m[key] is not None]
+        totals[key] = sum(values) if values else None
+    return totals
+
+
+def rollups(db: Session, branch: Branch) -> list[tuple]:
+    """
+    The rollup rows of a branch, without their update time.
+    """
+    columns = [c for c in EventRollup.__table__.c if c.name != "updated_at"]
+    query = select(*columns).where(EventRollup.branch_id == branch.id)
+    return sorted(db.exec(query).all())
+
+
+@pytest.fixture(autouse=True)
+def uncached(monkeypatch: pytest.MonkeyPatch):
+    """
+    Computes the metrics on every call.
+    """
+    monkeypatch.setattr(metrics_service, "metrics_cache", MetricsCache(0, 0))
+
+
+@pytest.fixture
+def events(db: Session, branch: Branch) -> list[Event]:
+    return add_events(db, *random_events(branch))
+
+
+@pytest.fixture
+def from_events(monkeypatch: pytest.MonkeyPatch):
+    """
+    Computes the metrics from the events only, without the rollups.
+    """
+    monkeypatch.setattr(settings, "METRICS_USE_ROLLUPS", False)
+
+
+def test_funnel_metrics_match_the_per_stage_counts(
+    db: Session, branch: Branch, events: list[Event], from_events: None
+):
+    for start, end in RANGES:
+        metrics = MetricsService(db).get_funnel_metrics(start, end, branch.id)
+        assert metrics == old_funnel_metrics(db, branch.id, start, end)
+
+
+def test_call_metrics_match_the_events(
+    db: Session, branch: Branch, events: list[Event], from_events: None
+):
+    for start, end in RANGES:
+        metrics = MetricsService(db).get_call_metrics(start, end, branch.id)
+        assert metrics == pytest.approx(expected_call_metrics(events, start, end))
+
+
+def test_metrics_of_created_events_match_their_data(db: Session, branch: Branch):
+    # Enums, as passed by the routes, and durations in both formats
+    lead_id = get_id(ObjectType.LEAD)
+    for name, data in [
+        (EventType.LEAD_CREATED, {"lead_id": lead_id, "type": LeadType.SUSPECT}),
+        (
+            EventType.LEAD_STATUS_UPDATED,
+            {"lead_id": lead_id, "status": LeadStatus.CALL_CLOSED},
+        ),
+        (
+            EventType.CALL_STARTED,
+            {"lead_id": lead_id, "call_type": CallType.MEETING_CALL},
+        ),
+        (EventType.CALL_ENDED, {"lead_id": lead_id, "duration_ms": 90_500}),
+        (EventType.CALL_ENDED, {"lead_id": lead_id, "duration": "2:05"}),
+    ]:
+        EventService(db).create_event(name, data, branch.id, branch.organization_id)
+    now = datetime.now(timezone.utc)
+    start, end = now - timedelta(hours=1), now + timedelta(hours=1)
+    service = MetricsService(db)
+
+    funnel = service.get_funnel_metrics(start, end, branch.id)
+    assert funnel == old_funnel_metrics(db, branch.id, start, end)
+    assert funnel["lead_created_suspect"] == funnel["call_closed"] == 1
+    assert service.get_call_metrics(start, end, branch.id) == pytest.approx(
+        {
+            "event_count_call_started": 1,
+            "event_count_appointment_call": 0,
+            "event_count_meeting_call": 1,
+            "duration_sum": (90 + 125) / 60.0,
+        }
+    )
+
+
+def test_trends_split_the_current_and_previous_periods(
+    db: Session, branch: Branch, events: list[Event]
+):
+    service = MetricsService(db)
+    for start, end in RANGES:
+        # Events at the bounds of the current period, the end included
+        lead_id = get_id(ObjectType.LEAD)
+        events += add_events(
+            db,
+            make_event(
+                branch, EventType.LEAD_CREATED, start, lead_id=lead_id, type="suspect"
+            ),
+            make_event(branch, EventType.CALL_STARTED, start, lead_id=lead_id),
+            make_event(branch, EventType.CALL_STARTED, end, lead_id=lead_id),
+        )
+        # The previous period ends where the current one starts, excluded
+        length = end - start + timedelta(microseconds=1)
+        previous = (start - length, start - timedelta(microseconds=1))
+
+        funnel = service.get_funnel_metrics_with_trends(start, end, branch.id)
+        call = service.get_call_metrics_with_trends(start, end, branch.id)
+
+        assert funnel["funnel_metrics"] == old_funnel_metrics(db, branch.id, start, end)
+        assert funnel["previous_funnel_metrics"] == old_funnel_metrics(
+            db, branch.id, *previous
+        )
+        assert call["call_metrics"] == pytest.approx(
+            expected_call_metrics(events, start, end)
+        )
+        assert call["previous_call_metrics"] == pytest.approx(
+            expected_call_metrics(events, *previous)
+        )
+        assert call["call_trends"] == service._trends(
+            call["call_metrics"], call["previous_call_metrics"]
+        )
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Asia/Kolkata", "America/New_York"])
+def test_call_graph_is_dense_in_local_days(
+    db: Session, branch: Branch, events: list[Event], tz: str
+):
+    service = MetricsService(db)
+    for start, end in RANGES:
+        graph = service.get_call_graph_metrics(
+            start, end, Granularity.DAY, branch.id, tz
+        )
+        expected = expected_daily_graph(events, start, end, tz)
+        for key in ("event_date", "call_count"):
+            assert [p[key] for p in graph["series"]] == [p[key] for p in expected]
+        assert [p["total_duration_minutes"] for p in graph["series"]] == (
+            pytest.approx([p["total_duration_minutes"] for p in expected])
+        )
+
+
+def test_call_graph_buckets_split_at_local_midnight(db: Session, branch: Branch):
+    midnight = datetime(2026, 3, 11, tzinfo=ZoneInfo("Asia/Kolkata"))
+    add_events(
+        db,
+        make_event(branch, EventType.CALL_STARTED, midnight - timedelta(seconds=1)),
+        make_event(branch, EventType.CALL_STARTED, midnight),
+    )
+    start, end = midnight - timedelta(days=1), midnight + timedelta(hours=12)
+    service = MetricsService(db)
+
+    local = service.get_call_graph_metrics(
+        start, end, Granularity.DAY, branch.id, "Asia/Kolkata"
+    )
+    utc = service.get_call_graph_metrics(start, end, Granularity.DAY, branch.id, "UTC")
+
+    assert [(p["event_date"], p["call_count"]) for p in local["series"]] == [
+        (midnight - timedelta(days=1), 1),
+        (midnight, 1),
+    ]
+    # Both are on March 10 in UTC, 18:29:59 and 18:30
+    assert [p["call_count"] for p in utc["series"]] == [0, 2, 0]
+
+
+def test_call_graph_buckets_follow_dst(db: Session, branch: Branch):
+    # Clocks go forward on March 8, 2026 in New York
+    zone = ZoneInfo("America/New_York")
+    start = datetime(2026, 3, 7, 12, tzinfo=zone)
+    end = datetime(2026, 3, 9, 12, tzinfo=zone)
+
+    graph = MetricsService(db).get_call_graph_metrics(
+        start, end, Granularity.DAY, branch.id, "America/New_York"
+    )
+
+    assert [p["event_date"] for p in graph["series"]] == [
+        datetime(2026, 3, day, tzinfo=zone) for day in (7, 8, 9)
+    ]
+    assert [p["event_date"].utcoffset() for p in graph["series"]] == [
+        timedelta(hours=-5),
+        timedelta(hours=-5),
+        timedelta(hours=-4),
+    ]
+    assert all(p["call_count"] == 0 for p in graph["series"])
+
+
+def test_org_metrics_total_the_branches(
+    db: Session, branch: Branch, events: list[Event]
+):
+    org_id = branch.organization_id
+    other, empty, deleted = (
+        Branch(id=get_id(ObjectType.BRANCH), name=name, organization_id=org_id)
+        for name in ("Other", "Empty", "Deleted")
+    )
+    deleted.deleted_at = EPOCH
+    db.add_all([other, empty, deleted])
+    db.commit()
+    add_events(db, *random_events(other, seed=1), *random_events(deleted, seed=2))
+    branches = sorted([branch, other, empty], key=lambda b: b.id)
+    service = MetricsService(db)
+
+    for start, end in RANGES:
+        funnel = service.get_org_funnel_metrics(start, end, org_id)
+        call = service.get_org_call_metrics(start, end, org_id)
+
+        for metrics, get_metrics in [
+            (funnel, service.get_funnel_metrics),
+            (call, service.get_call_metrics),
+        ]:
+            expected = [get_metrics(start, end, b.id) for b in branches]
+            assert metrics["branches"] == [
+                {"branch_id": b.id, **m}
+                for b, m in zip(branches, expected, strict=True)
+            ]
+            # The leads of the branches are distinct, so their counts add up
+            assert metrics["total"] == pytest.approx(total(expected))
+
+    selected = service.get_org_call_metrics(
+        EPOCH, EPOCH + timedelta(days=DAYS), org_id, [other.id, deleted.id]
+    )
+    assert [m["branch_id"] for m in selected["branches"]] == [other.id]
+
+
+def test_org_call_graph_totals_the_branches(
+    db: Session, branch: Branch, events: list[Event]
+):
+    org_id = branch.organization_id
+    other = Branch(id=get_id(ObjectType.BRANCH), name="Other", organization_id=org_id)
+    db.add(other)
+    db.commit()
+    add_events(db, *random_events(other, seed=1))
+    branches = sorted([branch, other], key=lambda b: b.id)
+    service = MetricsService(db)
+
+    for start, end in RANGES:
+        graph = service.get_org_call_graph_metrics(
+            start, end, Granularity.DAY, org_id, tz="Asia/Kolkata"
+        )
+        expected = [
+            service.get_call_graph_metrics(
+                start, end, Granularity.DAY, b.id, "Asia/Kolkata"
+            )
+            for b in branches
+        ]
+        assert graph["branches"] == [
+            {"branch_id": b.id, **g} for b, g in zip(branches, expected, strict=True)
+        ]
+        assert [p["call_count"] for p in graph["total"]["series"]] == [
+            sum(points)
+            for points in zip(
+                *([p["call_count"] for p in g["series"]] for g in expected),
+                strict=True,
+            )
+        ]
+
+
+def test_rollups_give_the_metrics_of_the_events(
+    db: Session, branch: Branch, events: list[Event], monkeypatch: pytest.MonkeyPatch
+):
+    service = MetricsService(db)
+    org_id = branch.organization_id
+
+    def all_metrics(start: datetime, end: datetime) -> list:
+        return [
+            service.get_funnel_metrics_with_trends(start, end, branch.id),
+            service.get_call_metrics_with_trends(start, end, branch.id),
+            service.get_org_funnel_metrics(start, end, org_id),
+            *(
+                service.get_dashboard_metrics(start, end, granularity, branch.id, tz)
+                for granularity in (Granularity.DAY, Granularity.WEEK)
+                for tz in ("Asia/Kolkata", "UTC")
+            ),
+        ]
+
+    for start, end in RANGES:
+        monkeypatch.setattr(settings, "METRICS_USE_ROLLUPS", True)
+        from_rollups = all_metrics(start, end)
+        monkeypatch.setattr(settings, "METRICS_USE_ROLLUPS", False)
+        assert from_rollups == all_metrics(start, end)
+
+
+def test_rollups_serve_the_whole_local_days(
+    db: Session, branch: Branch, events: list[Event]
+):
+    service = MetricsService(db)
+    start, end = RANGES[0]
+    funnel = service.get_funnel_metrics(start, end, branch.id)
+    call = service.get_call_metrics(start, end, branch.id)
+
+    # Only the parts of days around the whole days are read from the events
+    (first_day, last_day), _ = rollup_days(start, end)
+    db.exec(
+        delete(Event).where(
+            Event.branch_id == branch.id,
+            Event.created_at >= rollup_midnight(first_day),
+            Event.created_at < rollup_midnight(last_day + timedelta(days=1)),
+        )
+    )
+    db.commit()
+
+    assert service.get_funnel_metrics(start, end, branch.id) == funnel
+    assert service.get_call_metrics(start, end, branch.id) == call
+
+
+def test_recorded_rollups_match_a_rebuild(
+    db: Session, branch: Branch, events: list[Event]
+):
+    recorded = rollups(db, branch)
+
+    RollupService(db).rebuild(branch.id)
+    assert rollups(db, branch) == recorded
+
+    since = (EPOCH + timedelta(days=DAYS / 2)).date()
+    RollupService(db).rebuild(branch.id, since=since)
+    assert rollups(db, branch) == recorded
+
+
+@pytest.mark.parametrize("tz", ["UTC", "Asia/Kolkata"])
+def test_dashboard_bundles_the_metrics_endpoints(
+    db: Session, branch: Branch, events: list[Event], tz: str
+):
+    service = MetricsService(db)
+    for start, end in RANGES:
+        dashboard = service.get_dashboard_metrics(
+            start, end, Granularity.DAY, branch.id, tz
+        )
+
+        assert dashboard == {
+            **service.get_funnel_metrics_with_trends(start, end, branch.id),
+            **service.get_call_metrics_with_trends(start, end, branch.id),
+            "call_graph": service.get_call_graph_metrics(
+                start, end, Granularity.DAY, branch.id, tz
+            ),
+        }
+
+
+def test_created_events_invalidate_the_cached_metrics_of_their_branch(
+    db: Session, branch: Branch, monkeypatch: pytest.MonkeyPatch
+):
+    cache = MetricsCache(maxsize=10, ttl=60)
+    for module in (metrics_service, event_service):
+        monkeypatch.setattr(module, "metrics_cache", cache)
+    now = datetime.now(timezone.utc)
+    start, end = now - timedelta(hours=1), now + timedelta(hours=1)
+    service = MetricsService(db)
+    data = {"lead_id": get_id(ObjectType.LEAD), "call_type": CallType.MEETING_CALL}
+
+    assert (
+        service.get_call_metrics(start, end, branch.id)
+        == metrics_service.EMPTY_CALL_METRICS
+    )
+    EventService(db).create_event(
+        EventType.CALL_STARTED, data, branch.id, branch.organization_id
+    )
+
+    metrics = service.get_call_metrics(start, end, branch.id)
+    assert metrics["event_count_call_started"] == 1
+    assert service.get_call_metrics(start, end, branch.id) is metrics
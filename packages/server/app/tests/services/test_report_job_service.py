@@ -0,0 +1,183 @@
+import threading
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import update
+from sqlalchemy.engine import Engine
+from sqlmodel import Session
+
+from app.core.db import UNIT_OF_WORK
+from app.models import Branch, ReportJob, ReportJobStatus
+from app.services.report_job_service import ReportJobService
+
+BACKOFF_SECONDS = 10
+MAX_BACKOFF_SECONDS = 60
+STALE_AFTER = timedelta(minutes=10)
+
+
+def enqueue(db: Session, branch: Branch, max_attempts: int = 3) -> ReportJob:
+    return ReportJobService(db).enqueue_job(
+        call_id="call_test",
+        branch_id=branch.id,
+        org_id=branch.organization_id,
+        payload={"data": {}},
+        max_attempts=max_attempts,
+    )
+
+
+def fail(db: Session, job: ReportJob, worker_id: str) -> bool:
+    return ReportJobService(db).fail_job(
+        job,
+        worker_id=worker_id,
+        error="boom",
+        backoff_seconds=BACKOFF_SECONDS,
+        max_backoff_seconds=MAX_BACKOFF_SECONDS,
+    )
+
+
+def make_runnable(db: Session, job: ReportJob):
+    db.exec(
+        update(ReportJob)
+        .where(ReportJob.id == job.id)
+        .values(run_after=datetime.now(tz=timezone.utc))
+    )
+    db.commit()
+
+
+def make_stale(db: Session, job: ReportJob):
+    db.exec(
+        update(ReportJob)
+        .where(ReportJob.id == job.id)
+        .values(locked_at=datetime.now(tz=timezone.utc) - STALE_AFTER * 2)
+    )
+    db.commit()
+
+
+def test_claim_skips_jobs_locked_by_another_worker(
+    db: Session, engine: Engine, branch: Branch
+):
+    first, second = enqueue(db, branch), enqueue(db, branch)
+
+    # The first claim is not committed yet, its row stays locked
+    with Session(engine) as other:
+        other.info[UNIT_OF_WORK] = True
+        claimed = ReportJobService(other).claim_job("worker_1")
+        assert claimed.id == first.id
+
+        assert ReportJobService(db).claim_job("worker_2").id == second.id
+        assert ReportJobService(db).claim_job("worker_3") is None
+        other.commit()
+
+    db.refresh(first)
+    assert first.status == ReportJobStatus.RUNNING
+    assert first.locked_by == "worker_1"
+    assert first.attempts == 1
+
+
+def test_concurrent_claims_never_share_a_job(
+    db: Session, engine: Engine, branch: Branch
+):
+    jobs = {enqueue(db, branch).id for _ in range(20)}
+    claims: list[tuple[str, str]] = []
+    start = threading.Barrier(5)
+
+    def work(worker_id: str):
+        with Session(engine) as session:
+            start.wait()
+            while job := ReportJobService(session).claim_job(worker_id):
+                claims.append((job.id, worker_id))
+
+    threads = [threading.Thread(target=work, args=(f"worker_{i}",)) for i in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    claimed = [job_id for job_id, _ in claims]
+    assert sorted(claimed) == sorted(jobs)
+
+
+def test_failed_job_is_retried_after_backoff(db: Session, branch: Branch):
+    job = enqueue(db, branch)
+    service = ReportJobService(db)
+
+    claimed = service.claim_job("worker_1")
+    before = datetime.now(tz=timezone.utc)
+    assert fail(db, claimed, "worker_1")
+
+    db.refresh(job)
+    assert job.status == ReportJobStatus.PENDING
+    assert job.last_error == "boom"
+    assert job.locked_by is None
+    assert job.run_after >= before + timedelta(seconds=BACKOFF_SECONDS)
+    # Not runnable until the backoff elapsed
+    assert service.claim_job("worker_1") is None
+
+    make_runnable(db, job)
+    claimed = service.claim_job("worker_2")
+    assert claimed.id == job.id
+    assert claimed.attempts == 2
+
+    # The delay doubles with each attempt
+    before = datetime.now(tz=timezone.utc)
+    assert fail(db, claimed, "worker_2")
+    db.refresh(job)
+    assert job.run_after >= before + timedelta(seconds=BACKOFF_SECONDS * 2)
+    assert job.run_after < before + timedelta(seconds=BACKOFF_SECONDS * 3)
+
+
+def test_job_fails_after_max_attempts(db: Session, branch: Branch):
+    job = enqueue(db, branch, max_attempts=2)
+    service = ReportJobService(db)
+
+    assert fail(db, service.claim_job("worker_1"), "worker_1")
+    make_runnable(db, job)
+    assert fail(db, service.claim_job("worker_1"), "worker_1")
+
+    db.refresh(job)
+    assert job.status == ReportJobStatus.FAILED
+    assert job.attempts == 2
+    make_runnable(db, job)
+    assert service.claim_job("worker_1") is None
+
+
+def test_recover_releases_stale_jobs(db: Session, branch: Branch):
+    retried, exhausted, running = (
+        enqueue(db, branch, max_attempts=2),
+        enqueue(db, branch, max_attempts=1),
+        enqueue(db, branch),
+    )
+    service = ReportJobService(db)
+    for _ in range(3):
+        service.claim_job("worker_1")
+    make_stale(db, retried)
+    make_stale(db, exhausted)
+
+    assert service.recover_stale_jobs(STALE_AFTER) == 2
+
+    for job in (retried, exhausted, running):
+        db.refresh(job)
+    assert retried.status == ReportJobStatus.PENDING
+    assert retried.locked_by is None
+    assert exhausted.status == ReportJobStatus.FAILED
+    assert running.status == ReportJobStatus.RUNNING
+    assert service.claim_job("worker_2").id == retried.id
+
+
+def test_worker_that_lost_a_job_cant_complete_or_fail_it(db: Session, branch: Branch):
+    job = enqueue(db, branch)
+    service = ReportJobService(db)
+    stale = service.claim_job("worker_1")
+    make_stale(db, job)
+    service.recover_stale_jobs(STALE_AFTER)
+    service.claim_job("worker_2")
+
+    assert not service.complete_job(job.id, "worker_1")
+    assert not fail(db, stale, "worker_1")
+    db.refresh(job)
+    assert job.status == ReportJobStatus.RUNNING
+    assert job.locked_by == "worker_2"
+
+    assert service.complete_job(job.id, "worker_2")
+    db.refresh(job)
+    assert job.status == ReportJobStatus.COMPLETED
+    assert job.completed_at is not None
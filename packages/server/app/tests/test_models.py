@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app import models
+from app.models import ID_ALPHABET, ObjectType, get_id
+
+PREFIX = "call_"
+
+
+@pytest.fixture
+def frozen_clock(monkeypatch: pytest.MonkeyPatch) -> list[int]:
+    """
+    The nanoseconds returned by `time.time_ns` to `get_id`, moved by the tests.
+    """
+    now = [time.time_ns()]
+    monkeypatch.setattr(models.time, "time_ns", lambda: now[0])
+    return now
+
+
+def test_ids_keep_the_format_of_the_random_ids():
+    id = get_id(ObjectType.CALL)
+
+    assert id.startswith(PREFIX)
+    assert len(id) == len(PREFIX) + 21
+    assert set(id.removeprefix(PREFIX)) <= set(ID_ALPHABET)
+
+
+def test_ids_of_one_millisecond_are_sorted(frozen_clock: list[int]):
+    ids = [get_id(ObjectType.CALL) for _ in range(1000)]
+
+    assert sorted(ids) == ids
+    assert len(set(ids)) == len(ids)
+
+
+def test_ids_are_sorted_by_creation_time(frozen_clock: list[int]):
+    ids = []
+    for _ in range(100):
+        ids.append(get_id(ObjectType.CALL))
+        frozen_clock[0] += 1_000_000
+
+    assert sorted(ids) == ids
+
+
+def test_ids_stay_sorted_when_the_clock_goes_back(frozen_clock: list[int]):
+    first = get_id(ObjectType.CALL)
+    frozen_clock[0] -= 60 * 1_000_000_000
+
+    assert get_id(ObjectType.CALL) > first
+
+
+def test_ids_of_concurrent_threads_are_unique(frozen_clock: list[int]):
+    with ThreadPoolExecutor(8) as executor:
+        ids = list(executor.map(lambda _: get_id(ObjectType.CALL), range(4000)))
+
+    assert len(set(ids)) == len(ids)
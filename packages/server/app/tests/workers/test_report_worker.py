@@ -0,0 +1,58 @@
+import pytest
+from sqlmodel import Session
+
+from app.models import Call, ReportJob, ReportJobStatus
+from app.services.report_job_service import ReportJobService
+from app.workers.report_worker import ReportWorkerPool
+
+
+@pytest.fixture
+def job(db: Session, call: Call) -> ReportJob:
+    ReportJobService(db).enqueue_job(
+        call_id=call.id,
+        branch_id=call.branch_id,
+        org_id=call.organization_id,
+        payload={"data": {}},
+        max_attempts=3,
+    )
+    return ReportJobService(db).claim_job("worker_1")
+
+
+def test_store_report_completes_the_job(db: Session, call: Call, job: ReportJob):
+    pool = ReportWorkerPool(concurrency=1, poll_interval=1)
+
+    assert pool._store_report(job, "worker_1", '{"summary": "ok"}')
+
+    db.refresh(call)
+    db.refresh(job)
+    assert call.report == '{"summary": "ok"}'
+    assert job.status == ReportJobStatus.COMPLETED
+
+
+def test_store_report_is_discarded_when_the_job_was_lost(
+    db: Session, call: Call, job: ReportJob
+):
+    pool = ReportWorkerPool(concurrency=1, poll_interval=1)
+
+    assert not pool._store_report(job, "worker_2", '{"summary": "ok"}')
+
+    db.refresh(call)
+    db.refresh(job)
+    assert call.report is None
+    assert job.status == ReportJobStatus.RUNNING
+
+
+def test_store_report_is_rolled_back_with_the_job(
+    db: Session, call: Call, job: ReportJob, monkeypatch: pytest.MonkeyPatch
+):
+    def crash(self, job_id: str, worker_id: str) -> bool:
+        raise RuntimeError("crashed")
+
+    monkeypatch.setattr(ReportJobService, "complete_job", crash)
+    pool = ReportWorkerPool(concurrency=1, poll_interval=1)
+
+    with pytest.raises(RuntimeError):
+        pool._store_report(job, "worker_1", '{"summary": "ok"}')
+
+    db.refresh(call)
+    assert call.report is None
@@ -1,3 +1,7 @@
+import base64
+import json
+from datetime import datetime, timezone
+
 from fastapi.responses import JSONResponse
 from fastapi.routing import APIRoute
 
@@ -6,6 +10,19 @@ def custom_generate_unique_id(route: APIRoute) -> str:
     return f"{route.tags[0]}-{route.name}"
 
 
+class CustomException(Exception):
+    """
+    Error response raised where it can't be returned, e.g. from dependencies.
+    Rendered like `raise_custom_exception` by the app's exception handler.
+    """
+
+    def __init__(self, status_code: int, message: str, detail=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.message = message
+        self.detail = detail
+
+
 def raise_custom_exception(status_code: int, message: str, detail=None):
     return JSONResponse(
         {"error": {"message": message, "detail": detail}},
@@ -13,12 +30,57 @@ def raise_custom_exception(status_code: int, message: str, detail=None):
     )
 
 
-def timestamp_diff_to_ms(start_timestamp, end_timestamp):
+def timestamp_diff_to_ms(start_timestamp: int, end_timestamp: int) -> int:
+    """
+    Calculate the difference between two timestamps in milliseconds since the epoch
+    """
+    return end_timestamp - start_timestamp
+
+
+def timestamp_to_datetime(timestamp: int) -> datetime:
+    """
+    Convert a timestamp in milliseconds since the epoch to a UTC datetime
+    """
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc)
+
+
+def format_duration(duration_ms: int | None) -> str | None:
     """
-    Calculate the difference between two timestamps and return the duration in M:S format
+    Format a duration in milliseconds in M:S format, for display
     """
-    diff_ms = end_timestamp - start_timestamp
-    seconds = diff_ms // 1000
-    minutes = seconds // 60
-    seconds %= 60
+    if duration_ms is None:
+        return None
+    minutes, seconds = divmod(duration_ms // 1000, 60)
     return f"{minutes}:{seconds:02d}"
+
+
+def duration_to_seconds(duration: str | None) -> int:
+    """
+    Convert a duration in M:S format back to seconds. Only events recorded
+    before durations were stored in milliseconds have one
+    """
+    if not duration:
+        return 0
+    minutes, _, seconds = duration.partition(":")
+    return int(minutes) * 60 + int(seconds or 0)
+
+
+def encode_cursor(created_at: datetime, id: str) -> str:
+    """
+    Encode the position of the last row of a page into an opaque pagination cursor
+    """
+    data = json.dumps([created_at.isoformat(), id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    """
+    Decode a pagination cursor created by `encode_cursor`. Raises ValueError if the
+    cursor is malformed
+    """
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, id = json.loads(data)
+        return datetime.fromisoformat(created_at), str(id)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import socket
+from datetime import timedelta
+
+from sqlmodel import Session
+
+from app.api.routes.calls import report_generator
+from app.core.config import settings
+from app.core.db import UNIT_OF_WORK, engine
+from app.models import ReportJob
+from app.services.call_service import CallService
+from app.services.report_job_service import ReportJobService
+
+logger = logging.getLogger("uvicorn")
+
+
+class ReportWorkerPool:
+    """
+    Pool of asyncio workers that drain the `report_jobs` outbox.
+
+    Each worker claims one job at a time, generates the call report and stores it
+    on the call. Failed attempts are retried with exponential backoff, and jobs
+    abandoned by a crashed process are periodically released for another worker.
+    """
+
+    def __init__(self, concurrency: int, poll_interval: float):
+        """
+        Initializes the pool.
+
+        Args:
+            concurrency (int): The number of concurrent workers.
+            poll_interval (float): Seconds to wait between polls when the queue is empty.
+        """
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._prefix = f"{socket.gethostname()}:{os.getpid()}"
+
+    @property
+    def running(self) -> bool:
+        return any(not task.done() for task in self._tasks)
+
+    async def start(self):
+        """
+        Starts the workers, along with a task that periodically releases stale jobs.
+        """
+        if self.concurrency <= 0 or self.running:
+            return
+
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        self._tasks = [
+            asyncio.create_task(self._run(f"{self._prefix}:{i}"))
+            for i in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._recover()))
+        logger.info(f"Started {self.concurrency} report workers")
+
+    async def stop(self):
+        """
+        Stops the workers. Jobs interrupted mid-run are picked up again once their
+        lock goes stale.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def join(self):
+        """
+        Waits until every worker has exited.
+        """
+        await asyncio.gather(*self._tasks)
+
+    def notify(self):
+        """
+        Wakes idle workers up, so a freshly enqueued job doesn't wait for the next poll.
+        Can be called from any thread.
+        """
+        if self._wakeup is not None and not self._loop.is_closed():
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _run(self, worker_id: str):
+        while True:
+            try:
+                job = await asyncio.to_thread(self._claim_job, worker_id)
+            except Exception as e:
+                logger.error(f"Report worker {worker_id} failed to claim a job: {e}")
+                job = None
+
+            if job is None:
+                await self._wait_for_work()
+                continue
+
+            try:
+                await self._process(job, worker_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # The job stays locked until it goes stale and is released
+                logger.error(
+                    f"Report worker {worker_id} failed to record job {job.id}: {e}"
+                )
+
+    async def _recover(self):
+        while True:
+            try:
+                released = await asyncio.to_thread(self._recover_stale_jobs)
+                if released:
+                    logger.info(f"Released {released} stale report jobs")
+                    self.notify()
+            except Exception as e:
+                logger.error(f"Failed to release stale report jobs: {e}")
+            await asyncio.sleep(settings.REPORT_JOB_STALE_AFTER_SECONDS / 2)
+
+    async def _wait_for_work(self):
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _process(self, job: ReportJob, worker_id: str):
+        logger.info(f"Generating report for call {job.call_id} (job {job.id})")
+        try:
+            data = job.payload["data"]
+            report = await report_generator(
+                data["transcript"], data["metadata"].get("report_prompt", None)
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Report job {job.id} failed: {e}")
+            await asyncio.to_thread(self._fail_job, job, worker_id, str(e))
+            return
+
+        stored = await asyncio.to_thread(
+            self._store_report, job, worker_id, report.model_dump_json()
+        )
+        if stored:
+            logger.info(f"Call {job.call_id} report generated")
+
+    def _claim_job(self, worker_id: str) -> ReportJob | None:
+        with Session(engine) as session:
+            return ReportJobService(session).claim_job(worker_id)
+
+    def _store_report(self, job: ReportJob, worker_id: str, report: str) -> bool:
+        # The report and the job's completion are committed together, so a crash
+        # in between can't store the report and leave the job to run again
+        with Session(engine) as session:
+            session.info[UNIT_OF_WORK] = True
+            updated = CallService(session).update_call(
+                call_id=job.call_id, call={"report": report}
+            )
+            if not ReportJobService(session).complete_job(job.id, worker_id):
+                session.rollback()
+                logger.warning(
+                    f"Report job {job.id} was released while running, discarding "
+                    "its report"
+                )
+                return False
+            session.commit()
+
+        if not updated:
+            logger.warning(f"Call {job.call_id} not found, discarding its report")
+        return True
+
+    def _fail_job(self, job: ReportJob, worker_id: str, error: str):
+        with Session(engine) as session:
+            failed = ReportJobService(session).fail_job(
+                job,
+                worker_id=worker_id,
+                error=error,
+                backoff_seconds=settings.REPORT_JOB_BACKOFF_SECONDS,
+                max_backoff_seconds=settings.REPORT_JOB_MAX_BACKOFF_SECONDS,
+            )
+        if not failed:
+            logger.warning(f"Report job {job.id} was released while running")
+
+    def _recover_stale_jobs(self) -> int:
+        with Session(engine) as session:
+            return ReportJobService(session).recover_stale_jobs(
+                timedelta(seconds=settings.REPORT_JOB_STALE_AFTER_SECONDS)
+            )
+
+
+report_worker_pool = ReportWorkerPool(
+    concurrency=settings.REPORT_WORKER_CONCURRENCY,
+    poll_interval=settings.REPORT_WORKER_POLL_INTERVAL_SECONDS,
+)
+
+
+async def main() -> None:
+    """
+    Runs the pool on its own, e.g. as a dedicated worker container with
+    `REPORT_WORKER_CONCURRENCY=0` set on the API servers.
+    """
+    pool = ReportWorkerPool(
+        concurrency=max(settings.REPORT_WORKER_CONCURRENCY, 1),
+        poll_interval=settings.REPORT_WORKER_POLL_INTERVAL_SECONDS,
+    )
+    await pool.start()
+    try:
+        await pool.join()
+    finally:
+        await pool.stop()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
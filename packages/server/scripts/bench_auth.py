@@ -0,0 +1,119 @@
+"""
+Micro-benchmarks of the per-request authorization overhead: the permission
+checks against ROLE_PERMISSIONS and the compiled bitmasks, and the token
+decoding done by the auth dependencies. Needs the server's environment
+(SECRET_KEY, ...) like the app itself:
+
+    python scripts/bench_auth.py --number 100000
+"""
+
+import argparse
+import timeit
+
+from jose import jwt
+
+from app.core import security
+from app.core.config import settings
+from app.core.rbac import AuthContext, permission_mask
+from app.models import ROLE_PERMISSIONS, Action, Resource, Role, TokenPayload, User
+
+
+def dict_is_authorized(resource: Resource, actions: list[Action], user: User) -> bool:
+    # The permission check walking ROLE_PERMISSIONS, as done before the bitmasks
+    if user.role not in ROLE_PERMISSIONS:
+        return False
+    if resource not in ROLE_PERMISSIONS[user.role]:
+        return False
+    for action in actions:
+        if action not in ROLE_PERMISSIONS[user.role][resource]:
+            return False
+    return True
+
+
+def bench(name: str, func, number: int) -> float:
+    seconds = min(timeit.repeat(func, number=number, repeat=5))
+    per_call_us = seconds / number * 1e6
+    print(f"{name:<48} {per_call_us:10.3f} us")
+    return per_call_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--rows", type=int, default=100, help="Rows of a list page")
+    args = parser.parse_args()
+    n = args.number
+
+    user = User(
+        id="user_bench",
+        organization_id="org_bench",
+        current_branch_id="branch_bench",
+        role=Role.MANAGER,
+        full_name="Bench",
+        is_active=True,
+    )
+    auth = AuthContext(user)
+    mask = permission_mask(Resource.LEAD, [Action.READ, Action.WRITE])
+    checks = [
+        (Resource.LEAD, [Action.READ]) if i % 2 else (Resource.PROMPT, [Action.WRITE])
+        for i in range(args.rows)
+    ]
+    token = security.create_tokens(user).access_token
+
+    def decode():
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        )
+        return TokenPayload(**payload)
+
+    token_data = decode()
+
+    print("Permission checks")
+    bench(
+        "dict walk (LEAD, [READ, WRITE])",
+        lambda: dict_is_authorized(Resource.LEAD, [Action.READ, Action.WRITE], user),
+        n,
+    )
+    bench("bitmask, precompiled mask", lambda: auth.has_mask(mask), n)
+    bench(
+        "bitmask, AuthContext.can(LEAD, READ, WRITE)",
+        lambda: auth.can(Resource.LEAD, Action.READ, Action.WRITE),
+        n,
+    )
+    bench(
+        f"dict walk, {args.rows} rows",
+        lambda: [dict_is_authorized(r, a, user) for r, a in checks],
+        n // args.rows,
+    )
+    bench(
+        f"AuthContext.can_many, {args.rows} rows",
+        lambda: auth.can_many(checks),
+        n // args.rows,
+    )
+
+    print("\nPer request")
+    decode_us = bench("jwt.decode + TokenPayload", decode, n // 10)
+    claims_us = bench(
+        "user from stateless token claims",
+        lambda: security.user_from_token(token_data),
+        n // 10,
+    )
+    context_us = bench("AuthContext(user)", lambda: AuthContext(user), n)
+    check_us = bench("AuthContext.require_mask", lambda: auth.require_mask(mask), n)
+    walk_us = bench(
+        "is_authorized dict walk",
+        lambda: dict_is_authorized(Resource.LEAD, [Action.READ, Action.WRITE], user),
+        n,
+    )
+
+    # Before, a route using UserContextWithPermissions next to another auth
+    # dependency decoded the token and resolved the user twice. With tokens
+    # issued without STATELESS_AUTH, each resolution also loads the user.
+    before = 2 * (decode_us + claims_us) + walk_us
+    after = decode_us + claims_us + context_us + check_us
+    print(f"\n{'two auth dependencies, before':<48} {before:10.3f} us")
+    print(f"{'two auth dependencies, after':<48} {after:10.3f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmarks the time-ordered IDs of `get_id` against the random IDs used
+before: their generation, and inserting them into a primary key index (insert
+throughput and index size). The inserts go to temporary tables of the
+server's database, so it needs the server's environment like the app itself:
+
+    python scripts/bench_ids.py --rows 1000000
+"""
+
+import argparse
+import time
+import timeit
+
+from nanoid import generate
+from sqlalchemy import text
+
+from app.core.db import engine
+from app.models import ID_ALPHABET, ObjectType, get_id, get_object_abbreviation
+
+
+def random_id(obj: ObjectType) -> str:
+    # The IDs generated before the time-ordered ones
+    return f"{get_object_abbreviation(obj)}_{generate(ID_ALPHABET)}"
+
+
+def bench_generation(name: str, func, number: int):
+    seconds = min(
+        timeit.repeat(lambda: func(ObjectType.EVENT), number=number, repeat=5)
+    )
+    print(f"{name:<24} {seconds / number * 1e6:10.3f} us/id")
+
+
+def bench_inserts(name: str, func, rows: int, batch: int):
+    table = f"bench_ids_{name}"
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                f"CREATE TEMP TABLE {table} "
+                "(id VARCHAR PRIMARY KEY, created_at TIMESTAMPTZ DEFAULT now())"
+            )
+        )
+        seconds = 0.0
+        for start in range(0, rows, batch):
+            ids = [
+                {"id": func(ObjectType.EVENT)} for _ in range(min(batch, rows - start))
+            ]
+            begin = time.perf_counter()
+            conn.execute(text(f"INSERT INTO {table} (id) VALUES (:id)"), ids)
+            seconds += time.perf_counter() - begin
+        index_size = conn.execute(
+            text(f"SELECT pg_relation_size('{table}_pkey')")
+        ).scalar_one()
+        conn.execute(text(f"DROP TABLE {table}"))
+    print(
+        f"{name:<24} {rows / seconds:10.0f} rows/s"
+        f" {index_size / 2**20:10.1f} MiB index"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--number", type=int, default=100_000)
+    parser.add_argument("--rows", type=int, default=200_000, help="Rows inserted")
+    parser.add_argument("--batch", type=int, default=1_000, help="Rows per INSERT")
+    args = parser.parse_args()
+
+    print("Generation")
+    bench_generation("random (nanoid)", random_id, args.number)
+    bench_generation("time-ordered", get_id, args.number)
+
+    print(f"\nInserting {args.rows} rows into a primary key")
+    bench_inserts("random", random_id, args.rows, args.batch)
+    bench_inserts("time_ordered", get_id, args.rows, args.batch)
+
+
+if __name__ == "__main__":
+    main()
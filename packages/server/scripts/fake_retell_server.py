@@ -0,0 +1,98 @@
+"""
+A local stand-in for the Retell API, implementing the endpoints used by the
+server. Point the server at it to exercise the Retell client without network
+access or a Retell account:
+
+    python scripts/fake_retell_server.py --port 8099
+    RETELL_BASE_URL=http://localhost:8099 uvicorn app.main:app
+
+Latency and failures can be injected to exercise the timeouts and the circuit
+breaker, e.g. `--latency 0.2 --failure-rate 0.5`.
+"""
+
+import argparse
+import asyncio
+import random
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI(title="Fake Retell API")
+app.state.latency = 0.0
+app.state.failure_rate = 0.0
+
+llms: dict[str, dict] = {}
+agents: dict[str, dict] = {}
+
+
+def _now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    if app.state.latency:
+        await asyncio.sleep(app.state.latency)
+    if random.random() < app.state.failure_rate:
+        return JSONResponse({"error_message": "Injected failure"}, status_code=503)
+    return await call_next(request)
+
+
+@app.post("/create-retell-llm")
+async def create_llm(request: Request):
+    llm_id = uuid.uuid4().hex
+    llms[llm_id] = {
+        **(await request.json()),
+        "llm_id": llm_id,
+        "llm_websocket_url": f"wss://fake-retell/llm-websocket/{llm_id}",
+        "last_modification_timestamp": _now_ms(),
+    }
+    return llms[llm_id]
+
+
+@app.patch("/update-retell-llm/{llm_id}")
+async def update_llm(llm_id: str, request: Request):
+    if llm_id not in llms:
+        return JSONResponse({"error_message": "LLM not found"}, status_code=404)
+    llms[llm_id].update(await request.json(), last_modification_timestamp=_now_ms())
+    return llms[llm_id]
+
+
+@app.post("/create-agent")
+async def create_agent(request: Request):
+    agent_id = uuid.uuid4().hex
+    agents[agent_id] = {
+        **(await request.json()),
+        "agent_id": agent_id,
+        "last_modification_timestamp": _now_ms(),
+    }
+    return agents[agent_id]
+
+
+@app.post("/register-call")
+async def register_call(request: Request):
+    body = await request.json()
+    if body.get("agent_id") not in agents:
+        return JSONResponse({"error_message": "Agent not found"}, status_code=404)
+    return {
+        **body,
+        "call_id": uuid.uuid4().hex,
+        "call_status": "registered",
+        "start_timestamp": _now_ms(),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="0 to 1")
+    args = parser.parse_args()
+
+    app.state.latency = args.latency
+    app.state.failure_rate = args.failure_rate
+    uvicorn.run(app, host=args.host, port=args.port)
@@ -254,8 +254,9 @@ Args:
     branch_id (str): The ID of the branch.
 
 Returns:
-    funnel_trends (dict): A dictionary containing the funnel trends.
     call_trends (dict): A dictionary containing the call trends.
+    call_metrics (dict): The call metrics of the period.
+    previous_call_metrics (dict): The call metrics of the previous period.
  * @summary Get Call Metrics Trends
  */
 export const metricsGetCallMetricsTrends = (
@@ -7,8 +7,11 @@
 import type { CallAnalytics } from './callAnalytics';
 import type { CallCallMetadata } from './callCallMetadata';
 import type { CallDeletedAt } from './callDeletedAt';
+import type { CallDurationMs } from './callDurationMs';
+import type { CallEndTimestamp } from './callEndTimestamp';
 import type { CallPromptId } from './callPromptId';
 import type { CallReport } from './callReport';
+import type { CallStartTimestamp } from './callStartTimestamp';
 import type { CallTranscript } from './callTranscript';
 import type { CallType } from './callType';
 
@@ -21,6 +24,8 @@ export interface Call {
   caller_name?: string;
   created_at?: string;
   deleted_at?: CallDeletedAt;
+  duration_ms?: CallDurationMs;
+  end_timestamp?: CallEndTimestamp;
   id: string;
   lead_id: string;
   object?: string;
@@ -28,6 +33,7 @@ export interface Call {
   profile_snapshot_id: string;
   prompt_id?: CallPromptId;
   report?: CallReport;
+  start_timestamp?: CallStartTimestamp;
   transcript?: CallTranscript;
   type?: CallType;
   updated_at?: string;
@@ -0,0 +1,8 @@
+/**
+ * Generated by orval v6.26.0 🍺
+ * Do not edit manually.
+ * insureai
+ * OpenAPI spec version: 0.1.0
+ */
+
+export type CallDurationMs = number | null;
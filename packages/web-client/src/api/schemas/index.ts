@@ -9,9 +9,12 @@ export * from './call';
 export * from './callAnalytics';
 export * from './callCallMetadata';
 export * from './callDeletedAt';
+export * from './callDurationMs';
+export * from './callEndTimestamp';
 export * from './callPromptId';
 export * from './callReport';
 export * from './callResponse';
+export * from './callStartTimestamp';
 export * from './callTranscript';
 export * from './callType';
 export * from './callsGetCallsParams';
@@ -55,10 +55,12 @@ interface FunnelTrends {
 }
 
 interface CallTrends {
-  event_count_call_started: number;
-  event_count_appointment_call: number;
-  event_count_meeting_call: number;
-  duration_sum: number;
+  call_trends: {
+    event_count_call_started: number;
+    event_count_appointment_call: number;
+    event_count_meeting_call: number;
+    duration_sum: number;
+  };
 }
 
 interface ServerResponse {
@@ -162,7 +164,7 @@ function Dashboard() {
   }
 
   if (callTrendsData) {
-    callTrends = callTrendsData as CallTrends;
+    callTrends = (callTrendsData as CallTrends).call_trends;
   }
 
   let totalDuration;
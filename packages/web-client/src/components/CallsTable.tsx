@@ -7,6 +7,7 @@ import {
   TableHeader,
   TableRow,
 } from "@/components/ui/table";
+import { formatDuration } from "@/lib/utils";
 import Image from "next/image";
 import React from "react";
 import { formatDateString } from "./Funnel";
@@ -106,8 +107,8 @@ const CallsTable: React.FC<CallsTableProps> = ({
                         "Not Available"
                       )
                     ) : column.key === "duration" ? (
-                      call?.call_metadata !== null ? (
-                        JSON.parse(call?.call_metadata as string).duration
+                      call?.duration_ms != null ? (
+                        formatDuration(call.duration_ms)
                       ) : (
                         "Not Available"
                       )